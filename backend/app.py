@@ -1,27 +1,77 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime, timedelta
-import sqlite3
 import os
 import json
 import jwt
-import bcrypt
 import re
+import hashlib
+import math
+import base64
+import codecs
+import atexit
+import csv
+import io
+from contextlib import nullcontext
 from functools import wraps
+from concurrent.futures.process import BrokenProcessPool
 
 try:
-    # When imported as a package (e.g., `gunicorn backend.app:app`)
+    # When imported as a package (e.g., `gunicorn "backend.app:create_app()"`)
     from backend.ml_assistant import assistant
     from backend.ml_recommender import recommender
     from backend.ml_search import semantic_search
     from backend.ml_description_enhancer import description_enhancer
     from backend.ml_success_predictor import success_predictor
+    from backend.database import (
+        ARCHIVE_AFTER_DAYS,
+        archive_past_events,
+        assign_request_clusters,
+        get_db,
+        init_db,
+        read_stats_counters,
+    )
+    from backend.request_ingest import IngestPool, ingest_event_requests
+    from backend.password_service import PasswordService, PasswordServiceBusy
+    from backend.event_access import EventAccessCache
+    from backend.ml_cache import LRUCache
+    from backend.rate_limiter import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+    from backend.expiry_sweeper import EVENT_END, ExpirySweeper, local_now
+    from backend.ical_feed import ICalFeedBuilder
+    from backend.registration_buffer import (
+        EventFullError,
+        EventHasCapacity,
+        RegistrationBuffer,
+    )
+    from backend.task_queue import BoundedExecutor
 except ImportError:  # Fallback for running from `backend/` directly
     from ml_assistant import assistant
     from ml_recommender import recommender
     from ml_search import semantic_search
     from ml_description_enhancer import description_enhancer
     from ml_success_predictor import success_predictor
+    from database import (
+        ARCHIVE_AFTER_DAYS,
+        archive_past_events,
+        assign_request_clusters,
+        get_db,
+        init_db,
+        read_stats_counters,
+    )
+    from request_ingest import IngestPool, ingest_event_requests
+    from password_service import PasswordService, PasswordServiceBusy
+    from event_access import EventAccessCache
+    from ml_cache import LRUCache
+    from rate_limiter import MemoryBucketStore, RateLimiter, SQLiteBucketStore
+    from expiry_sweeper import EVENT_END, ExpirySweeper, local_now
+    from ical_feed import ICalFeedBuilder
+    from registration_buffer import (
+        EventFullError,
+        EventHasCapacity,
+        RegistrationBuffer,
+    )
+    from task_queue import BoundedExecutor
 
 # Configure Flask to serve static files from frontend
 import os.path
@@ -66,8 +116,6 @@ app.config["SECRET_KEY"] = os.environ.get(
     "SECRET_KEY", "your-secret-key-change-in-production-2024"
 )
 
-DB_NAME = os.path.join(os.path.dirname(__file__), "events.db")
-
 # School email domains (customize for your school)
 SCHOOL_EMAIL_DOMAINS = ["kiit.ac.in"]  # Only KIIT email addresses allowed
 
@@ -79,119 +127,162 @@ SOCIETY_PRESIDENT_SECRET_KEY = os.environ.get(
 )
 ADMIN_SECRET_KEY = os.environ.get("ADMIN_SECRET_KEY", "admin-secret-2024")
 
+# Decoded session tokens, kept until the token's own expiry
+token_cache = LRUCache(maxsize=int(os.environ.get("TOKEN_CACHE_SIZE", 4096)))
 
-def init_db():
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+# User rows for /api/auth/me and profiles; USER_CACHE_TTL=0 disables
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", 300))
+user_cache = LRUCache(
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", 4096)), default_ttl=USER_CACHE_TTL
+)
 
-    # Users table
-    c.execute("""CREATE TABLE IF NOT EXISTS users
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  email TEXT UNIQUE NOT NULL,
-                  password_hash TEXT NOT NULL,
-                  name TEXT,
-                  role TEXT DEFAULT 'student',
-                  society_name TEXT,
-                  created_at TEXT DEFAULT CURRENT_TIMESTAMP)""")
-
-    # Events table
-    c.execute("""CREATE TABLE IF NOT EXISTS events
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  title TEXT NOT NULL,
-                  description TEXT,
-                  category TEXT NOT NULL,
-                  date TEXT NOT NULL,
-                  time TEXT NOT NULL,
-                  venue TEXT NOT NULL,
-                  poster_url TEXT,
-                  registration_url TEXT,
-                  society TEXT,
-                  created_by INTEGER,
-                  event_password_hash TEXT,
-                  is_locked INTEGER DEFAULT 0,
-                  is_expired INTEGER DEFAULT 0,
-                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY (created_by) REFERENCES users(id))""")
-
-    # Migrate: Add is_expired column if it doesn't exist
-    c.execute("PRAGMA table_info(events)")
-    columns = [row[1] for row in c.fetchall()]
-    if "is_expired" not in columns:
-        try:
-            c.execute("ALTER TABLE events ADD COLUMN is_expired INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Added is_expired column to events table")
-        except Exception as e:
-            print(f"Note: is_expired column may already exist: {e}")
-
-    # Migrate: Add location columns for precise navigation
-    location_columns = [
-        "location_id",
-        "location_lat",
-        "location_lng",
-        "location_address",
-    ]
-    for col in location_columns:
-        if col not in columns:
-            try:
-                if col == "location_id":
-                    c.execute("ALTER TABLE events ADD COLUMN location_id TEXT")
-                elif col == "location_lat":
-                    c.execute("ALTER TABLE events ADD COLUMN location_lat REAL")
-                elif col == "location_lng":
-                    c.execute("ALTER TABLE events ADD COLUMN location_lng REAL")
-                elif col == "location_address":
-                    c.execute("ALTER TABLE events ADD COLUMN location_address TEXT")
-                conn.commit()
-                print(f"✅ Added {col} column to events table")
-            except Exception as e:
-                print(f"Note: {col} column may already exist: {e}")
-
-    # Registrations table
-    c.execute("""CREATE TABLE IF NOT EXISTS registrations
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  event_id INTEGER,
-                  user_id INTEGER,
-                  user_email TEXT,
-                  registered_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY (event_id) REFERENCES events(id),
-                  FOREIGN KEY (user_id) REFERENCES users(id))""")
-
-    # Event Requests table (for AI assistant)
-    c.execute("""CREATE TABLE IF NOT EXISTS event_requests
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  user_id INTEGER,
-                  user_email TEXT,
-                  request_text TEXT NOT NULL,
-                  category_detected TEXT,
-                  sentiment TEXT,
-                  auto_response TEXT,
-                  status TEXT DEFAULT 'pending',
-                  admin_response TEXT,
-                  admin_id INTEGER,
-                  society_name TEXT,
-                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                  responded_at TEXT,
-                  FOREIGN KEY (user_id) REFERENCES users(id),
-                  FOREIGN KEY (admin_id) REFERENCES users(id))""")
-
-    # Banned Words table (for content moderation)
-    c.execute("""CREATE TABLE IF NOT EXISTS banned_words
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  word TEXT UNIQUE NOT NULL,
-                  added_by INTEGER,
-                  reason TEXT,
-                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-                  FOREIGN KEY (added_by) REFERENCES users(id))""")
+# Upper bound on events accepted by /api/ml/predict-batch
+MAX_BATCH_PREDICTIONS = int(os.environ.get("MAX_BATCH_PREDICTIONS", 100))
 
-    conn.commit()
-    conn.close()
+# Streaming description analysis (/api/ml/enhance-description/stream)
+DESCRIPTION_STREAM_CHUNK_SIZE = 16 * 1024
+MAX_STREAM_DESCRIPTION_BYTES = int(
+    os.environ.get("MAX_STREAM_DESCRIPTION_BYTES", 1024 * 1024)
+)
+
+# Background ML analysis of newly created events
+analysis_queue = BoundedExecutor(
+    max_workers=int(os.environ.get("ANALYSIS_WORKERS", 2)),
+    max_backlog=int(os.environ.get("ANALYSIS_BACKLOG", 100)),
+    name="event-analysis",
+)
+
+# Background promotion of waitlisted users when seats free up
+promotion_queue = BoundedExecutor(
+    max_workers=1,
+    max_backlog=int(os.environ.get("PROMOTION_BACKLOG", 100)),
+    name="waitlist-promotion",
+)
+
+# bcrypt runs in its own processes so logins cannot tie up request threads;
+# once workers + backlog operations are in flight, callers get a 503
+password_service = PasswordService(
+    max_workers=int(os.environ.get("PASSWORD_WORKERS", 2)),
+    max_backlog=int(os.environ.get("PASSWORD_BACKLOG", 16)),
+    timeout=float(os.environ.get("PASSWORD_TIMEOUT", 5)),
+)
+PASSWORD_RETRY_AFTER = 1
+
+# Locked events: verified passwords are remembered (as HMAC digests) for a
+# few minutes, and verify-password hands out a signed event access token
+event_access = EventAccessCache(
+    app.config["SECRET_KEY"],
+    ttl=int(os.environ.get("EVENT_PASSWORD_CACHE_TTL", 300)),
+    token_ttl=int(os.environ.get("EVENT_ACCESS_TOKEN_TTL", 900)),
+)
+
+# Bulk assistant request ingestion (/api/assistant/requests/bulk); the
+# analysis runs in its own processes and extra concurrent imports get a 503
+MAX_BULK_ASSISTANT_REQUESTS = int(os.environ.get("MAX_BULK_ASSISTANT_REQUESTS", 500))
+ingest_pool = IngestPool(
+    max_workers=int(os.environ.get("INGEST_WORKERS", 2)),
+    max_imports=int(os.environ.get("INGEST_MAX_IMPORTS", 2)),
+)
+
+# Upper bound on emails accepted by /api/events/<id>/register/bulk
+MAX_BULK_REGISTRATIONS = int(os.environ.get("MAX_BULK_REGISTRATIONS", 200))
+
+# Calendar range queries (/api/events/range): longest span served at once
+MAX_EVENT_RANGE_DAYS = 366
+
+# .ics subscription feeds: VEVENT fragments cached per event revision
+ical_feeds = ICalFeedBuilder(
+    app.config["SECRET_KEY"],
+    os.environ.get("ICAL_DOMAIN", "campus-event-navigator"),
+    maxsize=int(os.environ.get("ICAL_CACHE_SIZE", 4096)),
+)
+ICAL_MAX_AGE = int(os.environ.get("ICAL_MAX_AGE", 300))
+
+# Nearby events (/api/events/nearby): radius in metres, and result cap
+NEARBY_DEFAULT_RADIUS_M = 1000
+MAX_NEARBY_RADIUS_M = int(os.environ.get("MAX_NEARBY_RADIUS_M", 20000))
+NEARBY_PAGE_SIZE = 50
+
+# A user's registered events (/api/users/<id>/events), per upcoming/past bucket
+USER_EVENTS_PAGE_SIZE = 50
+MAX_USER_EVENTS_PAGE_SIZE = 200
+
+# Admin request listing (/api/assistant/requests), newest first
+ASSISTANT_REQUESTS_PAGE_SIZE = 50
+MAX_ASSISTANT_REQUESTS_PAGE_SIZE = 200
+
+# Columns of the compact listing; the long auto_response and admin_response
+# texts are only sent with ?include=responses
+EVENT_REQUEST_LIST_COLUMNS = [
+    "id",
+    "user_id",
+    "user_email",
+    "request_text",
+    "category_detected",
+    "sentiment",
+    "status",
+    "admin_id",
+    "society_name",
+    "cluster_id",
+    "created_at",
+    "responded_at",
+]
+
+# Optional write-behind registration mode for flash crowds: registrations
+# are acknowledged from a journaled in-memory buffer and written in batches
+REGISTRATION_WRITE_BEHIND = (
+    os.environ.get("REGISTRATION_WRITE_BEHIND", "false").lower() == "true"
+)
+REGISTRATION_FLUSH_INTERVAL_MS = float(
+    os.environ.get("REGISTRATION_FLUSH_INTERVAL_MS", 5)
+)
+REGISTRATION_JOURNAL_DIR = os.environ.get(
+    "REGISTRATION_JOURNAL_DIR",
+    os.path.join(os.path.dirname(__file__), "registration_journal"),
+)
+
+# Token-bucket limits on public endpoints that are costly to serve, as
+# "requests/seconds" per client IP and per user (e.g. RATE_LIMIT_LOGIN=10/60).
+# RATE_LIMIT_STORE=sqlite shares the buckets between all workers on a host.
+RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "true").lower() == "true"
+
+# Number of reverse proxies in front of the app. Each appends the address it
+# received the request from to X-Forwarded-For, so only that many hops from
+# the right are trustworthy; anything further left is set by the client.
+RATE_LIMIT_PROXY_HOPS = int(os.environ.get("RATE_LIMIT_PROXY_HOPS", 0))
+if RATE_LIMIT_PROXY_HOPS > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=RATE_LIMIT_PROXY_HOPS)
+
+
+def _rate_limit_setting(name, default):
+    capacity, period = os.environ.get(f"RATE_LIMIT_{name.upper()}", default).split("/")
+    return int(capacity), float(period)
+
+
+RATE_LIMITS = {
+    "login": _rate_limit_setting("login", "10/60"),
+    "register": _rate_limit_setting("register", "5/300"),
+    "verify_password": _rate_limit_setting("verify_password", "10/60"),
+    "assistant_request": _rate_limit_setting("assistant_request", "20/60"),
+}
+if os.environ.get("RATE_LIMIT_STORE", "memory").lower() == "sqlite":
+    rate_limit_store = SQLiteBucketStore(
+        os.environ.get(
+            "RATE_LIMIT_DB", os.path.join(os.path.dirname(__file__), "rate_limits.db")
+        )
+    )
+else:
+    rate_limit_store = MemoryBucketStore()
+rate_limiter = RateLimiter(rate_limit_store, RATE_LIMITS)
 
+# Background sweeper that marks past events expired; EXPIRY_SWEEP_INTERVAL
+# is in seconds, 0 turns it off
+EXPIRY_SWEEP_INTERVAL = float(os.environ.get("EXPIRY_SWEEP_INTERVAL", 60))
+EXPIRY_SWEEP_BATCH = int(os.environ.get("EXPIRY_SWEEP_BATCH", 500))
 
-def get_db():
-    conn = sqlite3.connect(DB_NAME)
-    conn.row_factory = sqlite3.Row
-    return conn
+# Streaming CSV/NDJSON exports: rows fetched from the cursor per batch
+EXPORT_BATCH_SIZE = 500
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
 
 
 def check_banned_words(text):
@@ -252,6 +343,257 @@ def check_banned_words(text):
         return None
 
 
+def analyze_event(event_id, event_data):
+    """Run description analysis and success prediction and store the scores"""
+    try:
+        description_analysis = None
+        if event_data.get("description"):
+            description_analysis = description_enhancer.analyze_description(
+                event_data.get("description", ""),
+                event_data.get("title", ""),
+                event_data.get("category", ""),
+                event_data.get("date", ""),
+                event_data.get("venue", ""),
+            )
+        prediction = success_predictor.predict_success(
+            event_data, description_analysis
+        )
+
+        conn = get_db()
+        c = conn.cursor()
+        c.execute(
+            """UPDATE events
+               SET description_score = ?, success_score = ?, success_level = ?,
+                   predicted_registrations = ?, ml_analyzed_at = CURRENT_TIMESTAMP
+               WHERE id = ?""",
+            (
+                description_analysis["score"] if description_analysis else None,
+                prediction["success_score"],
+                prediction["level"],
+                prediction["predicted_registrations"],
+                event_id,
+            ),
+        )
+        conn.commit()
+        conn.close()
+    except Exception as e:
+        import traceback
+
+        print(f"Error analyzing event {event_id}: {str(e)}")
+        print(traceback.format_exc())
+        raise
+
+
+def queue_event_analysis(event_id, event_data):
+    """Queue background analysis; returns False if the queue is full"""
+    fields = ["title", "description", "category", "date", "time", "venue", "society"]
+    snapshot = {field: event_data.get(field, "") for field in fields}
+    future = analysis_queue.submit(analyze_event, event_id, snapshot)
+    if future is None:
+        print(f"⚠️ Analysis queue full, event {event_id} left unscored")
+        return False
+    return True
+
+
+def event_request_to_dict(row):
+    """Serialize an event_requests row, leaving out the binary MinHash signature"""
+    req = dict(row)
+    req.pop("signature", None)
+    return req
+
+
+def stream_export(query, params, columns, fmt, filename):
+    """
+    Stream query results as a CSV or NDJSON download
+
+    Rows are stepped through the SQLite cursor EXPORT_BATCH_SIZE at a time
+    and written out as they are read, so memory use does not grow with the
+    size of the export. The connection is opened inside the generator so it
+    lives on the thread that serves the response; the database runs in WAL
+    mode (see init_db), so a slow download does not hold off writers.
+    """
+
+    def generate():
+        conn = get_db()
+        try:
+            c = conn.execute(query, params)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if fmt == "csv":
+                writer.writerow(columns)
+            while True:
+                rows = c.fetchmany(EXPORT_BATCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    if fmt == "csv":
+                        writer.writerow([row[col] for col in columns])
+                    else:
+                        buffer.write(json.dumps({col: row[col] for col in columns}))
+                        buffer.write("\n")
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue()
+        finally:
+            conn.close()
+
+    return Response(
+        generate(),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'},
+    )
+
+
+def encode_keyset_cursor(sort_key, row_id):
+    """Opaque keyset cursor pointing just past the row with this (sort key, id)"""
+    raw = json.dumps([sort_key, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_keyset_cursor(cursor, key_type=str):
+    """Return (sort key, id) from a cursor; raises ValueError if malformed"""
+    try:
+        sort_key, row_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if type(sort_key) is not key_type or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return sort_key, row_id
+
+
+def insert_registration(conn, event_id, user_id, user_email):
+    """
+    Register a user for an event and commit
+
+    Relies on the unique (event_id, user_id) index, so concurrent duplicate
+    clicks cannot both insert, and checks the event's seat counter in the
+    same statement, so a full event is never overbooked. Returns the
+    event's updated registration count, read in the same transaction, or
+    None if the user was already registered. Raises EventFullError if the
+    event is at capacity.
+    """
+    c = conn.cursor()
+
+    # A full event is turned away on a read of its seat counter, without
+    # taking the write lock
+    event = c.execute(
+        "SELECT capacity, registration_count FROM events WHERE id = ?", (event_id,)
+    ).fetchone()
+    if event and event[0] is not None and event[1] >= event[0]:
+        inserted = None
+    else:
+        inserted = c.execute(
+            """INSERT INTO registrations (event_id, user_id, user_email)
+               SELECT ?, ?, ? FROM events
+               WHERE id = ? AND (capacity IS NULL OR registration_count < capacity)
+               ON CONFLICT (event_id, user_id) DO NOTHING
+               RETURNING id""",
+            (event_id, user_id, user_email, event_id),
+        ).fetchone()
+    if inserted is None:
+        conn.rollback()
+        existing = c.execute(
+            "SELECT 1 FROM registrations WHERE event_id = ? AND user_id = ?",
+            (event_id, user_id),
+        ).fetchone()
+        if existing:
+            return None
+        raise EventFullError("Event is full")
+    count = c.execute(
+        "SELECT registration_count FROM events WHERE id = ?", (event_id,)
+    ).fetchone()[0]
+    conn.commit()
+    return count
+
+
+def record_registration(conn, event_id, user_id, user_email, capacity=None):
+    """
+    Register through the write-behind buffer when enabled, else directly
+
+    Events with a capacity always register directly, since seats must be
+    checked in the same transaction as the insert. The buffer checks the
+    capacity as well, for an event given one after the caller looked.
+    """
+    if registration_buffer is not None and capacity is None:
+        try:
+            return registration_buffer.add(conn, event_id, user_id, user_email)
+        except EventHasCapacity:
+            pass
+    return insert_registration(conn, event_id, user_id, user_email)
+
+
+def join_waitlist(conn, event_id, user_id, user_email):
+    """Add a user to an event's waitlist; returns their position, or None if already on it"""
+    c = conn.cursor()
+    entry = c.execute(
+        """INSERT INTO event_waitlist (event_id, user_id, user_email) VALUES (?, ?, ?)
+           ON CONFLICT (event_id, user_id) DO NOTHING
+           RETURNING id""",
+        (event_id, user_id, user_email),
+    ).fetchone()
+    if entry is None:
+        conn.rollback()
+        return None
+    position = c.execute(
+        "SELECT COUNT(*) FROM event_waitlist WHERE event_id = ? AND id <= ?",
+        (event_id, entry[0]),
+    ).fetchone()[0]
+    conn.commit()
+    return position
+
+
+def promote_waitlist(event_id):
+    """Move waitlisted users into free seats, oldest first, in one transaction"""
+    conn = get_db()
+    try:
+        c = conn.cursor()
+        c.execute("BEGIN IMMEDIATE")
+        event = c.execute(
+            "SELECT capacity, registration_count FROM events WHERE id = ?",
+            (event_id,),
+        ).fetchone()
+        if not event:
+            conn.rollback()
+            return 0
+        if event["capacity"] is None:
+            seats = -1  # no limit: promote everyone
+        else:
+            seats = event["capacity"] - event["registration_count"]
+            if seats <= 0:
+                conn.rollback()
+                return 0
+
+        waiting = c.execute(
+            """SELECT id, user_id, user_email FROM event_waitlist
+               WHERE event_id = ? ORDER BY id LIMIT ?""",
+            (event_id, seats),
+        ).fetchall()
+        c.executemany(
+            """INSERT INTO registrations (event_id, user_id, user_email) VALUES (?, ?, ?)
+               ON CONFLICT (event_id, user_id) DO NOTHING""",
+            [(event_id, row["user_id"], row["user_email"]) for row in waiting],
+        )
+        c.executemany(
+            "DELETE FROM event_waitlist WHERE id = ?", [(row["id"],) for row in waiting]
+        )
+        conn.commit()
+        if waiting:
+            print(f"✅ Promoted {len(waiting)} waitlisted users for event {event_id}")
+        return len(waiting)
+    finally:
+        conn.close()
+
+
+def queue_waitlist_promotion(event_id):
+    """Schedule waitlist promotion for an event that may have free seats"""
+    if promotion_queue.submit(promote_waitlist, event_id) is None:
+        print(f"⚠️ Promotion queue full, event {event_id} waitlist not promoted")
+        return False
+    return True
+
+
 # Authentication helpers
 def validate_school_email(email):
     """Validate if email is from school domain"""
@@ -262,13 +604,36 @@ def validate_school_email(email):
 
 
 def hash_password(password):
-    """Hash password using bcrypt"""
-    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    """Hash password using bcrypt (raises PasswordServiceBusy when saturated)"""
+    return password_service.hash(password)
 
 
 def verify_password(password, password_hash):
-    """Verify password against hash"""
-    return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    """Verify password against hash (raises PasswordServiceBusy when saturated)"""
+    return password_service.verify(password, password_hash)
+
+
+def check_event_password(event_id, password_hash, password=None, access_token=None):
+    """Check a locked event's password or access token; bcrypt only on a cache miss"""
+    if access_token and event_access.check_token(access_token, event_id, password_hash):
+        return True
+    if not password:
+        return False
+    if event_access.check(event_id, password_hash, password):
+        return True
+    if verify_password(password, password_hash):
+        event_access.remember(event_id, password_hash, password)
+        return True
+    return False
+
+
+def password_service_busy():
+    """503 response for requests turned away by the password service"""
+    return (
+        jsonify({"error": "Server is busy, please try again in a moment"}),
+        503,
+        {"Retry-After": str(PASSWORD_RETRY_AFTER)},
+    )
 
 
 def generate_token(user_id, email, role="student"):
@@ -283,14 +648,38 @@ def generate_token(user_id, email, role="student"):
 
 
 def verify_token(token):
-    """Verify JWT token"""
+    """Verify JWT token (decoded claims are cached until the token expires)"""
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
     try:
         payload = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
-        return payload
     except jwt.ExpiredSignatureError:
         return None
     except jwt.InvalidTokenError:
         return None
+    if "exp" in payload:
+        token_cache.set(key, payload, expires_at=payload["exp"])
+    return payload
+
+
+def get_user(c, user_id):
+    """Public user fields as a dict, or None (served from user_cache when enabled)"""
+    if USER_CACHE_TTL > 0:
+        user = user_cache.get(user_id)
+        if user is not None:
+            return user
+    user = c.execute(
+        "SELECT id, email, name, role, society_name, created_at FROM users WHERE id = ?",
+        (user_id,),
+    ).fetchone()
+    if not user:
+        return None
+    user = dict(user)
+    if USER_CACHE_TTL > 0:
+        user_cache.set(user_id, user)
+    return user
 
 
 def require_auth(f):
@@ -333,6 +722,68 @@ def require_role(*allowed_roles):
     return decorator
 
 
+def client_ip():
+    """Caller's address, as seen by the outermost trusted proxy (see ProxyFix)"""
+    return request.remote_addr or "unknown"
+
+
+def submitted_email():
+    """Email in the JSON body, for limiting logins and signups per account and IP"""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict) and isinstance(data.get("email"), str):
+        return data["email"].lower().strip() or None
+    return None
+
+
+def rate_limited(name, user_key=None):
+    """
+    Decorator to apply the named token-bucket limit per IP and per user
+
+    A user proven by their token is limited on their own. A user only named
+    in the request (user_key, e.g. the email of a login) is limited per IP,
+    so attempts against an account from elsewhere cannot lock its owner out.
+    """
+
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                return f(*args, **kwargs)
+
+            ip = client_ip()
+            keys = [f"ip:{ip}"]
+            user = None
+            token = request.headers.get("Authorization", "")
+            if token.startswith("Bearer "):
+                payload = verify_token(token[7:])
+                if payload:
+                    user = payload["user_id"]
+            if user is not None:
+                keys.append(f"user:{user}")
+            elif user_key is not None:
+                claimed = user_key()
+                if claimed is not None:
+                    keys.append(f"account:{ip}:{claimed}")
+
+            retry_after = rate_limiter.hit(name, keys)
+            if retry_after:
+                return (
+                    jsonify(
+                        {
+                            "error": "Too many requests, please try again later",
+                            "retry_after": retry_after,
+                        }
+                    ),
+                    429,
+                    {"Retry-After": str(retry_after)},
+                )
+            return f(*args, **kwargs)
+
+        return decorated
+
+    return decorator
+
+
 @app.route("/api/events", methods=["GET"])
 def get_events():
     conn = get_db()
@@ -347,6 +798,7 @@ def get_events():
     has_registration_url = "registration_url" in columns
     has_is_expired = "is_expired" in columns
     has_location = "location_id" in columns
+    has_ml_scores = "success_score" in columns
 
     # Build SELECT query with available columns
     base_fields = [
@@ -379,32 +831,60 @@ def get_events():
             ["e.location_id", "e.location_lat", "e.location_lng", "e.location_address"]
         )
 
-    base_fields.append(
-        "(SELECT COUNT(*) FROM registrations WHERE event_id = e.id) as registration_count"
-    )
+    if has_ml_scores:
+        base_fields.extend(
+            [
+                "e.description_score",
+                "e.success_score",
+                "e.success_level",
+                "e.predicted_registrations",
+            ]
+        )
 
-    query = f"""SELECT {", ".join(base_fields)} FROM events e WHERE 1=1"""
+    if "capacity" in columns:
+        base_fields.append("e.capacity")
+    if "registration_count" in columns:
+        base_fields.append("e.registration_count")
+    else:
+        base_fields.append(
+            "(SELECT COUNT(*) FROM registrations WHERE event_id = e.id) as registration_count"
+        )
 
+    fields = ", ".join(base_fields)
+    filters = ""
     params = []
 
     # Filter out expired events by default (unless explicitly requested)
+    active_filter = ""
     show_expired = request.args.get("show_expired", "false").lower() == "true"
     if not show_expired:
         if has_is_expired:
-            query += " AND (e.is_expired = 0 OR e.is_expired IS NULL)"
+            # Kept current by the expiry sweeper; matches idx_events_active
+            active_filter = " AND e.is_expired = 0"
         else:
             # Auto-detect expired events based on date/time
-            query += " AND (datetime(e.date || ' ' || e.time) >= datetime('now'))"
+            active_filter = " AND (datetime(e.date || ' ' || e.time) >= datetime('now'))"
 
     if category and category != "all":
-        query += " AND e.category = ?"
+        filters += " AND e.category = ?"
         params.append(category)
 
     if search:
-        query += " AND (e.title LIKE ? OR e.description LIKE ?)"
+        filters += " AND (e.title LIKE ? OR e.description LIKE ?)"
         params.extend([f"%{search}%", f"%{search}%"])
 
-    query += " ORDER BY e.date, e.time"
+    # Archived events are long past, so asking for them lists them even
+    # without show_expired
+    include_archived = request.args.get("include_archived", "false").lower() == "true"
+    if include_archived:
+        query = f"""SELECT {fields}, 0 AS archived FROM events e WHERE 1=1{active_filter}{filters}
+                    UNION ALL
+                    SELECT {fields}, 1 AS archived FROM events_archive e WHERE 1=1{filters}
+                    ORDER BY date, time"""
+        params = params + params
+    else:
+        query = f"""SELECT {fields} FROM events e WHERE 1=1{active_filter}{filters}
+                    ORDER BY e.date, e.time"""
 
     try:
         events = c.execute(query, params).fetchall()
@@ -475,8 +955,17 @@ def create_event():
                 }
             ), 400
 
-        conn = get_db()
-        c = conn.cursor()
+        # Optional capacity (unlimited when not given)
+        capacity = data.get("capacity")
+        if capacity in ("", None):
+            capacity = None
+        else:
+            try:
+                capacity = int(capacity)
+            except (TypeError, ValueError):
+                capacity = 0
+            if capacity < 1:
+                return jsonify({"error": "Capacity must be a positive number"}), 400
 
         # Handle event password (optional - events are open by default)
         event_password_hash = None
@@ -486,6 +975,9 @@ def create_event():
             event_password_hash = hash_password(data["event_password"])
             is_locked = 1
 
+        conn = get_db()
+        c = conn.cursor()
+
         # Check if location data is provided (for privileged users)
         location_id = data.get("location_id")
         location_lat = data.get("location_lat")
@@ -540,16 +1032,347 @@ def create_event():
                 ),
             )
 
-        conn.commit()
         event_id = c.lastrowid
+        if capacity is not None:
+            c.execute(
+                "UPDATE events SET capacity = ? WHERE id = ?", (capacity, event_id)
+            )
+        conn.commit()
         conn.close()
 
-        return jsonify({"id": event_id, "message": "Event created successfully"}), 201
+        analysis_queued = queue_event_analysis(event_id, data)
+
+        return jsonify(
+            {
+                "id": event_id,
+                "message": "Event created successfully",
+                "analysis_queued": analysis_queued,
+            }
+        ), 201
+    except PasswordServiceBusy:
+        return password_service_busy()
     except Exception as e:
         print(f"Error creating event: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
+def parse_range_bound(value):
+    """Epoch seconds from an integer string or an ISO date/datetime (local time)"""
+    value = value.strip()
+    if value.lstrip("-").isdigit():
+        return int(value)
+    return int(datetime.fromisoformat(value).timestamp())
+
+
+@app.route("/api/events/range", methods=["GET"])
+def get_events_in_range():
+    """
+    Events starting in [from, to), in start order, expired ones included
+
+    from/to are epoch seconds or ISO dates/datetimes (e.g. a calendar
+    month: ?from=2025-03-01&to=2025-04-01). Optional: category,
+    include_archived=true.
+    """
+    try:
+        try:
+            start = parse_range_bound(request.args["from"])
+            end = parse_range_bound(request.args["to"])
+        except KeyError:
+            return jsonify({"error": "from and to are required"}), 400
+        except ValueError:
+            return jsonify(
+                {"error": "from and to must be epoch seconds or ISO dates"}
+            ), 400
+        if end <= start:
+            return jsonify({"error": "to must be after from"}), 400
+        if end - start > MAX_EVENT_RANGE_DAYS * 86400:
+            return jsonify(
+                {"error": f"Range cannot exceed {MAX_EVENT_RANGE_DAYS} days"}
+            ), 400
+
+        category = request.args.get("category")
+        include_archived = (
+            request.args.get("include_archived", "false").lower() == "true"
+        )
+
+        fields = """id, title, description, category, date, time, venue, poster_url,
+                    registration_url, society, is_locked, is_expired, capacity,
+                    registration_count, starts_ts"""
+        filters = " AND category = ?" if category and category != "all" else ""
+        params = [start, end] + ([category] if filters else [])
+
+        tables = ["events", "events_archive"] if include_archived else ["events"]
+        query = " UNION ALL ".join(
+            f"""SELECT {fields}, {int(table == "events_archive")} AS archived FROM {table}
+                WHERE starts_ts >= ? AND starts_ts < ?{filters}"""
+            for table in tables
+        )
+        query += " ORDER BY starts_ts, id"
+
+        conn = get_db()
+        events = conn.execute(query, params * len(tables)).fetchall()
+        conn.close()
+
+        return jsonify(
+            {"events": [dict(event) for event in events], "from": start, "to": end}
+        ), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def distance_m(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance in metres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lng2 - lng1) / 2) ** 2
+    )
+    return 2 * 6371000 * math.asin(math.sqrt(min(a, 1.0)))
+
+
+def radius_bbox(lat, lng, radius_m):
+    """(min_lat, min_lng, max_lat, max_lng) enclosing a circle around a point"""
+    dlat = math.degrees(radius_m / 6371000)
+    dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+    return (
+        max(lat - dlat, -90.0),
+        max(lng - dlng, -180.0),
+        min(lat + dlat, 90.0),
+        min(lng + dlng, 180.0),
+    )
+
+
+def bbox_too_large(box):
+    """
+    Whether a box is bigger than the one around the largest allowed radius
+
+    Keeps the candidates of a bbox query as bounded as those of a radius
+    query; like radius_bbox, the east-west side is measured at the middle
+    latitude.
+    """
+    min_lat, min_lng, max_lat, max_lng = box
+    # Radians of arc, with room for rounding in boxes made by radius_bbox
+    max_side = 2 * MAX_NEARBY_RADIUS_M / 6371000 * (1 + 1e-9)
+    middle = math.radians((min_lat + max_lat) / 2)
+    return (
+        math.radians(max_lat - min_lat) > max_side
+        or math.radians(max_lng - min_lng) * max(math.cos(middle), 1e-6) > max_side
+    )
+
+
+@app.route("/api/events/nearby", methods=["GET"])
+def get_nearby_events():
+    """
+    Active events with a location near a point or inside a box
+
+    ?lat=&lng=[&radius=metres] returns events within the radius, nearest
+    first. ?bbox=min_lat,min_lng,max_lat,max_lng returns events in the box,
+    nearest first if lat/lng are given too, otherwise in start order. A box
+    may be no larger than the one around MAX_NEARBY_RADIUS_M. Optional:
+    category, limit. Candidates come from the events_geo R*Tree, so
+    distances are only computed for events inside the box.
+    """
+    try:
+        try:
+            lat = request.args.get("lat", type=float)
+            lng = request.args.get("lng", type=float)
+            has_center = lat is not None and lng is not None
+            if "bbox" in request.args:
+                box = [float(v) for v in request.args["bbox"].split(",")]
+                if len(box) != 4:
+                    raise ValueError("bbox")
+                radius = None
+            elif has_center:
+                radius = request.args.get(
+                    "radius", NEARBY_DEFAULT_RADIUS_M, type=float
+                )
+                if not 0 < radius <= MAX_NEARBY_RADIUS_M:
+                    return jsonify(
+                        {
+                            "error": f"radius must be between 0 and {MAX_NEARBY_RADIUS_M} metres"
+                        }
+                    ), 400
+                box = radius_bbox(lat, lng, radius)
+            else:
+                return jsonify({"error": "lat and lng, or bbox, are required"}), 400
+        except ValueError:
+            return jsonify(
+                {"error": "bbox must be min_lat,min_lng,max_lat,max_lng"}
+            ), 400
+        min_lat, min_lng, max_lat, max_lng = box
+        if min_lat > max_lat or min_lng > max_lng:
+            return jsonify({"error": "bbox minimums must not exceed maximums"}), 400
+        if radius is None and bbox_too_large(box):
+            return jsonify(
+                {
+                    "error": f"bbox sides cannot exceed {2 * MAX_NEARBY_RADIUS_M} metres"
+                }
+            ), 400
+
+        limit = request.args.get("limit", NEARBY_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), NEARBY_PAGE_SIZE * 4)
+        category = request.args.get("category")
+        filters = " AND e.category = ?" if category and category != "all" else ""
+
+        # The R*Tree stores 32-bit floats, so the exact columns are checked too
+        query = f"""SELECT e.id, e.title, e.description, e.category, e.date, e.time,
+                           e.venue, e.poster_url, e.society, e.is_locked, e.capacity,
+                           e.registration_count, e.location_id, e.location_lat,
+                           e.location_lng, e.location_address
+                    FROM events_geo g
+                    JOIN events e ON e.id = g.id
+                    WHERE g.max_lat >= ? AND g.min_lat <= ?
+                      AND g.max_lng >= ? AND g.min_lng <= ?
+                      AND e.location_lat BETWEEN ? AND ?
+                      AND e.location_lng BETWEEN ? AND ?
+                      AND e.is_expired = 0{filters}"""
+        params = [min_lat, max_lat, min_lng, max_lng] * 2
+        if filters:
+            params.append(category)
+        if not has_center:
+            query += " ORDER BY e.starts_ts, e.id LIMIT ?"
+            params.append(limit)
+
+        conn = get_db()
+        rows = conn.execute(query, params).fetchall()
+        conn.close()
+
+        events = [dict(row) for row in rows]
+        if has_center:
+            for event in events:
+                event["distance_m"] = round(
+                    distance_m(lat, lng, event["location_lat"], event["location_lng"]), 1
+                )
+            if radius is not None:
+                events = [e for e in events if e["distance_m"] <= radius]
+            events.sort(key=lambda e: (e["distance_m"], e["id"]))
+            events = events[:limit]
+
+        return jsonify(
+            {
+                "events": events,
+                "bbox": [min_lat, min_lng, max_lat, max_lng],
+                "radius": radius,
+            }
+        ), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+ICAL_FIELDS = """id, revision, title, description, category, date, time, venue,
+                 society, location_address"""
+
+
+def load_ical_events(conn, event_ids):
+    rows = []
+    for i in range(0, len(event_ids), 500):
+        chunk = event_ids[i : i + 500]
+        rows.extend(
+            conn.execute(
+                f"SELECT {ICAL_FIELDS} FROM events WHERE id IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+        )
+    return rows
+
+
+def ical_response(conn, feed_name, title, revisions, public=False):
+    """
+    Serve a feed of (event id, revision) pairs, or 304 if the client has it
+
+    The ETag only depends on the ids and revisions, so an unchanged feed is
+    answered without reading or serializing any event. Only public feeds
+    may be stored by shared caches.
+    """
+    etag = ical_feeds.etag(feed_name, revisions)
+    scope = "public" if public else "private"
+    headers = {"Cache-Control": f"{scope}, max-age={ICAL_MAX_AGE}"}
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304, headers=headers)
+    else:
+        body = ical_feeds.build(
+            title, revisions, lambda event_ids: load_ical_events(conn, event_ids)
+        )
+        response = Response(body, mimetype="text/calendar", headers=headers)
+    response.set_etag(etag)
+    return response
+
+
+@app.route("/api/calendar/feeds", methods=["GET"])
+@require_auth
+def get_calendar_feeds():
+    """Subscription URLs for the current user's calendar feeds"""
+    root = request.url_root.rstrip("/")
+    token = ical_feeds.feed_token(request.user_id)
+    return jsonify(
+        {
+            "user_feed": f"{root}/api/calendar/users/{request.user_id}.ics?token={token}",
+            "events_feed": f"{root}/api/calendar/events.ics",
+        }
+    ), 200
+
+
+@app.route("/api/calendar/users/<int:user_id>.ics", methods=["GET"])
+def get_user_calendar(user_id):
+    """A user's registered events as an .ics feed (?token= from /api/calendar/feeds)"""
+    try:
+        if not ical_feeds.check_feed_token(request.args.get("token"), user_id):
+            return jsonify({"error": "Invalid feed token"}), 403
+
+        conn = get_db()
+        revisions = [
+            tuple(row)
+            for row in conn.execute(
+                """SELECT e.id, e.revision FROM registrations r
+                   JOIN events e ON e.id = r.event_id
+                   WHERE r.user_id = ?
+                   ORDER BY e.starts_ts, e.id""",
+                (user_id,),
+            )
+        ]
+        response = ical_response(
+            conn, f"user:{user_id}", "My registered events", revisions
+        )
+        conn.close()
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/calendar/events.ics", methods=["GET"])
+def get_events_calendar():
+    """Active events as a public .ics feed, optionally for one ?category="""
+    try:
+        category = request.args.get("category")
+        if category and category != "all":
+            query = """SELECT id, revision FROM events
+                       WHERE is_expired = 0 AND category = ?
+                       ORDER BY date, time, id"""
+            params = (category,)
+            title = f"{category} events"
+        else:
+            query = """SELECT id, revision FROM events
+                       WHERE is_expired = 0
+                       ORDER BY date, time, id"""
+            params = ()
+            category = "all"
+            title = "Campus events"
+
+        conn = get_db()
+        revisions = [tuple(row) for row in conn.execute(query, params)]
+        response = ical_response(
+            conn, f"category:{category}", title, revisions, public=True
+        )
+        conn.close()
+        return response
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/events/<int:event_id>", methods=["GET"])
 def get_event(event_id):
     try:
@@ -561,6 +1384,7 @@ def get_event(event_id):
         columns = [row[1] for row in c.fetchall()]
         has_is_expired = "is_expired" in columns
         has_location = "location_id" in columns
+        has_ml_scores = "success_score" in columns
 
         # Build SELECT query based on available columns
         select_fields = [
@@ -584,14 +1408,31 @@ def get_event(event_id):
             select_fields.extend(
                 ["location_id", "location_lat", "location_lng", "location_address"]
             )
+        if has_ml_scores:
+            select_fields.extend(
+                [
+                    "description_score",
+                    "success_score",
+                    "success_level",
+                    "predicted_registrations",
+                    "ml_analyzed_at",
+                ]
+            )
+        if "capacity" in columns:
+            select_fields.extend(["capacity", "registration_count"])
 
-        query = f"SELECT {', '.join(select_fields)} FROM events WHERE id = ?"
-        event = c.execute(query, (event_id,)).fetchone()
+        # Archived events stay reachable by id (e.g. from a user's past events)
+        for table in ("events", "events_archive"):
+            query = f"SELECT {', '.join(select_fields)} FROM {table} WHERE id = ?"
+            event = c.execute(query, (event_id,)).fetchone()
+            if event:
+                break
 
         conn.close()
 
         if event:
             event_dict = dict(event)
+            event_dict["archived"] = table == "events_archive"
             # Ensure is_locked is 0 or 1 (not None)
             if event_dict.get("is_locked") is None:
                 event_dict["is_locked"] = 0
@@ -621,10 +1462,14 @@ def delete_event(event_id):
         conn = get_db()
         c = conn.cursor()
 
-        # Check if event exists and get creator info
-        event = c.execute(
-            "SELECT created_by FROM events WHERE id = ?", (event_id,)
-        ).fetchone()
+        # Check if event exists and get creator info; archived events can
+        # be deleted too
+        for table in ("events", "events_archive"):
+            event = c.execute(
+                f"SELECT created_by FROM {table} WHERE id = ?", (event_id,)
+            ).fetchone()
+            if event:
+                break
         if not event:
             print(f"   ❌ Event {event_id} not found")
             conn.close()
@@ -667,12 +1512,17 @@ def delete_event(event_id):
                 }
             ), 403
 
+        # Write out buffered registrations so none land after the delete
+        if registration_buffer is not None:
+            registration_buffer.flush()
+
         # Delete all registrations for this event first (cascade delete)
         c.execute("DELETE FROM registrations WHERE event_id = ?", (event_id,))
         registrations_deleted = c.rowcount
+        c.execute("DELETE FROM event_waitlist WHERE event_id = ?", (event_id,))
 
         # Delete the event
-        c.execute("DELETE FROM events WHERE id = ?", (event_id,))
+        c.execute(f"DELETE FROM {table} WHERE id = ?", (event_id,))
         events_deleted = c.rowcount
 
         if events_deleted == 0:
@@ -681,6 +1531,7 @@ def delete_event(event_id):
 
         conn.commit()
         conn.close()
+        event_access.invalidate(event_id)
 
         print(
             f"✅ Successfully deleted event {event_id} and {registrations_deleted} registrations"
@@ -754,10 +1605,14 @@ def mark_event_expired(event_id):
         data = request.json or {}
         is_expired = data.get("is_expired", True)
 
-        # Update the event
+        # Update the event; reactivating an event that has already ended
+        # also stops the expiry sweeper from expiring it again
         c.execute(
-            "UPDATE events SET is_expired = ? WHERE id = ?",
-            (1 if is_expired else 0, event_id),
+            f"""UPDATE events SET is_expired = ?,
+                    auto_expire = CASE WHEN ? = 0 AND {EVENT_END} <= ?
+                                       THEN 0 ELSE 1 END
+                WHERE id = ?""",
+            (1 if is_expired else 0, 1 if is_expired else 0, local_now(), event_id),
         )
 
         if c.rowcount == 0:
@@ -803,31 +1658,22 @@ def register_event(event_id):
         is_locked = event_dict.get("is_locked", 0)
         if is_locked == 1:
             password = data.get("event_password")
-            if not password:
+            access_token = data.get("event_access_token")
+            if not password and not access_token:
                 conn.close()
                 return jsonify(
                     {"error": "Event password required", "requires_password": True}
                 ), 403
 
             event_password_hash = event_dict.get("event_password_hash", "")
-            if event_password_hash and not verify_password(
-                password, event_password_hash
+            if event_password_hash and not check_event_password(
+                event_id, event_password_hash, password, access_token
             ):
                 conn.close()
                 return jsonify(
                     {"error": "Incorrect event password", "requires_password": True}
                 ), 403
 
-        # Check if already registered
-        existing = c.execute(
-            "SELECT * FROM registrations WHERE event_id = ? AND user_id = ?",
-            (event_id, request.user_id),
-        ).fetchone()
-
-        if existing:
-            conn.close()
-            return jsonify({"error": "Already registered"}), 400
-
         # Get email from request (can be any email, not just school email)
         registration_email = data.get("email", request.user_email)
         if not registration_email:
@@ -835,86 +1681,385 @@ def register_event(event_id):
             return jsonify({"error": "Email is required"}), 400
 
         # Register user (use provided email, not just authenticated user email)
+        try:
+            count = record_registration(
+                conn,
+                event_id,
+                request.user_id,
+                registration_email,
+                event_dict.get("capacity"),
+            )
+        except EventFullError:
+            position = join_waitlist(
+                conn, event_id, request.user_id, registration_email
+            )
+            conn.close()
+            if position is None:
+                return jsonify(
+                    {"error": "Already on the waitlist", "waitlisted": True}
+                ), 400
+            return jsonify(
+                {
+                    "message": "Event is full. You have been added to the waitlist",
+                    "waitlisted": True,
+                    "position": position,
+                }
+            ), 202
+        conn.close()
+
+        if count is None:
+            return jsonify({"error": "Already registered"}), 400
+
+        return jsonify(
+            {
+                "message": "Registered successfully",
+                "count": count,
+                "congratulations": True,
+            }
+        ), 201
+
+    except PasswordServiceBusy:
+        return password_service_busy()
+    except Exception as e:
+        import traceback
+
+        print(f"Error registering for event: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/events/<int:event_id>/mark-registered", methods=["POST"])
+@require_auth
+def mark_event_registered(event_id):
+    """Mark event as registered (for external registrations) - just increases count"""
+    try:
+        conn = get_db()
+        c = conn.cursor()
+
+        # Check if event exists
+        event = c.execute(
+            "SELECT id, capacity FROM events WHERE id = ?", (event_id,)
+        ).fetchone()
+        if not event:
+            conn.close()
+            return jsonify({"error": "Event not found"}), 404
+
+        # Register with a placeholder email (external registration)
+        try:
+            count = record_registration(
+                conn,
+                event_id,
+                request.user_id,
+                f"external_{request.user_email}",
+                event["capacity"],
+            )
+        except EventFullError as e:
+            conn.close()
+            return jsonify({"error": str(e)}), 409
+        conn.close()
+
+        if count is None:
+            return jsonify({"error": "Already registered"}), 400
+
+        return jsonify({"message": "Marked as registered", "count": count}), 201
+
+    except Exception as e:
+        import traceback
+
+        print(f"Error marking as registered: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/events/<int:event_id>/register/bulk", methods=["POST"])
+@require_role("society_president", "faculty", "ksac_member", "admin")
+def register_event_bulk(event_id):
+    """
+    Register a whole team for an event in one call
+
+    Body: {"emails": [...], "event_password": "..."}. The event password is
+    checked once for the batch; emails are normalized and de-duplicated,
+    matched to user accounts and inserted in a single transaction. Returns
+    a status for every submitted email, in order: registered,
+    already_registered, duplicate, invalid_email or event_full.
+    """
+    try:
+        data = request.json or {}
+        emails = data.get("emails")
+        if not isinstance(emails, list) or not emails:
+            return jsonify({"error": "emails must be a non-empty list"}), 400
+        if len(emails) > MAX_BULK_REGISTRATIONS:
+            return jsonify(
+                {"error": f"At most {MAX_BULK_REGISTRATIONS} emails per batch"}
+            ), 400
+
+        conn = get_db()
+        c = conn.cursor()
+
+        event = c.execute(
+            "SELECT is_locked, event_password_hash FROM events WHERE id = ?",
+            (event_id,),
+        ).fetchone()
+        if not event:
+            conn.close()
+            return jsonify({"error": "Event not found"}), 404
+
+        # One password check for the whole batch
+        if event["is_locked"] == 1:
+            password = data.get("event_password")
+            access_token = data.get("event_access_token")
+            if not password and not access_token:
+                conn.close()
+                return jsonify(
+                    {"error": "Event password required", "requires_password": True}
+                ), 403
+            if event["event_password_hash"] and not check_event_password(
+                event_id, event["event_password_hash"], password, access_token
+            ):
+                conn.close()
+                return jsonify(
+                    {"error": "Incorrect event password", "requires_password": True}
+                ), 403
+
+        results = []
+        unique_emails = []
+        seen = set()
+        for raw in emails:
+            email = raw.strip().lower() if isinstance(raw, str) else ""
+            result = {"email": raw}
+            if not re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email):
+                result["status"] = "invalid_email"
+            elif email in seen:
+                result["status"] = "duplicate"
+            else:
+                seen.add(email)
+                unique_emails.append(email)
+            results.append(result)
+
+        registered = 0
+        count = None
+        if unique_emails:
+            placeholders = ",".join("?" * len(unique_emails))
+            # Hold the write lock so existing rows and free seats cannot change
+            # underneath the batch
+            c.execute("BEGIN IMMEDIATE")
+            user_ids = {
+                row["email"]: row["id"]
+                for row in c.execute(
+                    f"SELECT id, email FROM users WHERE email IN ({placeholders})",
+                    unique_emails,
+                ).fetchall()
+            }
+            known_ids = list(user_ids.values())
+            existing = set()
+            for row in c.execute(
+                f"""SELECT user_id, LOWER(user_email) as user_email FROM registrations
+                    WHERE event_id = ? AND (user_email IN ({placeholders})
+                    OR user_id IN ({",".join("?" * len(known_ids))}))""",
+                [event_id, *unique_emails, *known_ids],
+            ).fetchall():
+                existing.add(row["user_email"])
+                existing.add(row["user_id"])
+
+            seats = c.execute(
+                "SELECT capacity, registration_count FROM events WHERE id = ?",
+                (event_id,),
+            ).fetchone()
+            free_seats = None
+            if seats["capacity"] is not None:
+                free_seats = max(seats["capacity"] - seats["registration_count"], 0)
+
+            statuses = {}
+            rows = []
+            for email in unique_emails:
+                user_id = user_ids.get(email)
+                if email in existing or (user_id is not None and user_id in existing):
+                    statuses[email] = "already_registered"
+                elif free_seats is not None and len(rows) >= free_seats:
+                    statuses[email] = "event_full"
+                else:
+                    statuses[email] = "registered"
+                    rows.append((event_id, user_id, email))
+
+            c.executemany(
+                """INSERT INTO registrations (event_id, user_id, user_email) VALUES (?, ?, ?)
+                   ON CONFLICT (event_id, user_id) DO NOTHING""",
+                rows,
+            )
+            count = c.execute(
+                "SELECT registration_count FROM events WHERE id = ?", (event_id,)
+            ).fetchone()[0]
+            conn.commit()
+            registered = len(rows)
+
+            for result in results:
+                if "status" not in result:
+                    result["status"] = statuses[result["email"].strip().lower()]
+        conn.close()
+
+        return jsonify(
+            {
+                "results": results,
+                "registered": registered,
+                "count": count,
+            }
+        ), 200
+
+    except PasswordServiceBusy:
+        return password_service_busy()
+    except Exception as e:
+        import traceback
+
+        print(f"Error in bulk registration: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/events/<int:event_id>/register", methods=["DELETE"])
+@require_auth
+def cancel_registration(event_id):
+    """Cancel your registration or leave the waitlist; frees the seat for the waitlist"""
+    try:
+        # Buffered registrations must be in the table before they can be removed
+        if registration_buffer is not None:
+            registration_buffer.flush()
+
+        conn = get_db()
+        c = conn.cursor()
         c.execute(
-            "INSERT INTO registrations (event_id, user_id, user_email) VALUES (?, ?, ?)",
-            (event_id, request.user_id, registration_email),
+            "DELETE FROM registrations WHERE event_id = ? AND user_id = ?",
+            (event_id, request.user_id),
         )
-
+        cancelled = c.rowcount
+        c.execute(
+            "DELETE FROM event_waitlist WHERE event_id = ? AND user_id = ?",
+            (event_id, request.user_id),
+        )
+        left_waitlist = c.rowcount
         conn.commit()
+        conn.close()
 
-        # Get updated registration count
-        count = c.execute(
-            "SELECT COUNT(*) as count FROM registrations WHERE event_id = ?",
-            (event_id,),
+        if not cancelled and not left_waitlist:
+            return jsonify({"error": "Not registered for this event"}), 404
+
+        if cancelled:
+            queue_waitlist_promotion(event_id)
+            return jsonify({"message": "Registration cancelled"}), 200
+        return jsonify({"message": "Removed from the waitlist"}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/events/<int:event_id>/capacity", methods=["POST"])
+@require_auth
+def set_event_capacity(event_id):
+    """Set or clear an event's capacity (only creator or admin)"""
+    try:
+        data = request.json or {}
+        capacity = data.get("capacity")
+        if capacity is not None:
+            try:
+                capacity = int(capacity)
+            except (TypeError, ValueError):
+                capacity = 0
+            if capacity < 1:
+                return jsonify({"error": "Capacity must be a positive number"}), 400
+
+        conn = get_db()
+        c = conn.cursor()
+        event = c.execute(
+            "SELECT created_by FROM events WHERE id = ?", (event_id,)
         ).fetchone()
+        if not event:
+            conn.close()
+            return jsonify({"error": "Event not found"}), 404
 
+        if event["created_by"] != request.user_id and request.user_role not in [
+            "admin",
+            "faculty",
+            "ksac_member",
+        ]:
+            conn.close()
+            return jsonify(
+                {"error": "Unauthorized: Only event creator or admin can set capacity"}
+            ), 403
+
+        # Buffered registrations are stored first so the new limit counts
+        # them, and no more are buffered until it is committed
+        with (
+            registration_buffer.capacity_change()
+            if registration_buffer is not None
+            else nullcontext()
+        ):
+            c.execute(
+                "UPDATE events SET capacity = ? WHERE id = ?", (capacity, event_id)
+            )
+            conn.commit()
         conn.close()
 
-        return jsonify(
-            {
-                "message": "Registered successfully",
-                "count": count["count"],
-                "congratulations": True,
-            }
-        ), 201
+        # A larger (or removed) limit may open seats for the waitlist
+        queue_waitlist_promotion(event_id)
 
-    except Exception as e:
-        import traceback
+        return jsonify({"message": "Capacity updated", "capacity": capacity}), 200
 
-        print(f"Error registering for event: {str(e)}")
-        print(traceback.format_exc())
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/api/events/<int:event_id>/mark-registered", methods=["POST"])
+@app.route("/api/events/<int:event_id>/password", methods=["POST"])
 @require_auth
-def mark_event_registered(event_id):
-    """Mark event as registered (for external registrations) - just increases count"""
+def set_event_password(event_id):
+    """Set, change or remove an event's password (only creator or admin)"""
     try:
+        data = request.json or {}
+        password = (data.get("event_password") or "").strip()
+
         conn = get_db()
         c = conn.cursor()
-
-        # Check if event exists
-        event = c.execute("SELECT id FROM events WHERE id = ?", (event_id,)).fetchone()
+        event = c.execute(
+            "SELECT created_by FROM events WHERE id = ?", (event_id,)
+        ).fetchone()
+        conn.close()
         if not event:
-            conn.close()
             return jsonify({"error": "Event not found"}), 404
 
-        # Check if already registered
-        existing = c.execute(
-            "SELECT * FROM registrations WHERE event_id = ? AND user_id = ?",
-            (event_id, request.user_id),
-        ).fetchone()
+        if event["created_by"] != request.user_id and request.user_role not in [
+            "admin",
+            "faculty",
+            "ksac_member",
+        ]:
+            return jsonify(
+                {
+                    "error": "Unauthorized: Only event creator or admin can change the password"
+                }
+            ), 403
 
-        if existing:
-            conn.close()
-            return jsonify({"error": "Already registered"}), 400
+        # Hash before opening the write so bcrypt never runs inside it
+        event_password_hash = hash_password(password) if password else None
 
-        # Register with a placeholder email (external registration)
-        c.execute(
-            "INSERT INTO registrations (event_id, user_id, user_email) VALUES (?, ?, ?)",
-            (event_id, request.user_id, f"external_{request.user_email}"),
+        conn = get_db()
+        conn.execute(
+            "UPDATE events SET event_password_hash = ?, is_locked = ? WHERE id = ?",
+            (event_password_hash, 1 if password else 0, event_id),
         )
-
         conn.commit()
-
-        # Get updated registration count
-        count = c.execute(
-            "SELECT COUNT(*) as count FROM registrations WHERE event_id = ?",
-            (event_id,),
-        ).fetchone()
-
         conn.close()
 
+        # Old cached verifications and access tokens no longer match the new
+        # hash; drop the cached digests now rather than waiting for expiry
+        event_access.invalidate(event_id)
+
         return jsonify(
-            {"message": "Marked as registered", "count": count["count"]}
-        ), 201
+            {
+                "message": "Event password updated" if password else "Event unlocked",
+                "is_locked": bool(password),
+            }
+        ), 200
 
+    except PasswordServiceBusy:
+        return password_service_busy()
     except Exception as e:
-        import traceback
-
-        print(f"Error marking as registered: {str(e)}")
-        print(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
 
 
@@ -922,17 +2067,68 @@ def mark_event_registered(event_id):
 def get_registrations(event_id):
     conn = get_db()
     c = conn.cursor()
-    count = c.execute(
-        "SELECT COUNT(*) as count FROM registrations WHERE event_id = ?", (event_id,)
+    event = c.execute(
+        "SELECT registration_count FROM events WHERE id = ?", (event_id,)
     ).fetchone()
     conn.close()
-    return jsonify({"count": count["count"]})
+    return jsonify({"count": event["registration_count"] if event else 0})
+
+
+@app.route("/api/events/<int:event_id>/registrations/export", methods=["GET"])
+@require_auth
+def export_registrations(event_id):
+    """Download an event's registrations (?format=csv|ndjson), for its organizers"""
+    try:
+        fmt = request.args.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": "format must be csv or ndjson"}), 400
+
+        # Registrations of archived events stay exportable
+        conn = get_db()
+        for table in ("events", "events_archive"):
+            event = conn.execute(
+                f"SELECT created_by FROM {table} WHERE id = ?", (event_id,)
+            ).fetchone()
+            if event:
+                break
+        conn.close()
+
+        if not event:
+            return jsonify({"error": "Event not found"}), 404
+
+        is_creator = event["created_by"] is not None and int(
+            event["created_by"]
+        ) == int(request.user_id)
+        is_admin = request.user_role in ["admin", "faculty", "ksac_member"]
+        if not is_creator and not is_admin:
+            return jsonify(
+                {"error": "Only the event creator or an admin can export registrations"}
+            ), 403
+
+        return stream_export(
+            """SELECT user_email, registered_at FROM registrations
+               WHERE event_id = ? ORDER BY registered_at, id""",
+            (event_id,),
+            ["user_email", "registered_at"],
+            fmt,
+            f"event-{event_id}-registrations",
+        )
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/users/<int:user_id>/events", methods=["GET"])
 @require_auth
 def get_user_events(user_id):
-    """Get all events a user has registered for"""
+    """
+    Get the events a user has registered for, split into upcoming and past
+
+    Upcoming events come soonest first, past events (archived ones included)
+    most recent first, each bucket at most ?limit= long. Pass
+    next_upcoming_cursor / next_past_cursor back as ?upcoming_cursor= /
+    ?past_cursor= to page through a bucket.
+    """
     try:
         # Only allow users to see their own events, or admins to see any user's events
         if user_id != request.user_id and request.user_role not in [
@@ -942,46 +2138,88 @@ def get_user_events(user_id):
         ]:
             return jsonify({"error": "Unauthorized"}), 403
 
+        limit = request.args.get("limit", USER_EVENTS_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), MAX_USER_EVENTS_PAGE_SIZE)
+        try:
+            upcoming_after = request.args.get("upcoming_cursor")
+            upcoming_after = (
+                decode_keyset_cursor(upcoming_after, int) if upcoming_after else None
+            )
+            past_before = request.args.get("past_cursor")
+            past_before = decode_keyset_cursor(past_before, int) if past_before else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        now = int(datetime.now().timestamp())
+        fields = """e.id, e.title, e.description, e.category, e.date, e.time,
+                    e.venue, e.poster_url, e.registration_url, e.society, e.created_at,
+                    e.starts_ts, r.registered_at, r.user_email"""
+
         conn = get_db()
         c = conn.cursor()
 
-        # Get user's registered events with event details
-        events = c.execute(
-            """SELECT e.id, e.title, e.description, e.category, e.date, e.time, 
-                             e.venue, e.poster_url, e.registration_url, e.society, e.created_at,
-                             r.registered_at, r.user_email
-                             FROM registrations r
-                             JOIN events e ON r.event_id = e.id
-                             WHERE r.user_id = ?
-                             ORDER BY e.date DESC, e.time DESC""",
-            (user_id,),
-        ).fetchall()
+        counts = c.execute(
+            """SELECT COALESCE(SUM(e.starts_ts >= ?), 0) AS upcoming,
+                      COALESCE(SUM(e.starts_ts < ?), 0)
+                      + (SELECT COUNT(*) FROM registrations ra
+                         JOIN events_archive ea ON ra.event_id = ea.id
+                         WHERE ra.user_id = ?) AS past
+               FROM registrations r
+               JOIN events e ON r.event_id = e.id
+               WHERE r.user_id = ?""",
+            (now, now, user_id, user_id),
+        ).fetchone()
 
-        # Separate into upcoming and past events
-        from datetime import datetime
+        query = f"""SELECT {fields} FROM registrations r
+                    JOIN events e ON r.event_id = e.id
+                    WHERE r.user_id = ? AND e.starts_ts >= ?"""
+        params = [user_id, now]
+        if upcoming_after:
+            query += " AND (e.starts_ts, e.id) > (?, ?)"
+            params.extend(upcoming_after)
+        query += " ORDER BY e.starts_ts, e.id LIMIT ?"
+        params.append(limit + 1)
+        upcoming = c.execute(query, params).fetchall()
+
+        query = f"""SELECT * FROM (
+                        SELECT {fields} FROM registrations r
+                        JOIN events e ON r.event_id = e.id
+                        WHERE r.user_id = ? AND e.starts_ts < ?
+                        UNION ALL
+                        SELECT {fields} FROM registrations r
+                        JOIN events_archive e ON r.event_id = e.id
+                        WHERE r.user_id = ?
+                    )"""
+        params = [user_id, now, user_id]
+        if past_before:
+            query += " WHERE (starts_ts, id) < (?, ?)"
+            params.extend(past_before)
+        query += " ORDER BY starts_ts DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        past = c.execute(query, params).fetchall()
 
-        now = datetime.now()
-        upcoming = []
-        past = []
+        conn.close()
 
-        for event in events:
-            event_dict = dict(event)
-            try:
-                event_date = datetime.strptime(
-                    f"{event_dict['date']} {event_dict['time']}", "%Y-%m-%d %H:%M:%S"
+        next_cursors = {}
+        for name, rows in (("upcoming", upcoming), ("past", past)):
+            next_cursors[name] = None
+            if len(rows) > limit:
+                del rows[limit:]
+                next_cursors[name] = encode_keyset_cursor(
+                    rows[-1]["starts_ts"], rows[-1]["id"]
                 )
-                if event_date >= now:
-                    upcoming.append(event_dict)
-                else:
-                    past.append(event_dict)
-            except:
-                # If date parsing fails, assume it's upcoming
-                upcoming.append(event_dict)
-
-        conn.close()
 
         return jsonify(
-            {"upcoming": upcoming, "past": past, "total": len(upcoming) + len(past)}
+            {
+                "upcoming": [dict(row) for row in upcoming],
+                "past": [dict(row) for row in past],
+                "total": counts["upcoming"] + counts["past"],
+                "upcoming_total": counts["upcoming"],
+                "past_total": counts["past"],
+                "next_upcoming_cursor": next_cursors["upcoming"],
+                "next_past_cursor": next_cursors["past"],
+                "limit": limit,
+            }
         ), 200
 
     except Exception as e:
@@ -1009,28 +2247,23 @@ def get_user_profile(user_id):
         c = conn.cursor()
 
         # Get user info
-        user = c.execute(
-            "SELECT id, email, name, role, society_name, created_at FROM users WHERE id = ?",
-            (user_id,),
-        ).fetchone()
+        user_dict = get_user(c, user_id)
 
-        if not user:
+        if not user_dict:
             conn.close()
             return jsonify({"error": "User not found"}), 404
 
-        user_dict = dict(user)
-
         # Get registration stats
         total_registrations = c.execute(
             "SELECT COUNT(*) as count FROM registrations WHERE user_id = ?", (user_id,)
         ).fetchone()["count"]
 
         upcoming_count = c.execute(
-            """SELECT COUNT(*) as count 
-                                      FROM registrations r
-                                      JOIN events e ON r.event_id = e.id
-                                      WHERE r.user_id = ? AND e.date >= date('now')""",
-            (user_id,),
+            """SELECT COUNT(*) as count
+               FROM registrations r
+               JOIN events e ON r.event_id = e.id
+               WHERE r.user_id = ? AND e.starts_ts >= ?""",
+            (user_id, int(datetime.now().timestamp())),
         ).fetchone()["count"]
 
         conn.close()
@@ -1054,30 +2287,60 @@ def get_user_profile(user_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/users/<int:user_id>/role", methods=["PUT"])
+@require_role("admin")
+def set_user_role(user_id):
+    """Change a user's role (admin only)"""
+    try:
+        data = request.json or {}
+        role = data.get("role")
+        society_name = (data.get("society_name") or "").strip()
+        if role not in ["student", "faculty", "ksac_member", "society_president", "admin"]:
+            return jsonify({"error": "Invalid role"}), 400
+        if role == "society_president" and not society_name:
+            return jsonify({"error": "Society name required for society president"}), 400
+
+        conn = get_db()
+        c = conn.cursor()
+        c.execute(
+            "UPDATE users SET role = ?, society_name = ? WHERE id = ?",
+            (role, society_name if role == "society_president" else None, user_id),
+        )
+        if c.rowcount == 0:
+            conn.close()
+            return jsonify({"error": "User not found"}), 404
+        conn.commit()
+        conn.close()
+
+        user_cache.delete(user_id)
+
+        # Tokens already issued keep their role claim until the user logs in again
+        return jsonify({"message": "Role updated", "role": role}), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/stats", methods=["GET"])
 def get_stats():
     try:
         conn = get_db()
         c = conn.cursor()
 
-        total_events = c.execute("SELECT COUNT(*) as count FROM events").fetchone()[
-            "count"
-        ]
-        total_registrations = c.execute(
-            "SELECT COUNT(*) as count FROM registrations"
-        ).fetchone()["count"]
-
-        category_stats = c.execute("""SELECT category, COUNT(*) as count 
-                                       FROM events GROUP BY category""").fetchall()
+        counters = read_stats_counters(
+            c, ["events", "registrations", "event_category"]
+        )
 
         conn.close()
 
         return jsonify(
             {
-                "total_events": total_events,
-                "total_registrations": total_registrations,
+                "total_events": counters["events"].get("total", 0),
+                "total_registrations": counters["registrations"].get("total", 0),
                 "category_stats": {
-                    row["category"]: row["count"] for row in category_stats
+                    category: count
+                    for category, count in counters["event_category"].items()
+                    if count > 0
                 },
             }
         )
@@ -1090,6 +2353,7 @@ def get_stats():
 
 # Authentication endpoints
 @app.route("/api/auth/register", methods=["POST"])
+@rate_limited("register", user_key=submitted_email)
 def register():
     try:
         data = request.json
@@ -1180,12 +2444,15 @@ def register():
             }
         ), 201
 
+    except PasswordServiceBusy:
+        return password_service_busy()
     except Exception as e:
         print(f"Error registering: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/auth/login", methods=["POST"])
+@rate_limited("login", user_key=submitted_email)
 def login():
     try:
         data = request.json
@@ -1234,6 +2501,8 @@ def login():
             }
         ), 200
 
+    except PasswordServiceBusy:
+        return password_service_busy()
     except Exception as e:
         print(f"Error logging in: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -1244,21 +2513,18 @@ def login():
 def get_current_user():
     try:
         conn = get_db()
-        c = conn.cursor()
-        user = c.execute(
-            "SELECT id, email, name, role, society_name, created_at FROM users WHERE id = ?",
-            (request.user_id,),
-        ).fetchone()
+        user = get_user(conn, request.user_id)
         conn.close()
 
         if user:
-            return jsonify(dict(user)), 200
+            return jsonify(user), 200
         return jsonify({"error": "User not found"}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @app.route("/api/events/<int:event_id>/verify-password", methods=["POST"])
+@rate_limited("verify_password")
 def verify_event_password(event_id):
     """Verify event password without registering"""
     try:
@@ -1276,17 +2542,30 @@ def verify_event_password(event_id):
         if not event["is_locked"]:
             return jsonify({"valid": True, "message": "Event is not locked"}), 200
 
-        if verify_password(password, event["event_password_hash"]):
-            return jsonify({"valid": True, "message": "Password correct"}), 200
+        if check_event_password(event_id, event["event_password_hash"], password):
+            return jsonify(
+                {
+                    "valid": True,
+                    "message": "Password correct",
+                    # Send back as event_access_token instead of the password
+                    "access_token": event_access.issue_token(
+                        event_id, event["event_password_hash"]
+                    ),
+                    "expires_in": event_access.token_ttl,
+                }
+            ), 200
         else:
             return jsonify({"valid": False, "error": "Incorrect password"}), 403
 
+    except PasswordServiceBusy:
+        return password_service_busy()
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 # AI Assistant endpoints
 @app.route("/api/assistant/request", methods=["POST"])
+@rate_limited("assistant_request")
 def submit_event_request():
     """Submit event request to AI assistant (open to everyone)"""
     try:
@@ -1354,8 +2633,11 @@ def submit_event_request():
                 ),
             )
 
-        conn.commit()
         request_id = c.lastrowid
+        cluster_id = assign_request_clusters(c, [(request_id, request_text)])[
+            request_id
+        ]
+        conn.commit()
         conn.close()
 
         return jsonify(
@@ -1366,6 +2648,7 @@ def submit_event_request():
                 "sentiment": analysis["sentiment"],
                 "auto_response": analysis["auto_response"],
                 "society_name": analysis.get("society_name"),
+                "cluster_id": cluster_id,
                 "message": "Request submitted successfully",
             }
         ), 201
@@ -1379,17 +2662,119 @@ def submit_event_request():
         return jsonify({"error": str(e), "details": error_details}), 500
 
 
+@app.route("/api/assistant/requests/bulk", methods=["POST"])
+@require_role("faculty", "ksac_member", "society_president", "admin")
+def submit_event_requests_bulk():
+    """
+    Import many event requests at once (e.g. exported form responses)
+
+    Body: {"requests": ["text", {"request": "text", "user_email": "..."}, ...]}
+    Streams one NDJSON line per item as each batch is stored, then a summary
+    line (or an error line if storing a batch fails part-way).
+    """
+    try:
+        data = request.json or {}
+        raw_items = data.get("requests")
+        if not isinstance(raw_items, list) or not raw_items:
+            return jsonify({"error": "requests must be a non-empty list"}), 400
+        if len(raw_items) > MAX_BULK_ASSISTANT_REQUESTS:
+            return jsonify(
+                {"error": f"At most {MAX_BULK_ASSISTANT_REQUESTS} requests per batch"}
+            ), 400
+
+        items = []
+        for raw in raw_items:
+            if isinstance(raw, dict):
+                request_text = raw.get("request", "")
+                user_email = raw.get("user_email") or "anonymous"
+            else:
+                request_text = raw
+                user_email = "anonymous"
+            if not isinstance(request_text, str):
+                request_text = ""
+            items.append((request_text, None, user_email))
+
+        if not ingest_pool.acquire():
+            return (
+                jsonify({"error": "Too many imports running, please try again shortly"}),
+                503,
+                {"Retry-After": "5"},
+            )
+
+        def generate():
+            # The assistant is CPU-bound, so it runs on the ingest process
+            # pool rather than in this request thread
+            inserted = 0
+            executor = None
+            try:
+                executor = ingest_pool.executor()
+                for result in ingest_event_requests(items, executor=executor):
+                    if "id" in result:
+                        inserted += 1
+                    yield json.dumps(result) + "\n"
+            except Exception as e:
+                if isinstance(e, BrokenProcessPool):
+                    ingest_pool.reset(executor)
+                print(f"Error processing bulk requests: {str(e)}")
+                yield json.dumps({"error": str(e), "inserted": inserted}) + "\n"
+                return
+            summary = {
+                "received": len(items),
+                "inserted": inserted,
+                "failed": len(items) - inserted,
+            }
+            yield json.dumps({"summary": summary}) + "\n"
+
+        response = Response(
+            stream_with_context(generate()),
+            status=201,
+            mimetype="application/x-ndjson",
+        )
+        # Released when the response is closed, even if the client went
+        # away before the stream started
+        response.call_on_close(ingest_pool.release)
+        return response
+
+    except Exception as e:
+        import traceback
+
+        error_details = traceback.format_exc()
+        print(f"Error processing bulk requests: {str(e)}")
+        print(f"Traceback: {error_details}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route("/api/assistant/requests", methods=["GET"])
 @require_role("faculty", "ksac_member", "society_president", "admin")
 def get_event_requests():
-    """Get all event requests (for admins)"""
+    """
+    Page through event requests (for admins), newest first
+
+    Filters: status, days, category, sentiment, society, cluster_id.
+    Pass the returned next_cursor as ?cursor= to fetch the following page;
+    ?include=responses adds the auto_response and admin_response texts.
+    """
     try:
         status = request.args.get("status", "all")
+        limit = request.args.get("limit", ASSISTANT_REQUESTS_PAGE_SIZE, type=int)
+        limit = min(max(limit, 1), MAX_ASSISTANT_REQUESTS_PAGE_SIZE)
+        include = set(request.args.get("include", "").split(","))
+
+        cursor = request.args.get("cursor")
+        try:
+            after = decode_keyset_cursor(cursor) if cursor else None
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        columns = list(EVENT_REQUEST_LIST_COLUMNS)
+        if "responses" in include:
+            columns.extend(["auto_response", "admin_response"])
+
         conn = get_db()
         c = conn.cursor()
 
-        query = """SELECT er.*, u.name as user_name, 
-                   admin.name as admin_name
+        query = f"""SELECT {", ".join("er." + col for col in columns)},
+                   u.name as user_name, admin.name as admin_name
                    FROM event_requests er
                    LEFT JOIN users u ON er.user_id = u.id
                    LEFT JOIN users admin ON er.admin_id = admin.id
@@ -1405,12 +2790,135 @@ def get_event_requests():
             query += " AND er.created_at >= datetime('now', '-' || ? || ' days')"
             params.append(days)
 
-        query += " ORDER BY er.created_at DESC"
+        category = request.args.get("category")
+        if category and category != "all":
+            query += " AND er.category_detected = ?"
+            params.append(category)
+
+        sentiment = request.args.get("sentiment")
+        if sentiment and sentiment != "all":
+            query += " AND er.sentiment = ?"
+            params.append(sentiment)
+
+        society = request.args.get("society")
+        if society:
+            query += " AND er.society_name = ? COLLATE NOCASE"
+            params.append(society)
+
+        # Members of one near-duplicate cluster
+        cluster_id = request.args.get("cluster_id", type=int)
+        if cluster_id is not None:
+            query += " AND er.cluster_id = ?"
+            params.append(cluster_id)
+
+        if after:
+            query += " AND (er.created_at, er.id) < (?, ?)"
+            params.extend(after)
+
+        # One extra row tells whether another page follows
+        query += " ORDER BY er.created_at DESC, er.id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = c.execute(query, params).fetchall()
+        conn.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_keyset_cursor(rows[-1]["created_at"], rows[-1]["id"])
+
+        return jsonify(
+            {
+                "requests": [dict(row) for row in rows],
+                "next_cursor": next_cursor,
+                "limit": limit,
+            }
+        ), 200
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/assistant/requests/export", methods=["GET"])
+@require_role("faculty", "ksac_member", "society_president", "admin")
+def export_event_requests():
+    """Download event requests (?format=csv|ndjson, optional ?status=)"""
+    try:
+        fmt = request.args.get("format", "csv")
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({"error": "format must be csv or ndjson"}), 400
+
+        columns = EVENT_REQUEST_LIST_COLUMNS + ["auto_response", "admin_response"]
+        query = f"SELECT {', '.join(columns)} FROM event_requests WHERE 1=1"
+        params = []
+
+        status = request.args.get("status", "all")
+        if status != "all":
+            query += " AND status = ?"
+            params.append(status)
+
+        query += " ORDER BY id"
+
+        return stream_export(query, params, columns, fmt, "event-requests")
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route("/api/assistant/requests/clusters", methods=["GET"])
+@require_role("faculty", "ksac_member", "society_president", "admin")
+def get_event_request_clusters():
+    """
+    Near-duplicate requests grouped into clusters, largest first
+
+    Each cluster is returned once with its first request as representative;
+    list its members with GET /api/assistant/requests?cluster_id=<id>.
+    """
+    try:
+        status = request.args.get("status", "all")
+        limit = min(max(request.args.get("limit", 50, type=int), 1), 200)
+        offset = max(request.args.get("offset", 0, type=int), 0)
+        conn = get_db()
+        c = conn.cursor()
 
-        requests = c.execute(query, params).fetchall()
+        # Sizes come from the trigger-maintained cluster tables
+        if status != "all":
+            query = """SELECT cluster_id, count as request_count,
+                       CASE WHEN status = 'pending' THEN count ELSE 0 END as pending_count,
+                       latest_at
+                       FROM request_cluster_counts
+                       WHERE status = ? AND count > 0
+                       ORDER BY count DESC, latest_at DESC
+                       LIMIT ? OFFSET ?"""
+            params = [status, limit, offset]
+        else:
+            query = """SELECT cluster_id, request_count, pending_count, latest_at
+                       FROM request_clusters
+                       WHERE request_count > 0
+                       ORDER BY request_count DESC, latest_at DESC
+                       LIMIT ? OFFSET ?"""
+            params = [limit, offset]
+        clusters = [dict(row) for row in c.execute(query, params).fetchall()]
+
+        representatives = {}
+        if clusters:
+            placeholders = ",".join("?" * len(clusters))
+            rows = c.execute(
+                f"""SELECT er.id, er.user_email, er.request_text, er.category_detected,
+                           er.sentiment, er.status, er.society_name, er.created_at,
+                           u.name as user_name
+                    FROM event_requests er
+                    LEFT JOIN users u ON er.user_id = u.id
+                    WHERE er.id IN ({placeholders})""",
+                [cluster["cluster_id"] for cluster in clusters],
+            ).fetchall()
+            representatives = {row["id"]: dict(row) for row in rows}
         conn.close()
 
-        return jsonify([dict(req) for req in requests]), 200
+        for cluster in clusters:
+            cluster["representative"] = representatives.get(cluster["cluster_id"])
+
+        return jsonify({"clusters": clusters, "limit": limit, "offset": offset}), 200
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1465,7 +2973,7 @@ def get_request(request_id):
         conn.close()
 
         if req:
-            return jsonify(dict(req)), 200
+            return jsonify(event_request_to_dict(req)), 200
         return jsonify({"error": "Request not found"}), 404
 
     except Exception as e:
@@ -1489,7 +2997,7 @@ def get_recent_requests():
 
         conn.close()
 
-        return jsonify([dict(req) for req in requests]), 200
+        return jsonify([event_request_to_dict(req) for req in requests]), 200
 
     except Exception as e:
         print(f"Error fetching recent requests: {str(e)}")
@@ -1504,32 +3012,25 @@ def get_assistant_stats():
         conn = get_db()
         c = conn.cursor()
 
-        total_requests = c.execute(
-            "SELECT COUNT(*) as count FROM event_requests"
-        ).fetchone()["count"]
-        pending_requests = c.execute(
-            "SELECT COUNT(*) as count FROM event_requests WHERE status = 'pending'"
-        ).fetchone()["count"]
-
-        category_stats = c.execute("""SELECT category_detected, COUNT(*) as count 
-                                     FROM event_requests 
-                                     GROUP BY category_detected""").fetchall()
-
-        sentiment_stats = c.execute("""SELECT sentiment, COUNT(*) as count 
-                                       FROM event_requests 
-                                       GROUP BY sentiment""").fetchall()
+        counters = read_stats_counters(
+            c, ["requests", "request_status", "request_category", "request_sentiment"]
+        )
 
         conn.close()
 
         return jsonify(
             {
-                "total_requests": total_requests,
-                "pending_requests": pending_requests,
+                "total_requests": counters["requests"].get("total", 0),
+                "pending_requests": counters["request_status"].get("pending", 0),
                 "category_stats": {
-                    row["category_detected"]: row["count"] for row in category_stats
+                    category: count
+                    for category, count in counters["request_category"].items()
+                    if count > 0
                 },
                 "sentiment_stats": {
-                    row["sentiment"]: row["count"] for row in sentiment_stats
+                    sentiment: count
+                    for sentiment, count in counters["request_sentiment"].items()
+                    if count > 0
                 },
             }
         ), 200
@@ -1588,11 +3089,16 @@ def semantic_search_events():
         limit = int(request.args.get("limit", 10))
         category = request.args.get("category", None)
         date_filter = request.args.get("date", None)
+        include_archived = (
+            request.args.get("include_archived", "false").lower() == "true"
+        )
 
         if not query:
             return jsonify({"error": "Search query required"}), 400
 
-        results = semantic_search.search(query, limit, category, date_filter)
+        results = semantic_search.search(
+            query, limit, category, date_filter, include_archived=include_archived
+        )
         return jsonify({"results": results, "query": query, "count": len(results)}), 200
     except Exception as e:
         import traceback
@@ -1624,6 +3130,40 @@ def enhance_description():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/ml/enhance-description/stream", methods=["POST"])
+@require_auth
+def enhance_description_stream():
+    """Analyze a long plain-text description streamed in the request body"""
+    try:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        def chunks():
+            total = 0
+            while True:
+                block = request.stream.read(DESCRIPTION_STREAM_CHUNK_SIZE)
+                if not block:
+                    break
+                total += len(block)
+                if total > MAX_STREAM_DESCRIPTION_BYTES:
+                    raise ValueError("Description too large")
+                yield decoder.decode(block)
+            yield decoder.decode(b"", final=True)
+
+        analysis = description_enhancer.analyze_description_stream(
+            chunks(),
+            request.args.get("title", ""),
+            request.args.get("category", ""),
+            request.args.get("date", ""),
+            request.args.get("venue", ""),
+        )
+
+        return jsonify(analysis), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 413
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 # Event Success Prediction endpoint
 @app.route("/api/ml/predict-success", methods=["POST"])
 @require_auth
@@ -1655,6 +3195,60 @@ def predict_event_success():
         return jsonify({"error": str(e)}), 500
 
 
+@app.route("/api/ml/predict-batch", methods=["POST"])
+@require_auth
+def predict_events_batch():
+    """Predict success and popularity for many events in one call"""
+    try:
+        data = request.json or {}
+        events = data.get("events")
+
+        if not isinstance(events, list) or not events:
+            return jsonify({"error": "A non-empty 'events' list is required"}), 400
+
+        if len(events) > MAX_BATCH_PREDICTIONS:
+            return jsonify(
+                {"error": f"At most {MAX_BATCH_PREDICTIONS} events per batch"}
+            ), 400
+
+        if not all(isinstance(event, dict) for event in events):
+            return jsonify({"error": "Each event must be an object"}), 400
+
+        # Analyze each distinct description once and share it across the batch
+        analysis_memo = {}
+        description_analyses = []
+        for event in events:
+            if not event.get("description"):
+                description_analyses.append(None)
+                continue
+            key = (
+                event.get("description", ""),
+                event.get("title", ""),
+                event.get("category", ""),
+                event.get("date", ""),
+                event.get("venue", ""),
+            )
+            if key not in analysis_memo:
+                analysis_memo[key] = description_enhancer.analyze_description(*key)
+            description_analyses.append(analysis_memo[key])
+
+        success = success_predictor.predict_success_batch(events, description_analyses)
+        popularity = recommender.predict_popularity_batch(events)
+
+        results = [
+            {"success": s, "popularity": p, "description_analysis": a}
+            for s, p, a in zip(success, popularity, description_analyses)
+        ]
+
+        return jsonify({"results": results, "count": len(results)}), 200
+    except Exception as e:
+        import traceback
+
+        print(f"Error in batch prediction: {str(e)}")
+        print(traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+
 # Banned Words Management endpoints (Admin only)
 @app.route("/api/admin/banned-words", methods=["GET"])
 @require_role("admin", "faculty", "ksac_member")
@@ -1756,6 +3350,19 @@ def health_check():
             {
                 "status": "healthy",
                 "database": "connected",
+                "analysis_queue": analysis_queue.stats(),
+                "promotion_queue": promotion_queue.stats(),
+                "password_service": password_service.stats(),
+                "ingest_pool": ingest_pool.stats(),
+                "event_access_cache": event_access.stats(),
+                "token_cache": token_cache.stats(),
+                "user_cache": user_cache.stats(),
+                "ical_cache": ical_feeds.stats(),
+                "rate_limiter": rate_limiter.stats(),
+                "expiry_sweeper": expiry_sweeper.stats() if expiry_sweeper else None,
+                "registration_buffer": (
+                    registration_buffer.stats() if registration_buffer else None
+                ),
                 "timestamp": datetime.now().isoformat(),
             }
         ), 200
@@ -1770,8 +3377,50 @@ def health_check():
         ), 503
 
 
-# Initialize database on startup
-init_db()
+# Background services, started by create_app()
+registration_buffer = None
+expiry_sweeper = None
+
+
+def create_app():
+    """
+    Initialize the database and start the background services
+
+    Called once per server process (`python app.py`, or gunicorn with
+    "app:create_app()"). Importing this module does neither, so scripts and
+    pool worker processes can import it without side effects.
+    """
+    global registration_buffer, expiry_sweeper
+    if app.config.get("SERVICES_STARTED"):
+        return app
+    app.config["SERVICES_STARTED"] = True
+
+    init_db()
+
+    if REGISTRATION_WRITE_BEHIND:
+        registration_buffer = RegistrationBuffer(
+            get_db,
+            REGISTRATION_JOURNAL_DIR,
+            flush_interval=REGISTRATION_FLUSH_INTERVAL_MS / 1000,
+        )
+        registration_buffer.start()
+        atexit.register(registration_buffer.stop)
+
+    if EXPIRY_SWEEP_INTERVAL > 0:
+        expiry_sweeper = ExpirySweeper(
+            get_db,
+            interval=EXPIRY_SWEEP_INTERVAL,
+            batch_size=EXPIRY_SWEEP_BATCH,
+            archive=(
+                (lambda conn: archive_past_events(conn, ARCHIVE_AFTER_DAYS))
+                if ARCHIVE_AFTER_DAYS > 0
+                else None
+            ),
+        )
+        expiry_sweeper.start()
+        atexit.register(expiry_sweeper.stop)
+
+    return app
 
 
 # Serve React SPA - catch-all route for frontend
@@ -1792,6 +3441,7 @@ def serve_react(path):
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
+    create_app()
     print(f"🚀 Events Navigator Backend starting on port {port}")
     print("📦 Database initialized: events.db")
     app.run(host="0.0.0.0", port=port, debug=False)
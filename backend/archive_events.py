@@ -0,0 +1,35 @@
+"""
+Move long-past events into the events_archive table
+The expiry sweeper does this automatically after every sweep (see
+ARCHIVE_AFTER_DAYS); run this to archive on demand or with another horizon.
+Registrations are left in place and stay visible in users' past events.
+
+Run from `backend/`:  python archive_events.py [--days 180]
+"""
+import argparse
+
+try:
+    from backend.database import ARCHIVE_AFTER_DAYS, archive_past_events, get_db, init_db
+except ImportError:  # Fallback for running from `backend/` directly
+    from database import ARCHIVE_AFTER_DAYS, archive_past_events, get_db, init_db
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive expired events')
+    parser.add_argument('--days', type=int, default=ARCHIVE_AFTER_DAYS or 180,
+                        help='archive expired events dated more than this many days ago')
+    args = parser.parse_args()
+
+    init_db()
+    conn = get_db()
+    try:
+        archived = archive_past_events(conn, args.days)
+        remaining = conn.execute('SELECT COUNT(*) FROM events').fetchone()[0]
+        total = conn.execute('SELECT COUNT(*) FROM events_archive').fetchone()[0]
+    finally:
+        conn.close()
+    print(f"✅ Archived {archived} events ({remaining} active, {total} archived)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Micro-benchmark for SuccessPredictor keyword feature extraction
+Compares the original scans, which rebuilt their keyword lists on every
+call, against the module-level keyword constants and checks that both give
+the same answers.
+
+Run from `backend/`:  python benchmark_keyword_matchers.py
+"""
+import timeit
+
+from ml_success_predictor import (
+    EVENT_TYPE_KEYWORDS,
+    GOOD_VENUES,
+    POPULAR_SOCIETIES,
+    success_predictor,
+)
+
+SAMPLES = [
+    ("TechFest 2024 - Hackathon",
+     "Join us for the biggest hackathon of the year! 24-hour coding competition "
+     "with exciting prizes. Open to all KIIT students.",
+     "Tech Club", "KIIT Main Auditorium, KIIT University, Bhubaneswar"),
+    ("Cultural Night 2024",
+     "An evening of music, dance, and drama celebrating diverse cultures. "
+     "Performances by talented KIIT students. Don't miss this spectacular show!",
+     "Cultural Society", "KIIT Convention Centre, Bhubaneswar"),
+    ("Research Methods",
+     "A guest lecture on research methodology followed by a keynote from "
+     "visiting faculty.",
+     "Academic Council", "Room 204"),
+    ("Weekly Meetup",
+     "Casual networking evening for first years. Snacks provided.",
+     "", "Library"),
+]
+
+
+# A description near DescriptionEnhancer.max_length whose only event type
+# keyword comes late, so every legacy scan walks most of the text
+LONG_SAMPLES = [
+    ("Annual Robotics Expo",
+     "Students from every branch will demonstrate autonomous rovers, drones and "
+     "robotic arms built over the semester. Teams explain their design choices, "
+     "the sensors and controllers they used, and the problems they hit along the "
+     "way. Visitors can try the simulators, vote for their favourite build and "
+     "chat with the faculty mentors about research positions for next year. "
+     "Refreshments will be served throughout the day. The evening closes with a "
+     "short keynote from an industry guest.",
+     "Robotics Club", "Campus 15 Open Air Theatre"),
+]
+
+
+def legacy_detect_event_type(title, description):
+    text = f"{title} {description}".lower()
+    type_keywords = {
+        'hackathon': ['hackathon', 'hack', 'coding competition'],
+        'workshop': ['workshop', 'hands-on', 'practical'],
+        'seminar': ['seminar', 'talk', 'presentation'],
+        'competition': ['competition', 'contest', 'tournament'],
+        'festival': ['festival', 'fest', 'celebration'],
+        'conference': ['conference', 'summit', 'convention'],
+        'lecture': ['lecture', 'guest lecture', 'keynote'],
+        'meetup': ['meetup', 'networking', 'social']
+    }
+    for event_type, keywords in type_keywords.items():
+        if any(keyword in text for keyword in keywords):
+            return event_type
+    return 'general'
+
+
+def legacy_organizer_score(society):
+    if not society:
+        return 0.6
+    society_lower = society.lower()
+    popular_societies = [
+        'coding', 'tech', 'technical', 'cs', 'computer',
+        'cultural', 'dance', 'music', 'drama',
+        'sports', 'cricket', 'football'
+    ]
+    for popular in popular_societies:
+        if popular in society_lower:
+            return 0.8
+    if len(society) > 3:
+        return 0.7
+    return 0.6
+
+
+def legacy_venue_score(venue):
+    if not venue:
+        return 0.5
+    venue_lower = venue.lower()
+    good_venues = ['auditorium', 'hall', 'stadium', 'ground', 'center', 'centre']
+    if any(gv in venue_lower for gv in good_venues):
+        return 0.8
+    if len(venue) > 5:
+        return 0.7
+    return 0.5
+
+
+def run_legacy(samples):
+    for title, description, society, venue in samples:
+        legacy_detect_event_type(title, description)
+        legacy_organizer_score(society)
+        legacy_venue_score(venue)
+
+
+def run_current(samples):
+    for title, description, society, venue in samples:
+        success_predictor._detect_event_type(title, description)
+        success_predictor._calculate_organizer_score(society)
+        success_predictor._calculate_venue_score(venue)
+
+
+def check_equivalence():
+    for title, description, society, venue in SAMPLES + LONG_SAMPLES:
+        assert legacy_detect_event_type(title, description) == \
+            success_predictor._detect_event_type(title, description)
+        assert legacy_organizer_score(society) == \
+            success_predictor._calculate_organizer_score(society)
+        assert legacy_venue_score(venue) == \
+            success_predictor._calculate_venue_score(venue)
+
+
+def per_call_us(func, samples, number):
+    best = min(timeit.repeat(lambda: func(samples), number=number, repeat=5))
+    return best / (number * len(samples)) * 1e6
+
+
+if __name__ == "__main__":
+    check_equivalence()
+    print(f"Keywords: {sum(len(v) for v in EVENT_TYPE_KEYWORDS.values())} event type, "
+          f"{len(POPULAR_SOCIETIES)} society, {len(GOOD_VENUES)} venue")
+
+    number = 5000
+    for name, samples in (("Typical", SAMPLES), ("Long", LONG_SAMPLES)):
+        legacy = per_call_us(run_legacy, samples, number)
+        current = per_call_us(run_current, samples, number)
+        print(f"{name} descriptions:")
+        print(f"  Legacy scans:      {legacy:.2f} us per event")
+        print(f"  Module constants:  {current:.2f} us per event")
+        print(f"  Speedup:           {legacy / current:.2f}x")
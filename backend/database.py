@@ -0,0 +1,789 @@
+"""
+Database schema, migrations and maintenance helpers
+Importing this module has no side effects, so the CLI scripts and worker
+processes can use get_db() and the helpers below without loading the app
+"""
+import os
+import sqlite3
+from datetime import date, timedelta
+
+try:
+    from backend.ml_request_clusters import request_clusterer
+except ImportError:  # Fallback for running from `backend/` directly
+    from ml_request_clusters import request_clusterer
+
+DB_NAME = os.path.join(os.path.dirname(__file__), "events.db")
+
+# Expired events older than this many days move to events_archive after
+# each expiry sweep; 0 keeps everything in events
+ARCHIVE_AFTER_DAYS = int(os.environ.get("ARCHIVE_AFTER_DAYS", 180))
+
+
+def _counter_upsert(rows):
+    """Trigger statement adding (scope, name expression, delta) to stats_counters"""
+    values = ", ".join(f"('{scope}', {name}, {delta})" for scope, name, delta in rows)
+    return f"""INSERT INTO stats_counters (scope, name, count) VALUES {values}
+               ON CONFLICT (scope, name) DO UPDATE SET count = count + excluded.count;"""
+
+
+STATS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS stats_events_insert AFTER INSERT ON events
+        BEGIN
+            {_counter_upsert([("events", "'total'", 1), ("event_category", "COALESCE(NEW.category, '')", 1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_events_delete AFTER DELETE ON events
+        BEGIN
+            {_counter_upsert([("events", "'total'", -1), ("event_category", "COALESCE(OLD.category, '')", -1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_events_category AFTER UPDATE OF category ON events
+        WHEN OLD.category IS NOT NEW.category
+        BEGIN
+            {_counter_upsert([("event_category", "COALESCE(OLD.category, '')", -1), ("event_category", "COALESCE(NEW.category, '')", 1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_registrations_insert AFTER INSERT ON registrations
+        BEGIN
+            {_counter_upsert([("registrations", "'total'", 1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_registrations_delete AFTER DELETE ON registrations
+        BEGIN
+            {_counter_upsert([("registrations", "'total'", -1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_requests_insert AFTER INSERT ON event_requests
+        BEGIN
+            {_counter_upsert([
+                ("requests", "'total'", 1),
+                ("request_status", "COALESCE(NEW.status, '')", 1),
+                ("request_category", "COALESCE(NEW.category_detected, '')", 1),
+                ("request_sentiment", "COALESCE(NEW.sentiment, '')", 1),
+            ])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_requests_delete AFTER DELETE ON event_requests
+        BEGIN
+            {_counter_upsert([
+                ("requests", "'total'", -1),
+                ("request_status", "COALESCE(OLD.status, '')", -1),
+                ("request_category", "COALESCE(OLD.category_detected, '')", -1),
+                ("request_sentiment", "COALESCE(OLD.sentiment, '')", -1),
+            ])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_requests_update
+        AFTER UPDATE OF status, category_detected, sentiment ON event_requests
+        WHEN OLD.status IS NOT NEW.status
+          OR OLD.category_detected IS NOT NEW.category_detected
+          OR OLD.sentiment IS NOT NEW.sentiment
+        BEGIN
+            {_counter_upsert([
+                ("request_status", "COALESCE(OLD.status, '')", -1),
+                ("request_status", "COALESCE(NEW.status, '')", 1),
+                ("request_category", "COALESCE(OLD.category_detected, '')", -1),
+                ("request_category", "COALESCE(NEW.category_detected, '')", 1),
+                ("request_sentiment", "COALESCE(OLD.sentiment, '')", -1),
+                ("request_sentiment", "COALESCE(NEW.sentiment, '')", 1),
+            ])}
+        END""",
+]
+
+
+# Normalized start of an event as 'YYYY-MM-DD HH:MM:SS'
+EVENT_START = "COALESCE(datetime(date || ' ' || time), datetime(date), date)"
+
+# The start as epoch seconds (date and time read as server local time)
+EVENT_START_TS = f"CAST(strftime('%s', {EVENT_START}, 'utc') AS INTEGER)"
+
+# events.starts_ts follows date and time
+STARTS_TS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS events_starts_ts_insert AFTER INSERT ON events
+        BEGIN
+            UPDATE events SET starts_ts = {EVENT_START_TS} WHERE id = NEW.id;
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_starts_ts_update AFTER UPDATE OF date, time ON events
+        BEGIN
+            UPDATE events SET starts_ts = {EVENT_START_TS} WHERE id = NEW.id;
+        END""",
+]
+
+# events.revision goes up whenever a field shown in calendar feeds changes
+REVISION_TRIGGER = """CREATE TRIGGER IF NOT EXISTS events_revision_update
+    AFTER UPDATE OF title, description, category, date, time, venue, society, location_address
+    ON events
+    BEGIN
+        UPDATE events SET revision = revision + 1 WHERE id = NEW.id;
+    END"""
+
+# events_geo (an R*Tree of event locations) follows location_lat/location_lng;
+# rows without numeric coordinates are left out
+HAS_LOCATION = "typeof({0}.location_lat) IN ('real', 'integer') AND typeof({0}.location_lng) IN ('real', 'integer')"
+GEO_INDEX_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS events_geo_insert AFTER INSERT ON events
+        WHEN {HAS_LOCATION.format("NEW")}
+        BEGIN
+            INSERT INTO events_geo VALUES
+                (NEW.id, NEW.location_lat, NEW.location_lat, NEW.location_lng, NEW.location_lng);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS events_geo_update AFTER UPDATE OF location_lat, location_lng ON events
+        BEGIN
+            DELETE FROM events_geo WHERE id = NEW.id;
+            INSERT INTO events_geo
+                SELECT NEW.id, NEW.location_lat, NEW.location_lat, NEW.location_lng, NEW.location_lng
+                WHERE {HAS_LOCATION.format("NEW")};
+        END""",
+    """CREATE TRIGGER IF NOT EXISTS events_geo_delete AFTER DELETE ON events
+        BEGIN
+            DELETE FROM events_geo WHERE id = OLD.id;
+        END""",
+]
+
+# Derived columns to fill in when events_archive gains them
+ARCHIVE_BACKFILL = {"starts_ts": EVENT_START_TS}
+
+# Archived events still count towards the event totals
+ARCHIVE_STATS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS stats_events_archive_insert AFTER INSERT ON events_archive
+        BEGIN
+            {_counter_upsert([("events", "'total'", 1), ("event_category", "COALESCE(NEW.category, '')", 1)])}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS stats_events_archive_delete AFTER DELETE ON events_archive
+        BEGIN
+            {_counter_upsert([("events", "'total'", -1), ("event_category", "COALESCE(OLD.category, '')", -1)])}
+        END""",
+]
+
+
+# events.registration_count follows registrations in the same way
+REGISTRATION_COUNT_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS registration_count_insert AFTER INSERT ON registrations
+       BEGIN
+           UPDATE events SET registration_count = registration_count + 1
+           WHERE id = NEW.event_id;
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS registration_count_delete AFTER DELETE ON registrations
+       BEGIN
+           UPDATE events SET registration_count = registration_count - 1
+           WHERE id = OLD.event_id;
+       END""",
+]
+
+
+# Near-duplicate clusters: only the first few members of a cluster are put
+# in the LSH buckets, so matching a new request costs the same however large
+# its cluster has grown
+CLUSTER_REPRESENTATIVES = 8
+
+# request_clusters (size per cluster) and request_cluster_counts (size per
+# cluster and status) follow event_requests. latest_at is the newest request
+# ever added; it is not lowered when requests are deleted.
+CLUSTER_COUNT_TRIGGERS = [
+    """CREATE TRIGGER IF NOT EXISTS request_clusters_assign
+       AFTER UPDATE OF cluster_id ON event_requests
+       WHEN OLD.cluster_id IS NOT NEW.cluster_id
+       BEGIN
+           UPDATE request_clusters
+           SET request_count = request_count - 1,
+               pending_count = pending_count - (COALESCE(OLD.status, '') = 'pending')
+           WHERE cluster_id = OLD.cluster_id;
+           UPDATE request_cluster_counts SET count = count - 1
+           WHERE cluster_id = OLD.cluster_id AND status = COALESCE(OLD.status, '');
+           INSERT INTO request_clusters (cluster_id, request_count, pending_count, latest_at)
+           SELECT NEW.cluster_id, 1, COALESCE(NEW.status, '') = 'pending', NEW.created_at
+           WHERE NEW.cluster_id IS NOT NULL
+           ON CONFLICT (cluster_id) DO UPDATE
+           SET request_count = request_count + 1,
+               pending_count = pending_count + excluded.pending_count,
+               latest_at = MAX(COALESCE(latest_at, ''), COALESCE(excluded.latest_at, ''));
+           INSERT INTO request_cluster_counts (cluster_id, status, count, latest_at)
+           SELECT NEW.cluster_id, COALESCE(NEW.status, ''), 1, NEW.created_at
+           WHERE NEW.cluster_id IS NOT NULL
+           ON CONFLICT (cluster_id, status) DO UPDATE
+           SET count = count + 1,
+               latest_at = MAX(COALESCE(latest_at, ''), COALESCE(excluded.latest_at, ''));
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS request_clusters_status
+       AFTER UPDATE OF status ON event_requests
+       WHEN OLD.status IS NOT NEW.status
+         AND NEW.cluster_id IS NOT NULL AND OLD.cluster_id IS NEW.cluster_id
+       BEGIN
+           UPDATE request_clusters
+           SET pending_count = pending_count
+                               + (COALESCE(NEW.status, '') = 'pending')
+                               - (COALESCE(OLD.status, '') = 'pending')
+           WHERE cluster_id = NEW.cluster_id;
+           UPDATE request_cluster_counts SET count = count - 1
+           WHERE cluster_id = NEW.cluster_id AND status = COALESCE(OLD.status, '');
+           INSERT INTO request_cluster_counts (cluster_id, status, count, latest_at)
+           VALUES (NEW.cluster_id, COALESCE(NEW.status, ''), 1, NEW.created_at)
+           ON CONFLICT (cluster_id, status) DO UPDATE
+           SET count = count + 1,
+               latest_at = MAX(COALESCE(latest_at, ''), COALESCE(excluded.latest_at, ''));
+       END""",
+    """CREATE TRIGGER IF NOT EXISTS request_clusters_delete
+       AFTER DELETE ON event_requests
+       WHEN OLD.cluster_id IS NOT NULL
+       BEGIN
+           UPDATE request_clusters
+           SET request_count = request_count - 1,
+               pending_count = pending_count - (COALESCE(OLD.status, '') = 'pending'),
+               indexed_count = indexed_count
+                               - EXISTS (SELECT 1 FROM request_lsh_buckets WHERE request_id = OLD.id)
+           WHERE cluster_id = OLD.cluster_id;
+           UPDATE request_cluster_counts SET count = count - 1
+           WHERE cluster_id = OLD.cluster_id AND status = COALESCE(OLD.status, '');
+           DELETE FROM request_lsh_buckets WHERE request_id = OLD.id;
+       END""",
+]
+
+
+def rebuild_cluster_counts(c):
+    """Recompute the cluster size tables and prune the LSH buckets to representatives"""
+    c.execute("DELETE FROM request_clusters")
+    c.execute("DELETE FROM request_cluster_counts")
+    c.execute(
+        """INSERT INTO request_cluster_counts (cluster_id, status, count, latest_at)
+           SELECT cluster_id, COALESCE(status, ''), COUNT(*), MAX(created_at)
+           FROM event_requests WHERE cluster_id IS NOT NULL
+           GROUP BY cluster_id, COALESCE(status, '')"""
+    )
+    c.execute(
+        """INSERT INTO request_clusters (cluster_id, request_count, pending_count, latest_at)
+           SELECT cluster_id, SUM(count), SUM(CASE WHEN status = 'pending' THEN count ELSE 0 END),
+                  MAX(latest_at)
+           FROM request_cluster_counts GROUP BY cluster_id"""
+    )
+    c.execute(
+        """DELETE FROM request_lsh_buckets WHERE request_id NOT IN
+           (SELECT id FROM (SELECT id, ROW_NUMBER() OVER
+                                (PARTITION BY cluster_id ORDER BY id) AS position
+                            FROM event_requests WHERE cluster_id IS NOT NULL)
+            WHERE position <= ?)""",
+        (CLUSTER_REPRESENTATIVES,),
+    )
+    c.execute(
+        """UPDATE request_clusters SET indexed_count =
+           (SELECT COUNT(DISTINCT b.request_id) FROM request_lsh_buckets b
+            JOIN event_requests er ON er.id = b.request_id
+            WHERE er.cluster_id = request_clusters.cluster_id)"""
+    )
+
+
+def rebuild_registration_counts(c):
+    c.execute(
+        """UPDATE events SET registration_count =
+           (SELECT COUNT(*) FROM registrations r WHERE r.event_id = events.id)"""
+    )
+
+
+def rebuild_stats_counters(conn):
+    """Recompute every stats counter from the base tables (repairs drift)"""
+    c = conn.cursor()
+    rebuild_registration_counts(c)
+    c.execute("DELETE FROM stats_counters")
+    c.execute(
+        """INSERT INTO stats_counters (scope, name, count)
+           SELECT 'events', 'total', COUNT(*)
+           FROM (SELECT id FROM events UNION ALL SELECT id FROM events_archive)
+           UNION ALL
+           SELECT 'event_category', COALESCE(category, ''), COUNT(*)
+           FROM (SELECT category FROM events UNION ALL SELECT category FROM events_archive)
+           GROUP BY COALESCE(category, '')
+           UNION ALL
+           SELECT 'registrations', 'total', COUNT(*) FROM registrations
+           UNION ALL
+           SELECT 'requests', 'total', COUNT(*) FROM event_requests
+           UNION ALL
+           SELECT 'request_status', COALESCE(status, ''), COUNT(*) FROM event_requests
+           GROUP BY COALESCE(status, '')
+           UNION ALL
+           SELECT 'request_category', COALESCE(category_detected, ''), COUNT(*)
+           FROM event_requests GROUP BY COALESCE(category_detected, '')
+           UNION ALL
+           SELECT 'request_sentiment', COALESCE(sentiment, ''), COUNT(*)
+           FROM event_requests GROUP BY COALESCE(sentiment, '')"""
+    )
+    rebuild_cluster_counts(c)
+    conn.commit()
+
+
+def sync_events_archive(c):
+    """
+    Create events_archive and give it any columns events has gained
+
+    Returns the names of the columns added.
+    """
+    c.execute("CREATE TABLE IF NOT EXISTS events_archive AS SELECT * FROM events WHERE 0")
+    archive_columns = {
+        row[1] for row in c.execute("PRAGMA table_info(events_archive)").fetchall()
+    }
+    added = []
+    for row in c.execute("PRAGMA table_info(events)").fetchall():
+        if row[1] not in archive_columns:
+            c.execute(f"ALTER TABLE events_archive ADD COLUMN {row[1]} {row[2]}")
+            added.append(row[1])
+    c.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_events_archive_id ON events_archive(id)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_archive_date ON events_archive(date, time)"
+    )
+    if "starts_ts" in {row[1] for row in c.execute("PRAGMA table_info(events_archive)")}:
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS idx_events_archive_starts_ts ON events_archive(starts_ts)"
+        )
+    for trigger in ARCHIVE_STATS_TRIGGERS:
+        c.execute(trigger)
+    return added
+
+
+def archive_past_events(conn, days, batch_size=500):
+    """Move expired events dated more than `days` days ago into events_archive"""
+    c = conn.cursor()
+    columns = ", ".join(
+        row[1] for row in c.execute("PRAGMA table_info(events)").fetchall()
+    )
+    # Event dates are local; SQLite's date('now') would be the UTC date
+    horizon = (date.today() - timedelta(days=int(days))).isoformat()
+    archived = 0
+    while True:
+        c.execute("BEGIN IMMEDIATE")
+        ids = [
+            row[0]
+            for row in c.execute(
+                "SELECT id FROM events WHERE is_expired = 1 AND date < ? LIMIT ?",
+                (horizon, batch_size),
+            ).fetchall()
+        ]
+        if not ids:
+            conn.commit()
+            break
+        placeholders = ",".join("?" * len(ids))
+        c.execute(
+            f"""INSERT INTO events_archive ({columns})
+                SELECT {columns} FROM events WHERE id IN ({placeholders})""",
+            ids,
+        )
+        # Registrations stay where they are; get_user_events reads them
+        # against both tables
+        c.execute(f"DELETE FROM event_waitlist WHERE event_id IN ({placeholders})", ids)
+        c.execute(f"DELETE FROM events WHERE id IN ({placeholders})", ids)
+        conn.commit()
+        archived += len(ids)
+        if len(ids) < batch_size:
+            break
+    return archived
+
+
+def read_stats_counters(c, scopes):
+    """Return {scope: {name: count}} for the given scopes in one query"""
+    placeholders = ",".join("?" * len(scopes))
+    counters = {scope: {} for scope in scopes}
+    rows = c.execute(
+        f"SELECT scope, name, count FROM stats_counters WHERE scope IN ({placeholders})",
+        scopes,
+    ).fetchall()
+    for row in rows:
+        counters[row["scope"]][row["name"]] = row["count"]
+    return counters
+
+
+def init_db():
+    conn = sqlite3.connect(DB_NAME)
+    c = conn.cursor()
+
+    # Write-ahead logging (persistent for the database file): readers such as
+    # a slow streaming export no longer block registrations and other writes
+    c.execute("PRAGMA journal_mode=WAL")
+
+    # Users table
+    c.execute("""CREATE TABLE IF NOT EXISTS users
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  email TEXT UNIQUE NOT NULL,
+                  password_hash TEXT NOT NULL,
+                  name TEXT,
+                  role TEXT DEFAULT 'student',
+                  society_name TEXT,
+                  created_at TEXT DEFAULT CURRENT_TIMESTAMP)""")
+
+    # Events table
+    c.execute("""CREATE TABLE IF NOT EXISTS events
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  title TEXT NOT NULL,
+                  description TEXT,
+                  category TEXT NOT NULL,
+                  date TEXT NOT NULL,
+                  time TEXT NOT NULL,
+                  venue TEXT NOT NULL,
+                  poster_url TEXT,
+                  registration_url TEXT,
+                  society TEXT,
+                  created_by INTEGER,
+                  event_password_hash TEXT,
+                  is_locked INTEGER DEFAULT 0,
+                  is_expired INTEGER DEFAULT 0,
+                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (created_by) REFERENCES users(id))""")
+
+    # Migrate: Add is_expired column if it doesn't exist
+    c.execute("PRAGMA table_info(events)")
+    columns = [row[1] for row in c.fetchall()]
+    if "is_expired" not in columns:
+        try:
+            c.execute("ALTER TABLE events ADD COLUMN is_expired INTEGER DEFAULT 0")
+            conn.commit()
+            print("✅ Added is_expired column to events table")
+        except Exception as e:
+            print(f"Note: is_expired column may already exist: {e}")
+    c.execute("UPDATE events SET is_expired = 0 WHERE is_expired IS NULL")
+
+    # Migrate: auto_expire = 0 keeps the expiry sweeper away from past events
+    # an organizer has explicitly marked active again
+    if "auto_expire" not in columns:
+        c.execute(
+            "ALTER TABLE events ADD COLUMN auto_expire INTEGER NOT NULL DEFAULT 1"
+        )
+        print("✅ Added auto_expire column to events table")
+
+    # Migrate: the start as epoch seconds, so upcoming/past splits and
+    # calendar ranges are plain comparisons that can use an index
+    if "starts_ts" not in columns:
+        c.execute("ALTER TABLE events ADD COLUMN starts_ts INTEGER")
+        c.execute(f"UPDATE events SET starts_ts = {EVENT_START_TS}")
+        print("✅ Added starts_ts column to events table")
+    for trigger in STARTS_TS_TRIGGERS:
+        c.execute(trigger)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_events_starts_ts ON events(starts_ts)")
+
+    # Listings only ever show active events, in date order
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_active ON events(date, time) WHERE is_expired = 0"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_events_active_category ON events(category, date, time) WHERE is_expired = 0"
+    )
+
+    # Migrate: Add location columns for precise navigation
+    location_columns = [
+        "location_id",
+        "location_lat",
+        "location_lng",
+        "location_address",
+    ]
+    for col in location_columns:
+        if col not in columns:
+            try:
+                if col == "location_id":
+                    c.execute("ALTER TABLE events ADD COLUMN location_id TEXT")
+                elif col == "location_lat":
+                    c.execute("ALTER TABLE events ADD COLUMN location_lat REAL")
+                elif col == "location_lng":
+                    c.execute("ALTER TABLE events ADD COLUMN location_lng REAL")
+                elif col == "location_address":
+                    c.execute("ALTER TABLE events ADD COLUMN location_address TEXT")
+                conn.commit()
+                print(f"✅ Added {col} column to events table")
+            except Exception as e:
+                print(f"Note: {col} column may already exist: {e}")
+
+    # Migrate: revision counter, so calendar feeds can tell changed events
+    # apart without reading them
+    if "revision" not in columns:
+        c.execute("ALTER TABLE events ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+        print("✅ Added revision column to events table")
+    c.execute(REVISION_TRIGGER)
+
+    # Spatial index of event locations for nearby-event queries
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_geo'")
+    if c.fetchone() is None:
+        c.execute(
+            "CREATE VIRTUAL TABLE events_geo USING rtree(id, min_lat, max_lat, min_lng, max_lng)"
+        )
+        c.execute(
+            f"""INSERT INTO events_geo
+                 SELECT id, location_lat, location_lat, location_lng, location_lng
+                 FROM events e WHERE {HAS_LOCATION.format("e")}"""
+        )
+        print("✅ Built events_geo spatial index")
+    for trigger in GEO_INDEX_TRIGGERS:
+        c.execute(trigger)
+
+    # Migrate: Add ML analysis columns (filled in by the background analysis queue)
+    analysis_columns = {
+        "description_score": "INTEGER",
+        "success_score": "REAL",
+        "success_level": "TEXT",
+        "predicted_registrations": "INTEGER",
+        "ml_analyzed_at": "TEXT",
+    }
+    for col, col_type in analysis_columns.items():
+        if col not in columns:
+            try:
+                c.execute(f"ALTER TABLE events ADD COLUMN {col} {col_type}")
+                conn.commit()
+                print(f"✅ Added {col} column to events table")
+            except Exception as e:
+                print(f"Note: {col} column may already exist: {e}")
+
+    # Registrations table
+    c.execute("""CREATE TABLE IF NOT EXISTS registrations
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  event_id INTEGER,
+                  user_id INTEGER,
+                  user_email TEXT,
+                  registered_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (event_id) REFERENCES events(id),
+                  FOREIGN KEY (user_id) REFERENCES users(id))""")
+
+    # Event Requests table (for AI assistant)
+    c.execute("""CREATE TABLE IF NOT EXISTS event_requests
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  user_id INTEGER,
+                  user_email TEXT,
+                  request_text TEXT NOT NULL,
+                  category_detected TEXT,
+                  sentiment TEXT,
+                  auto_response TEXT,
+                  status TEXT DEFAULT 'pending',
+                  admin_response TEXT,
+                  admin_id INTEGER,
+                  society_name TEXT,
+                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                  responded_at TEXT,
+                  FOREIGN KEY (user_id) REFERENCES users(id),
+                  FOREIGN KEY (admin_id) REFERENCES users(id))""")
+
+    # Migrate: Add society_name to event_requests created before it existed
+    c.execute("PRAGMA table_info(event_requests)")
+    request_columns = [row[1] for row in c.fetchall()]
+    if "society_name" not in request_columns:
+        try:
+            c.execute("ALTER TABLE event_requests ADD COLUMN society_name TEXT")
+            conn.commit()
+            print("✅ Added society_name column to event_requests table")
+        except Exception as e:
+            print(f"Note: society_name column may already exist: {e}")
+
+    # Migrate: Near-duplicate clustering of event requests (MinHash + LSH)
+    cluster_columns = {"cluster_id": "INTEGER", "signature": "BLOB"}
+    for col, col_type in cluster_columns.items():
+        if col not in request_columns:
+            try:
+                c.execute(f"ALTER TABLE event_requests ADD COLUMN {col} {col_type}")
+                conn.commit()
+                print(f"✅ Added {col} column to event_requests table")
+            except Exception as e:
+                print(f"Note: {col} column may already exist: {e}")
+    c.execute("""CREATE TABLE IF NOT EXISTS request_lsh_buckets
+                 (bucket TEXT NOT NULL,
+                  request_id INTEGER NOT NULL,
+                  FOREIGN KEY (request_id) REFERENCES event_requests(id))""")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_request_lsh_buckets_bucket ON request_lsh_buckets(bucket)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_event_requests_cluster ON event_requests(cluster_id)"
+    )
+
+    # Migrate: cluster sizes kept up to date by triggers, so the cluster
+    # listing does not group every request on each call
+    c.execute("SELECT 1 FROM sqlite_master WHERE name = 'request_clusters'")
+    has_cluster_counts = c.fetchone() is not None
+    c.execute("""CREATE TABLE IF NOT EXISTS request_clusters
+                 (cluster_id INTEGER PRIMARY KEY,
+                  request_count INTEGER NOT NULL DEFAULT 0,
+                  pending_count INTEGER NOT NULL DEFAULT 0,
+                  latest_at TEXT,
+                  indexed_count INTEGER NOT NULL DEFAULT 0)""")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_request_clusters_size ON request_clusters(request_count DESC, latest_at DESC)"
+    )
+    c.execute("""CREATE TABLE IF NOT EXISTS request_cluster_counts
+                 (cluster_id INTEGER NOT NULL,
+                  status TEXT NOT NULL,
+                  count INTEGER NOT NULL DEFAULT 0,
+                  latest_at TEXT,
+                  PRIMARY KEY (cluster_id, status)) WITHOUT ROWID""")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_request_cluster_counts_status ON request_cluster_counts(status, count DESC, latest_at DESC)"
+    )
+    for trigger in CLUSTER_COUNT_TRIGGERS:
+        c.execute(trigger)
+    if not has_cluster_counts:
+        rebuild_cluster_counts(c)
+        print("✅ Built request cluster counts")
+
+    # Keyset pagination of the admin listing, optionally within one status
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_event_requests_created ON event_requests(created_at, id)"
+    )
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_event_requests_status_created ON event_requests(status, created_at, id)"
+    )
+
+    # Banned Words table (for content moderation)
+    c.execute("""CREATE TABLE IF NOT EXISTS banned_words
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  word TEXT UNIQUE NOT NULL,
+                  added_by INTEGER,
+                  reason TEXT,
+                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                  FOREIGN KEY (added_by) REFERENCES users(id))""")
+
+    # Materialized counters for /api/stats and /api/assistant/stats, kept in
+    # step by triggers so every write (routes and maintenance scripts alike)
+    # updates them in its own transaction
+    has_counters = c.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_counters'"
+    ).fetchone()
+    c.execute("""CREATE TABLE IF NOT EXISTS stats_counters
+                 (scope TEXT NOT NULL,
+                  name TEXT NOT NULL,
+                  count INTEGER NOT NULL DEFAULT 0,
+                  PRIMARY KEY (scope, name)) WITHOUT ROWID""")
+    for trigger in STATS_TRIGGERS:
+        c.execute(trigger)
+    # Migrate: One registration per user per event, enforced by a unique
+    # index, and a per-event registration counter
+    c.execute("PRAGMA index_list(registrations)")
+    if "idx_registrations_event_user" not in [row[1] for row in c.fetchall()]:
+        c.execute(
+            """DELETE FROM registrations WHERE id NOT IN
+               (SELECT MIN(id) FROM registrations GROUP BY event_id, user_id)"""
+        )
+        if c.rowcount > 0:
+            print(f"✅ Removed {c.rowcount} duplicate registrations")
+        c.execute(
+            """CREATE UNIQUE INDEX IF NOT EXISTS idx_registrations_event_user
+               ON registrations(event_id, user_id)"""
+        )
+    # A user's own registrations (profile, my events)
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_registrations_user ON registrations(user_id, event_id)"
+    )
+    c.execute("PRAGMA table_info(events)")
+    if "registration_count" not in [row[1] for row in c.fetchall()]:
+        c.execute(
+            "ALTER TABLE events ADD COLUMN registration_count INTEGER NOT NULL DEFAULT 0"
+        )
+        rebuild_registration_counts(c)
+        print("✅ Added registration_count column to events table")
+    for trigger in REGISTRATION_COUNT_TRIGGERS:
+        c.execute(trigger)
+
+    # Migrate: Optional event capacity (NULL = unlimited) and waitlist
+    c.execute("PRAGMA table_info(events)")
+    if "capacity" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE events ADD COLUMN capacity INTEGER")
+        print("✅ Added capacity column to events table")
+    c.execute("""CREATE TABLE IF NOT EXISTS event_waitlist
+                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                  event_id INTEGER NOT NULL,
+                  user_id INTEGER,
+                  user_email TEXT,
+                  created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+                  UNIQUE (event_id, user_id),
+                  FOREIGN KEY (event_id) REFERENCES events(id),
+                  FOREIGN KEY (user_id) REFERENCES users(id))""")
+    c.execute(
+        "CREATE INDEX IF NOT EXISTS idx_event_waitlist_event ON event_waitlist(event_id)"
+    )
+
+    # Cold storage for long-past events (see archive_past_events)
+    for column in sync_events_archive(c):
+        if column in ARCHIVE_BACKFILL:
+            c.execute(f"UPDATE events_archive SET {column} = {ARCHIVE_BACKFILL[column]}")
+
+    if not has_counters:
+        rebuild_stats_counters(conn)
+        print("✅ Built stats counters")
+
+    conn.commit()
+
+    # Cluster requests stored before clustering existed
+    unclustered = c.execute(
+        "SELECT id, request_text FROM event_requests WHERE cluster_id IS NULL ORDER BY id"
+    ).fetchall()
+    if unclustered:
+        assign_request_clusters(c, [(row[0], row[1]) for row in unclustered])
+        conn.commit()
+        print(f"✅ Clustered {len(unclustered)} existing event requests")
+    conn.close()
+
+
+def get_db():
+    conn = sqlite3.connect(DB_NAME)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def assign_request_clusters(c, requests):
+    """
+    Cluster newly inserted event requests with their near-duplicates
+
+    requests are (request_id, request_text) pairs already inserted through
+    cursor c; runs inside the caller's transaction.
+    """
+    signatures = [
+        (request_id, request_clusterer.signature(request_text))
+        for request_id, request_text in requests
+    ]
+    keys = sorted(
+        {key for _, signature in signatures for key in request_clusterer.band_keys(signature)}
+    )
+
+    # Stored requests sharing at least one LSH bucket with the new ones
+    candidates = {}
+    for start in range(0, len(keys), 500):
+        chunk = keys[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = c.execute(
+            f"""SELECT b.bucket, er.id, er.cluster_id, er.signature
+                FROM request_lsh_buckets b
+                JOIN event_requests er ON er.id = b.request_id
+                WHERE b.bucket IN ({placeholders})""",
+            chunk,
+        ).fetchall()
+        for bucket, request_id, cluster_id, signature in rows:
+            candidates.setdefault(bucket, []).append(
+                (request_id, cluster_id, request_clusterer.decode(signature))
+            )
+
+    # Representatives each candidate cluster already has in the buckets
+    cluster_ids = sorted({cluster_id for rows in candidates.values() for _, cluster_id, _ in rows})
+    indexed_counts = {}
+    for start in range(0, len(cluster_ids), 500):
+        chunk = cluster_ids[start : start + 500]
+        placeholders = ",".join("?" * len(chunk))
+        indexed_counts.update(
+            c.execute(
+                f"SELECT cluster_id, indexed_count FROM request_clusters WHERE cluster_id IN ({placeholders})",
+                chunk,
+            ).fetchall()
+        )
+
+    assignments, indexed = request_clusterer.assign(
+        signatures, candidates, indexed_counts, CLUSTER_REPRESENTATIVES
+    )
+    c.executemany(
+        "UPDATE event_requests SET cluster_id = ?, signature = ? WHERE id = ?",
+        [
+            (assignments[request_id], request_clusterer.encode(signature), request_id)
+            for request_id, signature in signatures
+        ],
+    )
+    indexed = set(indexed)
+    c.executemany(
+        "INSERT INTO request_lsh_buckets (bucket, request_id) VALUES (?, ?)",
+        [
+            (key, request_id)
+            for request_id, signature in signatures
+            if request_id in indexed
+            for key in request_clusterer.band_keys(signature)
+        ],
+    )
+    assigned = set(assignments.values())
+    c.executemany(
+        "UPDATE request_clusters SET indexed_count = ? WHERE cluster_id = ?",
+        [
+            (count, cluster_id)
+            for cluster_id, count in indexed_counts.items()
+            if cluster_id in assigned
+        ],
+    )
+    return assignments
@@ -0,0 +1,113 @@
+"""
+Verified-password cache and access tokens for locked events
+Lets a locked event's password be bcrypt-checked once and then recognized
+cheaply, either from an HMAC digest cache or from a signed access token
+"""
+import hashlib
+import hmac
+import threading
+import time
+
+import jwt
+
+TOKEN_TYPE = 'event_access'
+
+
+class EventAccessCache:
+    """
+    Per-event set of recently verified password digests
+
+    Only HMAC digests of (event id, stored hash, password) are kept, never the
+    password itself. Because the stored bcrypt hash is part of the digest, an
+    entry stops matching as soon as the event's password changes; invalidate()
+    drops the entries eagerly as well.
+    """
+
+    def __init__(self, secret, ttl=300, token_ttl=900, max_per_event=8):
+        self.ttl = ttl
+        self.token_ttl = token_ttl
+        self.max_per_event = max_per_event
+        # Separate keys so neither value can stand in for the other, or for
+        # the session tokens signed with the app secret
+        self._digest_key = hmac.new(secret.encode('utf-8'), b'event-password-cache', hashlib.sha256).digest()
+        self._token_key = hmac.new(secret.encode('utf-8'), b'event-access-token', hashlib.sha256).hexdigest()
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _digest(self, event_id, password_hash, password):
+        message = f'{event_id}\0{password_hash}\0{password}'.encode('utf-8')
+        return hmac.new(self._digest_key, message, hashlib.sha256).digest()
+
+    def _fingerprint(self, event_id, password_hash):
+        message = f'{event_id}\0{password_hash}'.encode('utf-8')
+        return hmac.new(self._digest_key, message, hashlib.sha256).hexdigest()[:32]
+
+    def check(self, event_id, password_hash, password):
+        """True if this password was verified for the event within the TTL"""
+        digest = self._digest(event_id, password_hash, password)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.get(event_id)
+            expires_at = entries.get(digest) if entries else None
+            if expires_at is not None and expires_at > now:
+                self.hits += 1
+                return True
+            if expires_at is not None:
+                del entries[digest]
+            self.misses += 1
+            return False
+
+    def remember(self, event_id, password_hash, password):
+        """Record a password that bcrypt has just accepted"""
+        digest = self._digest(event_id, password_hash, password)
+        now = time.time()
+        with self._lock:
+            entries = self._entries.setdefault(event_id, {})
+            for key in [k for k, expires_at in entries.items() if expires_at <= now]:
+                del entries[key]
+            if len(entries) >= self.max_per_event:
+                del entries[min(entries, key=entries.get)]
+            entries[digest] = now + self.ttl
+
+    def invalidate(self, event_id):
+        """Forget everything verified for an event (password changed or event deleted)"""
+        with self._lock:
+            if self._entries.pop(event_id, None) is not None:
+                self.invalidations += 1
+
+    def issue_token(self, event_id, password_hash):
+        """Signed token proving the event's current password was verified"""
+        payload = {
+            'type': TOKEN_TYPE,
+            'event_id': event_id,
+            'pwd': self._fingerprint(event_id, password_hash),
+            'exp': int(time.time()) + self.token_ttl
+        }
+        return jwt.encode(payload, self._token_key, algorithm='HS256')
+
+    def check_token(self, token, event_id, password_hash):
+        """True if the token was issued for this event under its current password"""
+        try:
+            payload = jwt.decode(token, self._token_key, algorithms=['HS256'])
+        except jwt.InvalidTokenError:
+            return False
+        return (
+            payload.get('type') == TOKEN_TYPE
+            and payload.get('event_id') == event_id
+            and hmac.compare_digest(
+                str(payload.get('pwd', '')), self._fingerprint(event_id, password_hash)
+            )
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                'events': len(self._entries),
+                'entries': sum(len(entries) for entries in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations
+            }
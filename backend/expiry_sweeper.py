@@ -0,0 +1,114 @@
+"""
+Background expiry of past events
+Periodically marks events whose date and time have passed as expired, in
+small batches found through the partial index on active events, so event
+listings can filter on is_expired instead of per-row date arithmetic
+"""
+import threading
+import time
+from datetime import datetime
+
+# An event ends at its date and time; one whose time does not parse is
+# treated as lasting until the end of its day
+EVENT_END = "COALESCE(datetime(date || ' ' || time), datetime(date, '+1 day'))"
+
+EXPIRE_BATCH = f"""UPDATE events SET is_expired = 1
+                   WHERE id IN (SELECT id FROM events
+                                WHERE is_expired = 0 AND auto_expire = 1
+                                  AND date <= date(?)
+                                  AND {EVENT_END} <= ?
+                                LIMIT ?)"""
+
+
+def local_now():
+    """
+    Current local time in SQLite's datetime() format
+
+    Event dates and times are entered in local time, while SQLite's 'now' is
+    UTC, so cutoffs compared with them are bound from here.
+    """
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ExpirySweeper:
+    """
+    Background thread that expires past events every `interval` seconds
+
+    archive: optional callable(conn) run after each sweep that moves old
+    events out of the hot table and returns how many it moved
+    """
+
+    def __init__(self, connect, interval=60, batch_size=500, archive=None):
+        self.connect = connect
+        self.interval = interval
+        self.batch_size = batch_size
+        self.archive = archive
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.sweeps = 0
+        self.expired = 0
+        self.archived = 0
+        self.errors = 0
+        self.last_sweep_ms = 0.0
+        self.last_sweep_at = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name='expiry-sweeper', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def sweep(self):
+        """Expire every event that has ended; returns how many were expired"""
+        start = time.perf_counter()
+        expired = 0
+        now = local_now()
+        conn = self.connect()
+        try:
+            while True:
+                # One short write transaction per batch
+                count = conn.execute(EXPIRE_BATCH, (now, now, self.batch_size)).rowcount
+                conn.commit()
+                expired += count
+                if count < self.batch_size:
+                    break
+            archived = self.archive(conn) if self.archive is not None else 0
+        finally:
+            conn.close()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.sweeps += 1
+            self.expired += expired
+            self.archived += archived
+            self.last_sweep_ms = elapsed_ms
+            self.last_sweep_at = datetime.now().isoformat()
+        return expired
+
+    def _run(self):
+        while True:
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"⚠️ Event expiry sweep failed: {e}")
+                with self._lock:
+                    self.errors += 1
+            if self._stop.wait(self.interval):
+                break
+
+    def stats(self):
+        with self._lock:
+            return {
+                'interval': self.interval,
+                'sweeps': self.sweeps,
+                'expired': self.expired,
+                'archived': self.archived,
+                'errors': self.errors,
+                'last_sweep_ms': round(self.last_sweep_ms, 3),
+                'last_sweep_at': self.last_sweep_at
+            }
@@ -0,0 +1,168 @@
+"""
+iCalendar (.ics) feeds of events
+Each event is serialized to a VEVENT fragment once per revision and cached;
+feeds are assembled by concatenating cached fragments
+"""
+import hashlib
+import hmac
+import re
+from datetime import datetime, timedelta
+
+try:
+    from backend.ml_cache import LRUCache
+except ImportError:  # Fallback for running from `backend/` directly
+    from ml_cache import LRUCache
+
+# Bump when the fragment layout changes so cached feeds are not reused
+FORMAT_VERSION = 2
+
+# Events have no end time; calendars show them with this length
+DEFAULT_DURATION = timedelta(hours=2)
+
+TIME_PATTERN = re.compile(r'^\d{2}:\d{2}(:\d{2})?$')
+
+# Characters a quoted parameter value cannot hold (DQUOTE and controls)
+PARAM_UNSAFE = re.compile(r'["\x00-\x08\x0a-\x1f\x7f]')
+
+
+def escape_text(value):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return (
+        str(value or '')
+        .replace('\\', '\\\\')
+        .replace(';', '\\;')
+        .replace(',', '\\,')
+        .replace('\r\n', '\\n')
+        .replace('\n', '\\n')
+    )
+
+
+def quote_param(value):
+    """Quote a parameter value (RFC 5545 section 3.1); it has no escaping, so DQUOTEs are dropped"""
+    return '"' + PARAM_UNSAFE.sub('', str(value or '')) + '"'
+
+
+def fold_line(line):
+    """Fold a content line to 75 octets, continuation lines start with a space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    limit = 75
+    while encoded:
+        cut = min(limit, len(encoded))
+        # Never split a multi-byte character
+        while cut < len(encoded) and (encoded[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = 74  # room for the leading space
+    return '\r\n '.join(parts)
+
+
+class ICalFeedBuilder:
+    """
+    Builds .ics feeds from per-event fragments cached by (event id, revision)
+
+    Calendar apps cannot send an Authorization header, so personal feeds are
+    addressed with a per-user token derived from the app secret instead.
+    """
+
+    def __init__(self, secret, domain, maxsize=4096):
+        self.domain = domain
+        self.cache = LRUCache(maxsize=maxsize)
+        self._token_key = hmac.new(secret.encode('utf-8'), b'calendar-feed-token', hashlib.sha256).digest()
+
+    def feed_token(self, user_id):
+        """Token for a user's personal feed URL"""
+        return hmac.new(self._token_key, str(user_id).encode('ascii'), hashlib.sha256).hexdigest()[:32]
+
+    def check_feed_token(self, token, user_id):
+        return hmac.compare_digest(str(token or ''), self.feed_token(user_id))
+
+    def etag(self, feed_name, revisions):
+        """Strong ETag for a feed made of these (event id, revision) pairs"""
+        digest = hashlib.sha1(f'{FORMAT_VERSION}|{feed_name}|'.encode('utf-8'))
+        for event_id, revision in revisions:
+            digest.update(f'{event_id}:{revision},'.encode('ascii'))
+        return digest.hexdigest()
+
+    def fragment(self, event):
+        """
+        VEVENT text for an event row (needs id, revision and the display fields)
+
+        Empty for an event whose date cannot be parsed, so one bad row leaves
+        that event out instead of failing the whole feed.
+        """
+        lines = [
+            'BEGIN:VEVENT',
+            f"UID:event-{event['id']}@{self.domain}",
+            f"DTSTAMP:{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}",
+        ]
+        time_str = (event['time'] or '').strip()
+        try:
+            if not TIME_PATTERN.match(time_str):
+                raise ValueError(time_str)
+            start = datetime.fromisoformat(f"{event['date']} {time_str}")
+        except ValueError:
+            # No usable time: an all-day event
+            try:
+                day = datetime.strptime(event['date'] or '', '%Y-%m-%d')
+            except ValueError:
+                print(f"⚠️ Event {event['id']} has an invalid date {event['date']!r}, left out of the feed")
+                return ''
+            lines.append(f"DTSTART;VALUE=DATE:{day.strftime('%Y%m%d')}")
+            lines.append(f"DTEND;VALUE=DATE:{(day + timedelta(days=1)).strftime('%Y%m%d')}")
+        else:
+            # Floating local time, as the event was entered
+            lines.append(f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}")
+            lines.append(f"DTEND:{(start + DEFAULT_DURATION).strftime('%Y%m%dT%H%M%S')}")
+        lines.append(f"SUMMARY:{escape_text(event['title'])}")
+        if event['description']:
+            lines.append(f"DESCRIPTION:{escape_text(event['description'])}")
+        location = event['location_address'] or event['venue']
+        if location:
+            lines.append(f"LOCATION:{escape_text(location)}")
+        if event['category']:
+            lines.append(f"CATEGORIES:{escape_text(event['category'])}")
+        if event['society']:
+            lines.append(f"ORGANIZER;CN={quote_param(event['society'])}:mailto:noreply@{self.domain}")
+        lines.append(f"SEQUENCE:{event['revision']}")
+        lines.append('END:VEVENT')
+        return '\r\n'.join(fold_line(line) for line in lines) + '\r\n'
+
+    def build(self, name, revisions, load):
+        """
+        Assemble a feed of the (event id, revision) pairs, in order
+
+        load(event_ids) must return the rows of events whose current
+        revision has no cached fragment yet; only those are serialized.
+        """
+        fragments = {}
+        missing = []
+        for event_id, revision in revisions:
+            fragment = self.cache.get((event_id, revision))
+            if fragment is None:
+                missing.append(event_id)
+            else:
+                fragments[event_id] = fragment
+        if missing:
+            for event in load(missing):
+                fragment = self.fragment(event)
+                self.cache.set((event['id'], event['revision']), fragment)
+                fragments[event['id']] = fragment
+
+        parts = [
+            'BEGIN:VCALENDAR\r\n',
+            'VERSION:2.0\r\n',
+            f'PRODID:-//{self.domain}//Events//EN\r\n',
+            'CALSCALE:GREGORIAN\r\n',
+            'METHOD:PUBLISH\r\n',
+            fold_line(f'X-WR-CALNAME:{escape_text(name)}') + '\r\n',
+        ]
+        parts.extend(fragments.get(event_id, '') for event_id, _ in revisions)
+        parts.append('END:VCALENDAR\r\n')
+        return ''.join(parts)
+
+    def stats(self):
+        return self.cache.stats()
@@ -0,0 +1,68 @@
+"""
+Bulk import of event requests into the AI assistant
+Reads exported form responses, runs the assistant over them in a process
+pool and stores them in short batches, printing results as they are stored.
+
+Input is either a CSV file with a `request` column (and optionally
+`user_email` or `email`) or a plain text file with one request per line.
+Prints one JSON result per request, then a summary line.
+
+Run from `backend/`:  python import_assistant_requests.py responses.csv [--workers 4]
+"""
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from backend.database import init_db
+    from backend.request_ingest import ingest_event_requests
+except ImportError:  # Fallback for running from `backend/` directly
+    from database import init_db
+    from request_ingest import ingest_event_requests
+
+
+def read_requests(path):
+    """Return (request_text, user_id, user_email) tuples from a file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith('.csv'):
+            reader = csv.DictReader(f)
+            return [
+                (
+                    row.get('request', ''),
+                    None,
+                    row.get('user_email') or row.get('email') or 'anonymous'
+                )
+                for row in reader
+            ]
+        return [(line, None, 'anonymous') for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import event requests in bulk')
+    parser.add_argument('path', help='CSV file or text file with one request per line')
+    parser.add_argument('--workers', type=int, default=4, help='assistant worker processes')
+    args = parser.parse_args()
+
+    items = read_requests(args.path)
+    if not items:
+        print('No requests found', file=sys.stderr)
+        sys.exit(1)
+
+    init_db()
+    inserted = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for result in ingest_event_requests(items, executor):
+            if 'id' in result:
+                inserted += 1
+            print(json.dumps(result), flush=True)
+    print(json.dumps({'summary': {
+        'received': len(items),
+        'inserted': inserted,
+        'failed': len(items) - inserted
+    }}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+Compiled multi-keyword matcher
+Finds every labelled keyword occurrence in a text; whole-word keywords are
+matched in a single regex pass
+"""
+import re
+
+
+def _is_word_char(char):
+    return char.isalnum() or char == '_'
+
+
+def _trie_pattern(keywords, prefixes=()):
+    """
+    Build a regex that matches the longest whole-word keyword, factored as a
+    trie; keywords in prefixes also match the start of a longer word
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = keyword in prefixes
+
+    def build(node):
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(node.items()) if char != ''
+        ]
+        if '' in node:
+            # Tried after the longer keywords, so they win over their prefixes
+            branches.append('' if node[''] else r'\b')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return r'\b' + build(trie)
+
+
+def _is_boundary(text, index):
+    """True if a regex \\b would match at index within text"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern matcher built once from a {label: [keywords]} mapping.
+
+    Without word_boundary keywords match anywhere, like `keyword in text`.
+    CPython's substring search beats a regex scan at these sizes, so each
+    keyword is simply searched for.
+
+    With word_boundary all keywords are compiled into a single trie-shaped
+    regex, so the regex engine decides on one character per position and
+    each hit is the longest keyword starting there. Keywords listed in
+    prefixes also match the start of a longer word ('tech' in 'technology').
+    Keywords hidden inside a hit (e.g. 'hack' inside 'hack day') are
+    recovered from a containment table built at construction time. Where a
+    keyword could start inside a hit and run past its end, the scan resumes
+    at the first such offset instead of the end of the hit, so overlapping
+    occurrences are still reported with their positions.
+    """
+
+    def __init__(self, keyword_map, word_boundary=False, prefixes=()):
+        self.word_boundary = word_boundary
+        self.prefixes = frozenset(keyword.lower() for keyword in prefixes)
+        self._labels_by_keyword = {}
+        for label, keywords in keyword_map.items():
+            for keyword in keywords:
+                keyword = keyword.lower()
+                labels = self._labels_by_keyword.setdefault(keyword, [])
+                if label not in labels:
+                    labels.append(label)
+
+        self._keywords = tuple(self._labels_by_keyword)
+        if not word_boundary:
+            return
+
+        ordered = sorted(self._labels_by_keyword, key=len, reverse=True)
+
+        # (offset, keyword) for every keyword occurring inside each keyword
+        self._contained = {}
+        for keyword in ordered:
+            contained = []
+            for other in ordered:
+                start = keyword.find(other)
+                while start != -1:
+                    end = start + len(other)
+                    # The hit's own edges already satisfy the boundaries
+                    if (
+                        (start == 0 or _is_boundary(keyword, start))
+                        and (
+                            end == len(keyword)
+                            or other in self.prefixes
+                            or _is_boundary(keyword, end)
+                        )
+                    ):
+                        contained.append((start, other))
+                    start = keyword.find(other, start + 1)
+            contained.sort()
+            self._contained[keyword] = contained
+
+        # Labels implied by each possible hit
+        self._hit_labels = {
+            keyword: frozenset(
+                label
+                for _, other in self._contained[keyword]
+                for label in self._labels_by_keyword[other]
+            )
+            for keyword in ordered
+        }
+
+        # Offset after a hit where the scan must resume: the first position
+        # inside the keyword where another keyword could start and run past
+        # its end, or its full length when no such overlap exists
+        self._resume = {}
+        for keyword in ordered:
+            self._resume[keyword] = next(
+                (
+                    i for i in range(1, len(keyword))
+                    if any(
+                        len(other) > len(keyword) - i and other.startswith(keyword[i:])
+                        for other in ordered
+                    )
+                ),
+                len(keyword),
+            )
+        self._overlapping = any(
+            self._resume[keyword] < len(keyword) for keyword in ordered
+        )
+
+        self._pattern = re.compile(_trie_pattern(ordered, self.prefixes))
+
+    def _hits(self, text):
+        """Yield (start, longest keyword) for each hit of the regex scan"""
+        search = self._pattern.search
+        resume = self._resume
+        match = search(text)
+        while match:
+            start = match.start()
+            longest = match.group()
+            yield start, longest
+            match = search(text, start + resume[longest])
+
+    def find_all(self, text):
+        """Return (start, keyword, label) for every match, ordered by position"""
+        if not text:
+            return []
+        if not self.word_boundary:
+            return self._find_substrings(text.lower())
+        matches = []
+        seen = set()
+        for start, longest in self._hits(text.lower()):
+            for offset, keyword in self._contained[longest]:
+                position = start + offset
+                if (position, keyword) in seen:
+                    continue
+                seen.add((position, keyword))
+                for label in self._labels_by_keyword[keyword]:
+                    matches.append((position, keyword, label))
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def _find_substrings(self, text):
+        matches = []
+        for keyword in self._keywords:
+            start = text.find(keyword)
+            while start != -1:
+                for label in self._labels_by_keyword[keyword]:
+                    matches.append((start, keyword, label))
+                start = text.find(keyword, start + 1)
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def _hit_set(self, text):
+        """Return the distinct longest-keyword hits in already lowered text"""
+        if not self._overlapping:
+            return set(self._pattern.findall(text))
+        hits = set()
+        search = self._pattern.search
+        resume = self._resume
+        match = search(text)
+        while match:
+            longest = match.group()
+            hits.add(longest)
+            match = search(text, match.start() + resume[longest])
+        return hits
+
+    def keywords(self, text):
+        """Return the set of distinct keywords occurring in the text"""
+        if not text:
+            return set()
+        if not self.word_boundary:
+            text = text.lower()
+            return {keyword for keyword in self._keywords if keyword in text}
+        found = set()
+        for longest in self._hit_set(text.lower()):
+            found.update(keyword for _, keyword in self._contained[longest])
+        return found
+
+    def labels(self, text):
+        """Return the set of labels with at least one keyword in the text"""
+        if not text:
+            return set()
+        if not self.word_boundary:
+            labels = set()
+            for keyword in self.keywords(text):
+                labels.update(self._labels_by_keyword[keyword])
+            return labels
+        labels = set()
+        for longest in self._hit_set(text.lower()):
+            labels |= self._hit_labels[longest]
+        return labels
+
+    def counts(self, text):
+        """Return {label: number of distinct keywords matched}"""
+        counts = {}
+        for keyword in self.keywords(text):
+            for label in self._labels_by_keyword[keyword]:
+                counts[label] = counts.get(label, 0) + 1
+        return counts
+
+    def search(self, text):
+        """Return True if any keyword occurs in the text"""
+        if not text:
+            return False
+        text = text.lower()
+        if not self.word_boundary:
+            return any(keyword in text for keyword in self._keywords)
+        return self._pattern.search(text) is not None
@@ -6,19 +6,75 @@ import re
 import json
 from collections import Counter
 
+try:
+    from backend.keyword_matcher import KeywordMatcher
+except ImportError:  # Fallback for running from `backend/` directly
+    from keyword_matcher import KeywordMatcher
+
+# Event category keywords
+CATEGORY_KEYWORDS = {
+    'technical': ['hackathon', 'coding', 'programming', 'tech', 'software', 'ai', 'ml', 'data science', 
+                 'cyber security', 'web development', 'app development', 'coding competition', 'tech talk'],
+    'cultural': ['music', 'dance', 'singing', 'drama', 'theater', 'art', 'painting', 'cultural', 'festival',
+               'cultural fest', 'music festival', 'dance competition', 'talent show', 'cultural event'],
+    'sports': ['sports', 'cricket', 'football', 'basketball', 'volleyball', 'badminton', 'tennis', 'athletics',
+              'tournament', 'sports meet', 'competition', 'match', 'game'],
+    'academic': ['seminar', 'workshop', 'lecture', 'conference', 'research', 'paper presentation', 'academic',
+                'guest lecture', 'symposium', 'panel discussion', 'academic event']
+}
+
+SENTIMENT_KEYWORDS = {
+    'positive': ['want', 'need', 'hope', 'wish', 'excited', 'looking forward', 'interested', 'love', 'like'],
+    'negative': ['disappointed', 'sad', 'frustrated', 'angry', 'hate', 'dislike']
+}
+
+# Keywords match whole words, so plurals and simple verb forms are generated
+# for the last word of each keyword ('hackathons', 'dancing', 'matches');
+# very short keywords like 'ai' get none
+def _inflections(keyword):
+    head, _, word = keyword.rpartition(' ')
+    if len(word) < 3:
+        return []
+    if word.endswith('e') and not word.endswith('ee'):
+        forms = [word + 's', word + 'd', word[:-1] + 'ing']
+    elif word.endswith('y') and word[-2] not in 'aeiou':
+        forms = [word[:-1] + 'ies', word[:-1] + 'ied', word + 'ing']
+    elif word.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        forms = [word + 'es', word + 'ed', word + 'ing']
+    else:
+        forms = [word + 's', word + 'ed', word + 'ing']
+    return [f'{head} {form}' if head else form for form in forms]
+
+
+# Stems that also match any word they begin ('tech' in 'technology',
+# 'techfest')
+STEM_KEYWORDS = {'tech'}
+
+
+def _build_classifier():
+    """One word-boundary matcher over every category and sentiment keyword"""
+    keyword_map = {}
+    for group in (CATEGORY_KEYWORDS, SENTIMENT_KEYWORDS):
+        for name, keywords in group.items():
+            for keyword in keywords:
+                # Label with the base keyword so each keyword counts once
+                if keyword in STEM_KEYWORDS:
+                    keyword_map[(name, keyword)] = [keyword]
+                else:
+                    keyword_map[(name, keyword)] = [keyword] + _inflections(keyword)
+    return KeywordMatcher(keyword_map, word_boundary=True, prefixes=STEM_KEYWORDS)
+
+
+REQUEST_CLASSIFIER = _build_classifier()
+
+# generate_response argument default: distinguishes "not extracted yet"
+# from an extraction that came back empty
+_UNSET = object()
+
 class EventRequestAssistant:
     def __init__(self):
         # Event category keywords
-        self.category_keywords = {
-            'technical': ['hackathon', 'coding', 'programming', 'tech', 'software', 'ai', 'ml', 'data science', 
-                         'cyber security', 'web development', 'app development', 'coding competition', 'tech talk'],
-            'cultural': ['music', 'dance', 'singing', 'drama', 'theater', 'art', 'painting', 'cultural', 'festival',
-                       'cultural fest', 'music festival', 'dance competition', 'talent show', 'cultural event'],
-            'sports': ['sports', 'cricket', 'football', 'basketball', 'volleyball', 'badminton', 'tennis', 'athletics',
-                      'tournament', 'sports meet', 'competition', 'match', 'game'],
-            'academic': ['seminar', 'workshop', 'lecture', 'conference', 'research', 'paper presentation', 'academic',
-                        'guest lecture', 'symposium', 'panel discussion', 'academic event']
-        }
+        self.category_keywords = CATEGORY_KEYWORDS
         
         # Response templates based on category
         self.response_templates = {
@@ -29,29 +85,28 @@ class EventRequestAssistant:
             'general': "Thank you for your event request! We've received your message about {event_type} and forwarded it to the relevant committee. Our event organizers will review your request and consider it for future planning. Stay tuned for updates!"
         }
     
-    def detect_category(self, text):
-        """Detect event category from request text using keyword matching"""
-        text_lower = text.lower()
-        category_scores = {}
-        
-        for category, keywords in self.category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                category_scores[category] = score
+    def _keyword_counts(self, text):
+        """Count distinct keywords per category/sentiment in one scan"""
+        counts = Counter()
+        for name, _ in REQUEST_CLASSIFIER.labels(text):
+            counts[name] += 1
+        return counts
+    
+    def _category_from_counts(self, counts):
+        category_scores = {
+            category: counts[category]
+            for category in self.category_keywords
+            if counts[category] > 0
+        }
         
         if category_scores:
             # Return category with highest score
             return max(category_scores, key=category_scores.get)
         return 'general'
     
-    def analyze_sentiment(self, text):
-        """Simple sentiment analysis"""
-        positive_words = ['want', 'need', 'hope', 'wish', 'excited', 'looking forward', 'interested', 'love', 'like']
-        negative_words = ['disappointed', 'sad', 'frustrated', 'angry', 'hate', 'dislike']
-        
-        text_lower = text.lower()
-        positive_count = sum(1 for word in positive_words if word in text_lower)
-        negative_count = sum(1 for word in negative_words if word in text_lower)
+    def _sentiment_from_counts(self, counts):
+        positive_count = counts['positive']
+        negative_count = counts['negative']
         
         if positive_count > negative_count:
             return 'positive'
@@ -59,6 +114,14 @@ class EventRequestAssistant:
             return 'negative'
         return 'neutral'
     
+    def detect_category(self, text):
+        """Detect event category from request text using keyword matching"""
+        return self._category_from_counts(self._keyword_counts(text))
+    
+    def analyze_sentiment(self, text):
+        """Simple sentiment analysis"""
+        return self._sentiment_from_counts(self._keyword_counts(text))
+    
     def extract_event_type(self, text):
         """Extract the type of event mentioned in the request"""
         # Look for patterns like "I want a [event]" or "looking for [event]"
@@ -113,12 +176,13 @@ class EventRequestAssistant:
         
         return None
     
-    def generate_response(self, request_text, category=None):
+    def generate_response(self, request_text, category=None, event_type=_UNSET):
         """Generate auto-response to student request"""
         if not category:
             category = self.detect_category(request_text)
         
-        event_type = self.extract_event_type(request_text)
+        if event_type is _UNSET:
+            event_type = self.extract_event_type(request_text)
         if not event_type or len(event_type) < 3:
             event_type = "this type of event"
         
@@ -132,10 +196,13 @@ class EventRequestAssistant:
     
     def process_request(self, request_text):
         """Process a student request and return analysis"""
-        category = self.detect_category(request_text)
-        sentiment = self.analyze_sentiment(request_text)
+        # Each feature is computed exactly once
+        counts = self._keyword_counts(request_text)
+        category = self._category_from_counts(counts)
+        sentiment = self._sentiment_from_counts(counts)
+        event_type = self.extract_event_type(request_text)
         society_name = self.extract_society_name(request_text)
-        auto_response = self.generate_response(request_text, category)
+        auto_response = self.generate_response(request_text, category, event_type)
         
         # If society name not found, ask for it in response
         if not society_name:
@@ -145,7 +212,7 @@ class EventRequestAssistant:
             'category': category,
             'sentiment': sentiment,
             'auto_response': auto_response,
-            'event_type_extracted': self.extract_event_type(request_text),
+            'event_type_extracted': event_type,
             'society_name': society_name
         }
 
@@ -0,0 +1,72 @@
+"""
+Bounded LRU memo for ML results
+Thread-safe so it can be shared by gunicorn gthread workers
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_key(*parts):
+    """Hash normalized input fields into a compact cache key"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Least-recently-used cache with optional per-entry expiry"""
+
+    def __init__(self, maxsize=1024, default_ttl=None):
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return a copy of the cached value, or None on a miss or expiry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(value)
+
+    def set(self, key, value, expires_at=None):
+        """Store a value; expires_at is an absolute epoch time"""
+        if expires_at is None and self.default_ttl is not None:
+            expires_at = time.time() + self.default_ttl
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -3,8 +3,187 @@ Event Description Enhancement using NLP
 Analyzes event descriptions and suggests improvements
 """
 import re
+from bisect import bisect_right
 from collections import Counter
 
+try:
+    from backend.keyword_matcher import KeywordMatcher
+    from backend.ml_cache import LRUCache, make_key
+except ImportError:  # Fallback for running from `backend/` directly
+    from keyword_matcher import KeywordMatcher
+    from ml_cache import LRUCache, make_key
+
+# Important elements to check
+IMPORTANT_ELEMENTS = {
+    'what': ['what', 'about', 'event', 'activity', 'workshop', 'seminar'],
+    'when': ['when', 'date', 'time', 'schedule', 'duration'],
+    'where': ['where', 'venue', 'location', 'place', 'address'],
+    'who': ['who', 'organizer', 'society', 'club', 'committee', 'speaker'],
+    'why': ['why', 'benefit', 'learn', 'gain', 'skill', 'opportunity']
+}
+
+ENGAGEMENT_WORDS = ['join', 'participate', 'learn', 'explore', 'discover', 'experience', 'connect', 'network']
+
+# One matcher for every keyword the analysis looks for. Keywords are single
+# words, so every occurrence lies inside one whitespace-delimited token and
+# only the distinct tokens of a description need to be matched.
+DESCRIPTION_MATCHER = KeywordMatcher({
+    **IMPORTANT_ELEMENTS,
+    'engagement': ENGAGEMENT_WORDS,
+    'register': ['register'],
+    'registration': ['registration']
+})
+
+# A non-empty sentence: runs from its first non-space character to the
+# next terminator, matching the pieces of re.split(r'[.!?]+') that strip()
+# to something
+SENTENCE_PIECE = re.compile(r'[^.!?\s][^.!?]*')
+SENTENCE_END = re.compile(r'[.!?]')
+
+# Longest prefix of the description the enhanced suggestion can include
+ENHANCED_MAX_LENGTH = 500
+
+# Labels found in each token seen so far, shared by every analysis
+_token_labels = {}
+_TOKEN_CACHE_SIZE = 50000
+_NO_LABELS = frozenset()
+
+
+def _labels_for_tokens(tokens):
+    """Union of keyword labels over tokens, matching only unseen tokens"""
+    labels = set()
+    unknown = []
+    for token in tokens:
+        cached = _token_labels.get(token)
+        if cached is None:
+            unknown.append(token)
+        elif cached:
+            labels |= cached
+    if not unknown:
+        return labels
+
+    if len(_token_labels) + len(unknown) > _TOKEN_CACHE_SIZE:
+        _token_labels.clear()
+
+    starts = []
+    offset = 0
+    for token in unknown:
+        starts.append(offset)
+        offset += len(token) + 1
+    found = [None] * len(unknown)
+    for position, _, label in DESCRIPTION_MATCHER.find_all(' '.join(unknown)):
+        index = bisect_right(starts, position) - 1
+        if found[index] is None:
+            found[index] = set()
+        found[index].add(label)
+    for token, token_found in zip(unknown, found):
+        token_found = frozenset(token_found) if token_found else _NO_LABELS
+        _token_labels[token] = token_found
+        labels |= token_found
+    return labels
+
+
+class DescriptionScanner:
+    """
+    Single-pass tokenizer that collects everything the analysis needs:
+    keyword labels, sentence count, length stats and the head of the text
+    used for the enhanced suggestion.
+    
+    Text can be fed in chunks, so long descriptions are never held in
+    memory more than one chunk at a time.
+    """
+    
+    def __init__(self):
+        self.length = 0
+        self.labels = set()
+        self.sentence_count = 0
+        self._sentence_open = False  # current sentence already counted
+        self._partial_token = ''  # token cut off at the end of the last chunk
+        self._seen_tokens = set()
+        self._leading_space = 0
+        self._trailing_space = 0
+        self._has_content = False
+        self._head = []
+        self._head_length = 0
+        self._overflow_has_content = False
+    
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.length += len(chunk)
+        
+        # Tokens, holding back a token that may continue in the next chunk
+        text = self._partial_token + chunk.lower()
+        tokens = text.split()
+        if tokens and not text[-1].isspace():
+            self._partial_token = tokens.pop()
+        else:
+            self._partial_token = ''
+        self._add_tokens(tokens)
+        
+        # Sentences, counted where they start
+        count = len(SENTENCE_PIECE.findall(chunk))
+        first_end = SENTENCE_END.search(chunk)
+        head = chunk[:first_end.start()] if first_end else chunk
+        if self._sentence_open and head and not head.isspace():
+            count -= 1  # continues the sentence from the previous chunk
+        self.sentence_count += count
+        last_end = max(chunk.rfind('.'), chunk.rfind('!'), chunk.rfind('?'))
+        tail = chunk[last_end + 1:]
+        if last_end == -1:
+            self._sentence_open = self._sentence_open or bool(tail) and not tail.isspace()
+        else:
+            self._sentence_open = bool(tail) and not tail.isspace()
+        
+        # Length stats for the stripped description
+        if not self._has_content:
+            stripped = chunk.lstrip()
+            self._leading_space += len(chunk) - len(stripped)
+            if not stripped:
+                return
+            self._has_content = True
+            chunk = stripped
+        trailing = len(chunk) - len(chunk.rstrip())
+        if trailing == len(chunk):
+            self._trailing_space += trailing
+        else:
+            self._trailing_space = trailing
+        
+        # Head of the left-stripped text
+        room = ENHANCED_MAX_LENGTH - self._head_length
+        if room > 0:
+            self._head.append(chunk[:room])
+            self._head_length += len(chunk[:room])
+            chunk = chunk[room:]
+        if chunk and not self._overflow_has_content:
+            self._overflow_has_content = not chunk.isspace()
+    
+    def _add_tokens(self, tokens):
+        new_tokens = set(tokens) - self._seen_tokens
+        if new_tokens:
+            self._seen_tokens |= new_tokens
+            self.labels |= _labels_for_tokens(new_tokens)
+    
+    def finish(self):
+        if self._partial_token:
+            self._add_tokens([self._partial_token])
+            self._partial_token = ''
+        return self
+    
+    @property
+    def stripped_length(self):
+        """Length of the description with surrounding whitespace removed"""
+        if not self._has_content:
+            return 0
+        return self.length - self._leading_space - self._trailing_space
+    
+    @property
+    def stripped_head(self):
+        """The first ENHANCED_MAX_LENGTH characters of the stripped text"""
+        head = ''.join(self._head)
+        return head if self._overflow_has_content else head.rstrip()
+
+
 class DescriptionEnhancer:
     def __init__(self):
         # Quality indicators
@@ -13,17 +192,38 @@ class DescriptionEnhancer:
         self.max_length = 500  # Maximum before it's too long
         
         # Important elements to check
-        self.important_elements = {
-            'what': ['what', 'about', 'event', 'activity', 'workshop', 'seminar'],
-            'when': ['when', 'date', 'time', 'schedule', 'duration'],
-            'where': ['where', 'venue', 'location', 'place', 'address'],
-            'who': ['who', 'organizer', 'society', 'club', 'committee', 'speaker'],
-            'why': ['why', 'benefit', 'learn', 'gain', 'skill', 'opportunity']
-        }
+        self.important_elements = IMPORTANT_ELEMENTS
+        
+        # Memo for repeated analyses (e.g. a draft re-posted on every keystroke);
+        # the analysis only depends on its inputs, so entries never go stale
+        self.cache = LRUCache(maxsize=2048)
     
     def analyze_description(self, description, title=None, category=None, date=None, venue=None):
         """Analyze description quality and provide suggestions"""
-        if not description:
+        key = make_key(description, title, category, date, venue)
+        analysis = self.cache.get(key)
+        if analysis is None:
+            scanner = DescriptionScanner()
+            scanner.feed(description or '')
+            analysis = self._analyze(scanner.finish(), title, category, date, venue)
+            self.cache.set(key, analysis)
+        return analysis
+    
+    def analyze_description_stream(self, chunks, title=None, category=None, date=None, venue=None):
+        """
+        Analyze a description supplied as an iterable of text chunks
+        
+        Meant for descriptions many kilobytes long: each chunk is scanned
+        once and dropped. Results are not memoized.
+        """
+        scanner = DescriptionScanner()
+        for chunk in chunks:
+            scanner.feed(chunk)
+        return self._analyze(scanner.finish(), title, category, date, venue)
+    
+    def _analyze(self, scan, title, category, date, venue):
+        """Score a scanned description"""
+        if not scan.length:
             return {
                 'score': 0,
                 'grade': 'F',
@@ -32,14 +232,13 @@ class DescriptionEnhancer:
                 'enhanced_description': None
             }
         
-        desc_lower = description.lower()
         score = 100
         suggestions = []
         missing_elements = []
         strengths = []
         
         # Check length
-        length = len(description)
+        length = scan.length
         if length < self.min_length:
             score -= 30
             suggestions.append(f"Description is too short ({length} chars). Aim for at least {self.min_length} characters to provide enough information.")
@@ -53,12 +252,8 @@ class DescriptionEnhancer:
             strengths.append(f"Good description length ({length} characters)")
         
         # Check for important elements
-        found_elements = {}
-        for element, keywords in self.important_elements.items():
-            found = any(keyword in desc_lower for keyword in keywords)
-            found_elements[element] = found
-            
-            if not found:
+        for element in self.important_elements:
+            if element not in scan.labels:
                 missing_elements.append(element)
                 if element == 'what':
                     score -= 20
@@ -81,22 +276,19 @@ class DescriptionEnhancer:
                 strengths.append(f"Good: Includes {element} information")
         
         # Check for engagement words
-        engagement_words = ['join', 'participate', 'learn', 'explore', 'discover', 'experience', 'connect', 'network']
-        has_engagement = any(word in desc_lower for word in engagement_words)
-        if not has_engagement:
+        if 'engagement' not in scan.labels:
             score -= 5
             suggestions.append("Add engaging action words (e.g., 'join', 'learn', 'explore') to encourage participation")
         else:
             strengths.append("Includes engaging language")
         
         # Check for contact/registration info
-        if 'register' not in desc_lower and 'registration' not in desc_lower:
+        if 'register' not in scan.labels and 'registration' not in scan.labels:
             score -= 5
             suggestions.append("Mention how to register or get more information")
         
         # Check readability (sentence count)
-        sentences = re.split(r'[.!?]+', description)
-        sentence_count = len([s for s in sentences if s.strip()])
+        sentence_count = scan.sentence_count
         if sentence_count < 2:
             score -= 10
             suggestions.append("Break description into multiple sentences for better readability")
@@ -117,7 +309,7 @@ class DescriptionEnhancer:
             grade = 'F'
         
         # Generate enhanced description suggestion
-        enhanced = self._generate_enhanced_description(description, title, category, date, venue, missing_elements)
+        enhanced = self._generate_enhanced_description(scan, title, category, date, venue, missing_elements)
         
         return {
             'score': max(0, min(100, score)),
@@ -130,16 +322,13 @@ class DescriptionEnhancer:
             'sentence_count': sentence_count
         }
     
-    def _generate_enhanced_description(self, current_desc, title, category, date, venue, missing_elements):
+    def _generate_enhanced_description(self, scan, title, category, date, venue, missing_elements):
         """Generate an enhanced description suggestion"""
-        if not current_desc:
-            current_desc = ""
-        
         enhanced_parts = []
         
         # Start with current description if it exists
-        if current_desc:
-            enhanced_parts.append(current_desc.strip())
+        if scan.length:
+            enhanced_parts.append(scan.stripped_head)
         
         # Add missing elements
         additions = []
@@ -160,17 +349,21 @@ class DescriptionEnhancer:
             enhanced_parts.append(" ".join(additions))
         
         # Add call to action if missing
-        if 'register' not in current_desc.lower():
+        if 'register' not in scan.labels:
             enhanced_parts.append("Register now to secure your spot!")
         
         enhanced = " ".join(enhanced_parts)
         
+        # Length of the full suggestion, counting the whole stripped description
+        enhanced_length = len(enhanced)
+        if scan.length:
+            enhanced_length += scan.stripped_length - len(enhanced_parts[0])
+        
         # Only return if it's meaningfully different
-        if len(enhanced) > len(current_desc) * 1.2 or missing_elements:
-            return enhanced[:500]  # Limit length
+        if enhanced_length > scan.length * 1.2 or missing_elements:
+            return enhanced[:ENHANCED_MAX_LENGTH]  # Limit length
         
         return None
 
 # Initialize enhancer
 description_enhancer = DescriptionEnhancer()
-
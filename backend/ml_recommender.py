@@ -3,6 +3,7 @@ ML Event Recommendation System
 Uses collaborative filtering and content-based filtering to recommend events
 """
 import sqlite3
+from datetime import datetime
 from collections import defaultdict
 import math
 
@@ -75,13 +76,14 @@ class EventRecommender:
         
         user_categories = [req[0] for req in user_requests]
         
-        # Get all upcoming events
+        # Get all upcoming events (from the start of today)
+        today = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
         events = c.execute('''
-            SELECT id, title, description, category, date, time, venue, poster_url, society
+            SELECT id, title, description, category, date, time, venue, poster_url, society, starts_ts
             FROM events 
-            WHERE date >= date('now')
-            ORDER BY date ASC
-        ''').fetchall()
+            WHERE starts_ts >= ?
+            ORDER BY starts_ts ASC
+        ''', (int(today),)).fetchall()
         
         conn.close()
         
@@ -91,7 +93,7 @@ class EventRecommender:
         # Score events based on user preferences
         scored_events = []
         for event in events:
-            event_id, title, desc, category, date, time, venue, poster, society = event
+            event_id, title, desc, category, date, time, venue, poster, society, starts_ts = event
             
             score = 0.0
             
@@ -104,16 +106,11 @@ class EventRecommender:
             score += category_count * 0.5
             
             # Recency bonus (events happening soon get higher score)
-            from datetime import datetime
-            try:
-                event_date = datetime.strptime(date, '%Y-%m-%d')
-                days_away = (event_date - datetime.now()).days
-                if days_away <= 7:
-                    score += 1.0  # Events within a week
-                elif days_away <= 30:
-                    score += 0.5  # Events within a month
-            except:
-                pass
+            days_away = (starts_ts - today) // 86400
+            if days_away <= 7:
+                score += 1.0  # Events within a week
+            elif days_away <= 30:
+                score += 0.5  # Events within a month
             
             scored_events.append({
                 'id': event_id,
@@ -135,6 +132,10 @@ class EventRecommender:
     
     def predict_popularity(self, event_data):
         """Predict how popular an event will be based on features"""
+        return self.predict_popularity_batch([event_data])[0]
+    
+    def predict_popularity_batch(self, events):
+        """Predict popularity for many events in a single pass"""
         # Features: category, day of week, time, description length, society
         category_weights = {
             'technical': 0.9,
@@ -144,40 +145,48 @@ class EventRecommender:
             'general': 0.6
         }
         
-        base_score = category_weights.get(event_data.get('category', 'general'), 0.6)
-        
-        # Day of week bonus (weekends are more popular)
         from datetime import datetime
-        try:
-            event_date = datetime.strptime(event_data.get('date', ''), '%Y-%m-%d')
-            day_of_week = event_date.weekday()  # 0=Monday, 6=Sunday
-            if day_of_week >= 5:  # Saturday or Sunday
+        weekend_memo = {}
+        
+        results = []
+        for event_data in events:
+            base_score = category_weights.get(event_data.get('category', 'general'), 0.6)
+            
+            # Day of week bonus (weekends are more popular)
+            date_str = event_data.get('date', '')
+            if date_str not in weekend_memo:
+                try:
+                    event_date = datetime.strptime(date_str, '%Y-%m-%d')
+                    weekend_memo[date_str] = event_date.weekday() >= 5  # Saturday or Sunday
+                except:
+                    weekend_memo[date_str] = False
+            if weekend_memo[date_str]:
                 base_score += 0.1
-        except:
-            pass
-        
-        # Description length bonus (detailed descriptions attract more)
-        desc_length = len(event_data.get('description', ''))
-        if desc_length > 200:
-            base_score += 0.05
-        elif desc_length > 100:
-            base_score += 0.03
-        
-        # Society bonus (known societies get more interest)
-        if event_data.get('society'):
-            base_score += 0.05
-        
-        # Normalize to 0-100 scale
-        popularity_score = min(base_score * 100, 100)
-        
-        # Predict registration count (rough estimate)
-        predicted_registrations = int(popularity_score * 2)  # Scale factor
-        
-        return {
-            'popularity_score': round(popularity_score, 1),
-            'predicted_registrations': predicted_registrations,
-            'confidence': 'high' if popularity_score > 70 else 'medium' if popularity_score > 50 else 'low'
-        }
+            
+            # Description length bonus (detailed descriptions attract more)
+            desc_length = len(event_data.get('description', ''))
+            if desc_length > 200:
+                base_score += 0.05
+            elif desc_length > 100:
+                base_score += 0.03
+            
+            # Society bonus (known societies get more interest)
+            if event_data.get('society'):
+                base_score += 0.05
+            
+            # Normalize to 0-100 scale
+            popularity_score = min(base_score * 100, 100)
+            
+            # Predict registration count (rough estimate)
+            predicted_registrations = int(popularity_score * 2)  # Scale factor
+            
+            results.append({
+                'popularity_score': round(popularity_score, 1),
+                'predicted_registrations': predicted_registrations,
+                'confidence': 'high' if popularity_score > 70 else 'medium' if popularity_score > 50 else 'low'
+            })
+        
+        return results
     
     def get_trending_categories(self, days=30):
         """Analyze trending event categories"""
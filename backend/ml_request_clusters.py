@@ -0,0 +1,141 @@
+"""
+Near-duplicate clustering for event requests
+MinHash signatures over request words, grouped with LSH bands so that a new
+request is only compared against requests sharing at least one band
+"""
+import hashlib
+import re
+import struct
+
+# Words that carry no meaning about the requested event
+STOPWORDS = {
+    'a', 'an', 'the', 'i', 'we', 'you', 'me', 'us', 'my', 'our', 'to', 'of',
+    'for', 'and', 'or', 'in', 'on', 'at', 'is', 'are', 'be', 'it', 'this',
+    'that', 'please', 'can', 'could', 'would', 'should', 'will', 'some',
+    'any', 'have', 'has', 'do', 'there', 'with', 'so', 'pls', 'plz'
+}
+
+WORD_PATTERN = re.compile(r'\w+')
+
+# Mersenne prime modulus for the (a * x + b) permutations
+_PRIME = (1 << 61) - 1
+
+
+class RequestClusterer:
+    """
+    Assigns each request to the cluster of its most similar earlier request
+
+    With 64 permutations in 16 bands of 4 rows, requests whose word sets have
+    a Jaccard similarity around 0.5 or more become candidates; candidates are
+    then confirmed against the estimated similarity.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.5):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+
+        # Fixed seeds so signatures stay comparable across processes
+        self._perms = []
+        for i in range(num_perm):
+            digest = hashlib.sha256(f'minhash-{i}'.encode('utf-8')).digest()
+            a, b = struct.unpack('<QQ', digest[:16])
+            self._perms.append((a % (_PRIME - 1) + 1, b % _PRIME))
+        self._format = f'<{num_perm}Q'
+
+    def _words(self, text):
+        words = WORD_PATTERN.findall((text or '').lower())
+        content = {word for word in words if word not in STOPWORDS}
+        # Requests made only of stopwords still compare on what they say
+        return content or set(words)
+
+    def signature(self, text):
+        """MinHash signature of the request's word set, or None if it has no words"""
+        words = self._words(text)
+        if not words:
+            return None
+        hashes = [
+            int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=8).digest(), 'little')
+            for word in words
+        ]
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    def band_keys(self, signature):
+        """LSH bucket keys, one per band"""
+        if signature is None:
+            return []
+        keys = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            digest = hashlib.blake2b(repr(rows).encode('ascii'), digest_size=8).hexdigest()
+            keys.append(f'{band}:{digest}')
+        return keys
+
+    def similarity(self, sig_a, sig_b):
+        """Estimated Jaccard similarity of two signatures"""
+        if sig_a is None or sig_b is None:
+            return 0.0
+        same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+        return same / self.num_perm
+
+    def encode(self, signature):
+        """Pack a signature for storage in a BLOB column"""
+        if signature is None:
+            return None
+        return struct.pack(self._format, *signature)
+
+    def decode(self, blob):
+        if not blob:
+            return None
+        return struct.unpack(self._format, blob)
+
+    def assign(self, requests, candidates, indexed_counts=None, max_indexed=None):
+        """
+        Cluster new requests
+
+        requests: list of (request_id, signature) in insertion order
+        candidates: dict of bucket key -> list of (request_id, cluster_id, signature)
+            for stored requests sharing a bucket with any new request; new
+            requests are added to it as they are clustered
+        indexed_counts: {cluster_id: members already in the LSH buckets};
+            with max_indexed set, a new request only joins the buckets while
+            its cluster has fewer indexed members than that, so the candidates
+            of a large cluster stay a handful of representatives
+
+        Returns ({request_id: cluster_id}, [ids of requests to index]). A
+        request with no similar earlier request starts its own cluster,
+        identified by its own id.
+        """
+        if indexed_counts is None:
+            indexed_counts = {}
+        assignments = {}
+        indexed = []
+        for request_id, signature in requests:
+            keys = self.band_keys(signature)
+            best_cluster = request_id
+            best_similarity = 0.0
+            seen = set()
+            for key in keys:
+                for other_id, cluster_id, other_signature in candidates.get(key, ()):
+                    if other_id in seen:
+                        continue
+                    seen.add(other_id)
+                    similarity = self.similarity(signature, other_signature)
+                    if similarity >= self.threshold and similarity > best_similarity:
+                        best_cluster = cluster_id
+                        best_similarity = similarity
+            assignments[request_id] = best_cluster
+            if max_indexed is not None and indexed_counts.get(best_cluster, 0) >= max_indexed:
+                continue
+            indexed_counts[best_cluster] = indexed_counts.get(best_cluster, 0) + 1
+            indexed.append(request_id)
+            for key in keys:
+                candidates.setdefault(key, []).append((request_id, best_cluster, signature))
+        return assignments, indexed
+
+# Initialize clusterer
+request_clusterer = RequestClusterer()
@@ -112,27 +112,32 @@ class SemanticSearch:
         
         return dot_product / (magnitude1 * magnitude2)
     
-    def search(self, query, limit=10, category=None, date_filter=None):
-        """Search events semantically"""
+    def search(self, query, limit=10, category=None, date_filter=None, include_archived=False):
+        """Search events semantically (past events in events_archive only if asked)"""
         conn = sqlite3.connect(self.db_name)
         conn.row_factory = sqlite3.Row
         c = conn.cursor()
         
         # Build query
-        sql_query = "SELECT id, title, description, category, date, time, venue, poster_url, society, registration_url FROM events WHERE 1=1"
+        filters = ""
         params = []
         
         if category:
-            sql_query += " AND category = ?"
+            filters += " AND category = ?"
             params.append(category)
         
         if date_filter:
-            sql_query += " AND date >= ?"
+            filters += " AND date >= ?"
             params.append(date_filter)
         
+        tables = ['events', 'events_archive'] if include_archived else ['events']
+        sql_query = " UNION ALL ".join(
+            f"SELECT id, title, description, category, date, time, venue, poster_url, society, registration_url FROM {table} WHERE 1=1{filters}"
+            for table in tables
+        )
         sql_query += " ORDER BY date ASC"
         
-        events = c.execute(sql_query, params).fetchall()
+        events = c.execute(sql_query, params * len(tables)).fetchall()
         conn.close()
         
         # Convert to dicts
@@ -2,9 +2,35 @@
 Event Success Score Predictor
 Predicts overall event success before it happens
 """
-from datetime import datetime
+from datetime import datetime, timedelta
 import math
 
+try:
+    from backend.ml_cache import LRUCache, make_key
+except ImportError:  # Fallback for running from `backend/` directly
+    from ml_cache import LRUCache, make_key
+
+# Event type keywords, in detection priority order
+EVENT_TYPE_KEYWORDS = {
+    'hackathon': ['hackathon', 'hack', 'coding competition'],
+    'workshop': ['workshop', 'hands-on', 'practical'],
+    'seminar': ['seminar', 'talk', 'presentation'],
+    'competition': ['competition', 'contest', 'tournament'],
+    'festival': ['festival', 'fest', 'celebration'],
+    'conference': ['conference', 'summit', 'convention'],
+    'lecture': ['lecture', 'guest lecture', 'keynote'],
+    'meetup': ['meetup', 'networking', 'social']
+}
+
+# Known popular societies/clubs get higher scores
+POPULAR_SOCIETIES = [
+    'coding', 'tech', 'technical', 'cs', 'computer',
+    'cultural', 'dance', 'music', 'drama',
+    'sports', 'cricket', 'football'
+]
+
+GOOD_VENUES = ['auditorium', 'hall', 'stadium', 'ground', 'center', 'centre']
+
 class SuccessPredictor:
     def __init__(self):
         # Feature weights (learned from patterns)
@@ -37,6 +63,9 @@ class SuccessPredictor:
             'lecture': 0.70,
             'meetup': 0.75
         }
+        
+        # Memo for repeated predictions (e.g. a draft re-posted on every keystroke)
+        self.cache = LRUCache(maxsize=2048, default_ttl=3600)
     
     def predict_success(self, event_data, description_analysis=None):
         """
@@ -46,40 +75,135 @@ class SuccessPredictor:
             event_data: Dict with event details
             description_analysis: Optional description quality analysis
         """
-        scores = {}
+        return self.predict_success_batch([event_data], [description_analysis])[0]
+    
+    def predict_success_batch(self, events, description_analyses=None):
+        """
+        Predict success scores for many events in a single pass
         
-        # 1. Category Popularity Score
-        category = event_data.get('category', 'general').lower()
-        scores['category'] = self.category_scores.get(category, 0.65)
+        Each feature is extracted column-wise across the whole batch, and
+        repeated inputs (same date/time, society, venue, ...) are scored once.
+        Predictions are memoized per event until the timing score can change.
         
-        # 2. Timing Score
-        scores['timing'] = self._calculate_timing_score(
+        Args:
+            events: List of event dicts
+            description_analyses: Optional list of description analyses,
+                aligned with events (entries may be None)
+        """
+        if description_analyses is None:
+            description_analyses = [None] * len(events)
+        
+        results = [None] * len(events)
+        keys = [self._memo_key(e, a) for e, a in zip(events, description_analyses)]
+        for i, key in enumerate(keys):
+            results[i] = self.cache.get(key)
+        
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            computed = self._score_batch(
+                [events[i] for i in misses],
+                [description_analyses[i] for i in misses]
+            )
+            for i, result in zip(misses, computed):
+                self.cache.set(keys[i], result, self._memo_expiry(events[i].get('date')))
+                results[i] = result
+        
+        return results
+    
+    def _memo_key(self, event_data, description_analysis):
+        """Hash only the fields the prediction depends on"""
+        return make_key(
+            (event_data.get('category') or 'general').lower(),
             event_data.get('date'),
-            event_data.get('time')
+            event_data.get('time'),
+            description_analysis.get('score', 50) if description_analysis else None,
+            event_data.get('description', ''),
+            event_data.get('title', ''),
+            event_data.get('society', ''),
+            event_data.get('venue', '')
         )
+    
+    def _memo_expiry(self, date_str):
+        """
+        The timing score depends on how many days away the event is, which
+        only changes at local midnight, so memoized predictions expire then.
+        Returns None (cache default TTL) when the date does not parse.
+        """
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return None
+        tomorrow = datetime.now().date() + timedelta(days=1)
+        return datetime.combine(tomorrow, datetime.min.time()).timestamp()
+    
+    def _score_batch(self, events, description_analyses):
+        """Extract every feature column-wise and build the predictions"""
+        
+        # 1. Category Popularity Score
+        categories = [(e.get('category') or 'general').lower() for e in events]
+        category_col = [self.category_scores.get(c, 0.65) for c in categories]
+        
+        # 2. Timing Score
+        timing_memo = {}
+        timing_col = []
+        for e in events:
+            key = (e.get('date'), e.get('time'))
+            if key not in timing_memo:
+                timing_memo[key] = self._calculate_timing_score(*key)
+            timing_col.append(timing_memo[key])
         
         # 3. Description Quality Score
-        if description_analysis:
-            scores['description'] = description_analysis.get('score', 50) / 100.0
-        else:
-            desc = event_data.get('description', '')
-            scores['description'] = min(len(desc) / 200.0, 1.0) if desc else 0.3
+        description_col = []
+        for e, analysis in zip(events, description_analyses):
+            if analysis:
+                description_col.append(analysis.get('score', 50) / 100.0)
+            else:
+                desc = e.get('description', '')
+                description_col.append(min(len(desc) / 200.0, 1.0) if desc else 0.3)
         
         # 4. Organizer Reputation Score
-        society = event_data.get('society', '')
-        scores['organizer'] = self._calculate_organizer_score(society)
+        organizer_memo = {}
+        organizer_col = []
+        for e in events:
+            society = e.get('society', '')
+            if society not in organizer_memo:
+                organizer_memo[society] = self._calculate_organizer_score(society)
+            organizer_col.append(organizer_memo[society])
         
         # 5. Venue Quality Score
-        venue = event_data.get('venue', '')
-        scores['venue'] = self._calculate_venue_score(venue)
+        venue_memo = {}
+        venue_col = []
+        for e in events:
+            venue = e.get('venue', '')
+            if venue not in venue_memo:
+                venue_memo[venue] = self._calculate_venue_score(venue)
+            venue_col.append(venue_memo[venue])
         
         # 6. Event Type Score
-        event_type = self._detect_event_type(
-            event_data.get('title', ''),
-            event_data.get('description', '')
-        )
-        scores['event_type'] = self.event_type_scores.get(event_type, 0.75)
+        event_type_col = [
+            self.event_type_scores.get(
+                self._detect_event_type(e.get('title', ''), e.get('description', '')),
+                0.75
+            )
+            for e in events
+        ]
         
+        results = []
+        for i, category in enumerate(categories):
+            scores = {
+                'category': category_col[i],
+                'timing': timing_col[i],
+                'description': description_col[i],
+                'organizer': organizer_col[i],
+                'venue': venue_col[i],
+                'event_type': event_type_col[i]
+            }
+            results.append(self._build_prediction(scores, category))
+        
+        return results
+    
+    def _build_prediction(self, scores, category):
+        """Combine component scores into the prediction payload"""
         # Calculate weighted success score
         success_score = (
             scores['category'] * self.weights['category_popularity'] +
@@ -181,15 +305,7 @@ class SuccessPredictor:
             return 0.6
         
         society_lower = society.lower()
-        
-        # Known popular societies/clubs get higher scores
-        popular_societies = [
-            'coding', 'tech', 'technical', 'cs', 'computer',
-            'cultural', 'dance', 'music', 'drama',
-            'sports', 'cricket', 'football'
-        ]
-        
-        for popular in popular_societies:
+        for popular in POPULAR_SOCIETIES:
             if popular in society_lower:
                 return 0.8
         
@@ -204,12 +320,11 @@ class SuccessPredictor:
         if not venue:
             return 0.5
         
-        venue_lower = venue.lower()
-        
         # Good venues
-        good_venues = ['auditorium', 'hall', 'stadium', 'ground', 'center', 'centre']
-        if any(gv in venue_lower for gv in good_venues):
-            return 0.8
+        venue_lower = venue.lower()
+        for good_venue in GOOD_VENUES:
+            if good_venue in venue_lower:
+                return 0.8
         
         # If venue specified, give base score
         if len(venue) > 5:
@@ -221,20 +336,10 @@ class SuccessPredictor:
         """Detect event type from title and description"""
         text = f"{title} {description}".lower()
         
-        type_keywords = {
-            'hackathon': ['hackathon', 'hack', 'coding competition'],
-            'workshop': ['workshop', 'hands-on', 'practical'],
-            'seminar': ['seminar', 'talk', 'presentation'],
-            'competition': ['competition', 'contest', 'tournament'],
-            'festival': ['festival', 'fest', 'celebration'],
-            'conference': ['conference', 'summit', 'convention'],
-            'lecture': ['lecture', 'guest lecture', 'keynote'],
-            'meetup': ['meetup', 'networking', 'social']
-        }
-        
-        for event_type, keywords in type_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                return event_type
+        for event_type, keywords in EVENT_TYPE_KEYWORDS.items():
+            for keyword in keywords:
+                if keyword in text:
+                    return event_type
         
         return 'general'
     
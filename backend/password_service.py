@@ -0,0 +1,158 @@
+"""
+Password hashing service
+Runs bcrypt in a small process pool so request threads only wait on it, and
+turns work away once the pool's backlog is full instead of queueing forever
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+
+class PasswordServiceBusy(Exception):
+    """The pool is saturated or did not answer in time; retry later"""
+
+
+def _hash(password):
+    start = time.perf_counter()
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    return hashed, time.perf_counter() - start
+
+
+def _verify(password, password_hash):
+    start = time.perf_counter()
+    valid = bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    return valid, time.perf_counter() - start
+
+
+class PasswordService:
+    """
+    Bounded bcrypt pool
+
+    At most max_workers + max_backlog operations are in flight; anything past
+    that raises PasswordServiceBusy straight away. With max_workers=0 bcrypt
+    runs inline in the calling thread (no pool, no limit).
+    """
+
+    OPERATIONS = ('hash', 'verify')
+
+    def __init__(self, max_workers=2, max_backlog=16, timeout=5.0):
+        self.max_workers = max_workers
+        self.max_backlog = max_backlog
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(max_workers, 1) + max_backlog)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._in_flight = 0
+        self._stats = {
+            op: {'count': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0,
+                 'total_ms': 0.0, 'max_ms': 0.0, 'bcrypt_ms': 0.0}
+            for op in self.OPERATIONS
+        }
+
+    def hash(self, password):
+        return self._run('hash', _hash, password)
+
+    def verify(self, password, password_hash):
+        return self._run('verify', _verify, password, password_hash)
+
+    def _pool(self):
+        # Created lazily (and again after a fork) so each gunicorn worker
+        # gets its own pool rather than one inherited from the master
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _reset_pool(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, op, fn, *args):
+        if self.max_workers <= 0:
+            start = time.perf_counter()
+            result, bcrypt_seconds = fn(*args)
+            self._record(op, time.perf_counter() - start, bcrypt_seconds)
+            return result
+
+        if not self._slots.acquire(blocking=False):
+            self._record_failure(op, 'rejected')
+            raise PasswordServiceBusy('Password service is busy')
+        with self._lock:
+            self._in_flight += 1
+        start = time.perf_counter()
+        executor = None
+        try:
+            executor = self._pool()
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is held until the worker is done with the job, even if
+        # the caller has given up waiting on it
+        future.add_done_callback(self._release)
+        try:
+            result, bcrypt_seconds = future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()
+            self._record_failure(op, 'timeouts')
+            raise PasswordServiceBusy('Password service timed out')
+        except BrokenProcessPool:
+            self._record_failure(op, 'errors')
+            self._reset_pool(executor)
+            raise PasswordServiceBusy('Password service restarting')
+        self._record(op, time.perf_counter() - start, bcrypt_seconds)
+        return result
+
+    def _release(self, future=None):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def _record(self, op, seconds, bcrypt_seconds):
+        elapsed_ms = seconds * 1000
+        with self._lock:
+            stats = self._stats[op]
+            stats['count'] += 1
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['bcrypt_ms'] += bcrypt_seconds * 1000
+
+    def _record_failure(self, op, kind):
+        with self._lock:
+            self._stats[op][kind] += 1
+
+    def stats(self):
+        """Pool occupancy plus per-operation timing (wall time includes queueing)"""
+        with self._lock:
+            operations = {}
+            for op, stats in self._stats.items():
+                count = stats['count']
+                operations[op] = {
+                    'count': count,
+                    'rejected': stats['rejected'],
+                    'timeouts': stats['timeouts'],
+                    'errors': stats['errors'],
+                    'avg_ms': round(stats['total_ms'] / count, 3) if count else 0.0,
+                    'max_ms': round(stats['max_ms'], 3),
+                    'avg_bcrypt_ms': round(stats['bcrypt_ms'] / count, 3) if count else 0.0
+                }
+            return {
+                'max_workers': self.max_workers,
+                'max_backlog': self.max_backlog,
+                'in_flight': self._in_flight,
+                'operations': operations
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=wait)
@@ -0,0 +1,146 @@
+"""
+Token-bucket rate limiting
+Buckets live in process memory by default; SQLiteBucketStore keeps them in a
+small shared database file so every gunicorn worker on the host sees the
+same buckets
+"""
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def _wait_seconds(tokens, rate):
+    """Seconds until a bucket holding `tokens` has a whole token"""
+    return max(0.0, (1 - tokens) / rate)
+
+
+class MemoryBucketStore:
+    """Buckets for this process only, the least recently used evicted first"""
+
+    name = 'memory'
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, keys, capacity, rate, now):
+        """
+        Spend one token from every key's bucket, or from none of them
+
+        Returns 0 if the tokens were spent, else the seconds until every
+        bucket has a token again.
+        """
+        with self._lock:
+            levels = []
+            for key in keys:
+                tokens, updated_at = self._buckets.get(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated_at) * rate))
+            retry_after = max(_wait_seconds(tokens, rate) for tokens in levels)
+            for key, tokens in zip(keys, levels):
+                self._buckets[key] = (tokens if retry_after else tokens - 1, now)
+                self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def size(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """Buckets shared by every process that opens the same database file"""
+
+    name = 'sqlite'
+
+    def __init__(self, path, idle_seconds=3600):
+        self.path = path
+        self.idle_seconds = idle_seconds
+        self._local = threading.local()
+        self._last_cleanup = 0.0
+        conn = self._connect()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''CREATE TABLE IF NOT EXISTS rate_buckets
+                        (key TEXT PRIMARY KEY,
+                         tokens REAL NOT NULL,
+                         updated_at REAL NOT NULL) WITHOUT ROWID''')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def take(self, keys, capacity, rate, now):
+        conn = self._connect()
+        # Read and spend under the write lock so concurrent workers cannot
+        # both spend the same token
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            stored = dict(conn.execute(
+                f'''SELECT key, MIN(?, tokens + (? - updated_at) * ?) FROM rate_buckets
+                    WHERE key IN ({', '.join('?' * len(keys))})''',
+                (capacity, now, rate, *keys)
+            ).fetchall())
+            levels = [stored.get(key, capacity) for key in keys]
+            retry_after = max(_wait_seconds(tokens, rate) for tokens in levels)
+            if not retry_after:
+                conn.executemany(
+                    '''INSERT INTO rate_buckets (key, tokens, updated_at) VALUES (?, ?, ?)
+                       ON CONFLICT (key) DO UPDATE
+                       SET tokens = excluded.tokens, updated_at = excluded.updated_at''',
+                    [(key, tokens - 1, now) for key, tokens in zip(keys, levels)]
+                )
+            if now - self._last_cleanup > self.idle_seconds:
+                self._last_cleanup = now
+                conn.execute('DELETE FROM rate_buckets WHERE updated_at < ?', (now - self.idle_seconds,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return retry_after
+
+    def size(self):
+        return self._connect().execute('SELECT COUNT(*) FROM rate_buckets').fetchone()[0]
+
+
+class RateLimiter:
+    """
+    Named limits of `capacity` requests per `period` seconds
+
+    Each limit is checked against one bucket per key (e.g. the client IP and
+    the user); a request goes through only if every bucket has a token, and
+    a request turned away spends none of them.
+    """
+
+    def __init__(self, store, limits):
+        self.store = store
+        self.limits = dict(limits)
+        self._lock = threading.Lock()
+        self._metrics = {name: {'allowed': 0, 'limited': 0} for name in self.limits}
+
+    def hit(self, name, keys):
+        """Spend a token from each key's bucket; returns seconds to wait, or 0 if allowed"""
+        capacity, period = self.limits[name]
+        retry_after = self.store.take(
+            [f'{name}:{key}' for key in keys], capacity, capacity / period, time.time()
+        )
+        with self._lock:
+            self._metrics[name]['limited' if retry_after else 'allowed'] += 1
+        return math.ceil(retry_after) if retry_after else 0
+
+    def stats(self):
+        with self._lock:
+            limits = {
+                name: {
+                    'capacity': self.limits[name][0],
+                    'period': self.limits[name][1],
+                    **metrics
+                }
+                for name, metrics in self._metrics.items()
+            }
+        return {'store': self.store.name, 'buckets': self.store.size(), 'limits': limits}
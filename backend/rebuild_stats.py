@@ -0,0 +1,30 @@
+"""
+Rebuild the materialized stats counters from the base tables
+Run this if the counters behind /api/stats or /api/assistant/stats ever
+drift (e.g. after editing the database by hand with triggers disabled)
+
+Run from `backend/`:  python rebuild_stats.py
+"""
+try:
+    from backend.database import get_db, init_db, rebuild_stats_counters
+except ImportError:  # Fallback for running from `backend/` directly
+    from database import get_db, init_db, rebuild_stats_counters
+
+
+def rebuild_stats():
+    init_db()
+    conn = get_db()
+    try:
+        rebuild_stats_counters(conn)
+        rows = conn.execute(
+            "SELECT scope, name, count FROM stats_counters ORDER BY scope, name"
+        ).fetchall()
+        print("✅ Stats counters rebuilt")
+        for row in rows:
+            print(f"  {row['scope']:<18} {row['name'] or '(none)':<20} {row['count']}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    rebuild_stats()
@@ -0,0 +1,353 @@
+"""
+Write-behind buffer for event registrations
+Acknowledges registrations from memory, journals them to disk and writes
+them to SQLite in batched transactions from a background thread
+"""
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: journals are replayed without ownership checks
+    fcntl = None
+
+# Acknowledged registrations are written as they are; only rows for events
+# deleted in the meantime are left out
+INSERT_REGISTRATION = """INSERT INTO registrations (event_id, user_id, user_email)
+                         SELECT ?, ?, ? FROM events WHERE id = ?
+                         ON CONFLICT (event_id, user_id) DO NOTHING"""
+
+
+class EventFullError(Exception):
+    """Raised when an event has no seats left"""
+
+
+class EventHasCapacity(Exception):
+    """Raised by add() for an event with a capacity; register it directly"""
+
+
+class _Segment:
+    """An open journal file with counts of the lines written and known durable"""
+
+    def __init__(self, path):
+        self.file = open(path, 'a', encoding='utf-8')
+        self.written = 0
+        self.synced = 0
+
+
+def write_registrations(conn, rows):
+    """Insert (event_id, user_id, user_email) rows; returns how many were new"""
+    cursor = conn.executemany(
+        INSERT_REGISTRATION,
+        [(event_id, user_id, user_email, event_id) for event_id, user_id, user_email in rows]
+    )
+    return cursor.rowcount
+
+
+class RegistrationBuffer:
+    """
+    De-duplicated in-memory registration queue with a durable journal
+
+    Every accepted registration is appended to this process's journal segment
+    and fsynced before it is acknowledged. fsyncs are group commits: one
+    caller at a time syncs the segment, covering every line written so far,
+    and the callers that queued up behind it are released together. The
+    flusher thread swaps in a fresh segment, inserts the batch in one
+    transaction and deletes the old segment once the batch is committed.
+    Segments left behind by a crashed process are replayed by the next
+    process that starts.
+
+    Only events without a capacity are buffered, so an acknowledged
+    registration is never turned away when it is written. Capacity changes
+    go through capacity_change(), which stores the buffered rows first and
+    holds off add() until the new limit is committed. A limit set from
+    another process does not wait for this one's buffer, so rows it had
+    already acknowledged are still written.
+    """
+
+    def __init__(self, connect, journal_dir, flush_interval=0.005, fsync=True):
+        self.connect = connect
+        self.journal_dir = journal_dir
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        os.makedirs(journal_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._capacity_lock = threading.Lock()
+        self._sync_cond = threading.Condition()
+        self._syncing = False
+        self._pending = []
+        self._pending_keys = set()
+        self._pending_per_event = {}
+        # Bumped whenever flushed keys leave _pending_keys
+        self._flush_generation = 0
+        self._segment = None
+        self._segment_seq = 0
+        self._retained_segments = []
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.acknowledged = 0
+        self.duplicates = 0
+        self.flushed = 0
+        self.skipped = 0
+        self.flushes = 0
+        self.fsyncs = 0
+        self.flush_errors = 0
+        self.replayed = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def start(self):
+        """Replay orphaned journals, then start the background flusher"""
+        self.replay()
+        with self._lock:
+            self._open_segment()
+        self._thread = threading.Thread(
+            target=self._run, name='registration-flusher', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Flush what is left and stop the flusher"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            if not self._pending and self._segment is not None:
+                self._remove_segment(self._segment)
+                self._segment = None
+
+    def add(self, conn, event_id, user_id, user_email):
+        """
+        Accept a registration
+
+        Returns the event's registration count including still-buffered
+        registrations, or None if the user is already registered. Raises
+        EventHasCapacity if the event has a capacity, since its seats must be
+        checked in the same transaction as the insert.
+        """
+        key = (event_id, user_id)
+        while True:
+            with self._lock:
+                if key in self._pending_keys:
+                    self.duplicates += 1
+                    return None
+                generation = self._flush_generation
+            existing = conn.execute(
+                'SELECT 1 FROM registrations WHERE event_id = ? AND user_id = ?', key
+            ).fetchone()
+            if existing:
+                with self._lock:
+                    self.duplicates += 1
+                return None
+            # No capacity can be set between this read and the row being
+            # queued, so the event is still unlimited when the row is written
+            with self._capacity_lock:
+                event = conn.execute(
+                    'SELECT registration_count, capacity FROM events WHERE id = ?', (event_id,)
+                ).fetchone()
+                stored, capacity = event if event else (0, None)
+                if capacity is not None:
+                    raise EventHasCapacity('Event has a capacity')
+
+                with self._lock:
+                    if key in self._pending_keys:
+                        self.duplicates += 1
+                        return None
+                    if generation != self._flush_generation:
+                        # A flush committed while we read the table; it may have
+                        # written this very registration, so look again
+                        continue
+                    buffered = self._pending_per_event.get(event_id, 0)
+                    segment = self._segment
+                    segment.file.write(json.dumps([event_id, user_id, user_email]) + '\n')
+                    segment.written += 1
+                    line_number = segment.written
+                    if not self.fsync:
+                        segment.file.flush()
+                    self._pending.append((event_id, user_id, user_email))
+                    self._pending_keys.add(key)
+                    self._pending_per_event[event_id] = self._pending_per_event.get(event_id, 0) + 1
+                    self.acknowledged += 1
+            break
+
+        if self.fsync:
+            self._sync(segment, line_number)
+        return stored + buffered + 1
+
+    @contextmanager
+    def capacity_change(self):
+        """
+        Context for changing an event's capacity
+
+        Stores the buffered registrations first so the new limit counts them,
+        and keeps add() from queueing more until the block has committed.
+        """
+        with self._capacity_lock:
+            self.flush()
+            with self._lock:
+                if self._pending:
+                    raise RuntimeError('Buffered registrations could not be stored')
+            yield
+
+    def flush(self):
+        """Write buffered registrations in one transaction"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = []
+                segment = self._segment
+                self._open_segment()
+
+            # Callers still waiting on lines of the old segment are released
+            # by this sync, and it must be done before the file is removed
+            if self.fsync:
+                self._sync(segment, segment.written)
+
+            start = time.perf_counter()
+            try:
+                conn = self.connect()
+                try:
+                    written = write_registrations(conn, batch)
+                    conn.commit()
+                finally:
+                    conn.close()
+            except Exception as e:
+                print(f"⚠️ Registration flush failed, will retry: {e}")
+                with self._lock:
+                    self.flush_errors += 1
+                    self._pending = batch + self._pending
+                    self._retained_segments.append(segment)
+                return 0
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            with self._lock:
+                for event_id, user_id, _ in batch:
+                    self._pending_keys.discard((event_id, user_id))
+                    remaining = self._pending_per_event[event_id] - 1
+                    if remaining:
+                        self._pending_per_event[event_id] = remaining
+                    else:
+                        del self._pending_per_event[event_id]
+                self._flush_generation += 1
+                segments = self._retained_segments + [segment]
+                self._retained_segments = []
+                self.flushed += written
+                self.skipped += len(batch) - written
+                self.flushes += 1
+                self.last_flush_ms = elapsed_ms
+                self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            for old_segment in segments:
+                self._remove_segment(old_segment)
+            if written < len(batch):
+                print(f"⚠️ {len(batch) - written} buffered registrations were not stored "
+                      f"(event deleted or already registered)")
+            return len(batch)
+
+    def _sync(self, segment, line_number):
+        """Return once the segment is fsynced through line_number (group commit)"""
+        with self._sync_cond:
+            while segment.synced < line_number:
+                if not self._syncing:
+                    self._syncing = True
+                    break
+                self._sync_cond.wait()
+            else:
+                return
+        try:
+            with self._lock:
+                target = segment.written
+                segment.file.flush()
+            os.fsync(segment.file.fileno())
+        except BaseException:
+            with self._sync_cond:
+                self._syncing = False
+                self._sync_cond.notify_all()
+            raise
+        with self._sync_cond:
+            self._syncing = False
+            segment.synced = max(segment.synced, target)
+            self.fsyncs += 1
+            self._sync_cond.notify_all()
+
+    def replay(self):
+        """Insert registrations from journals no live process owns"""
+        rows = []
+        replayed_files = []
+        for path in sorted(glob.glob(os.path.join(self.journal_dir, '*.journal'))):
+            handle = open(path, 'r+', encoding='utf-8')
+            if fcntl is not None:
+                try:
+                    fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except OSError:
+                    handle.close()  # still being written by a running process
+                    continue
+            for line in handle:
+                try:
+                    event_id, user_id, user_email = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from a crash mid-write
+                rows.append((event_id, user_id, user_email))
+            replayed_files.append((path, handle))
+
+        if rows:
+            conn = self.connect()
+            try:
+                write_registrations(conn, rows)
+                conn.commit()
+            finally:
+                conn.close()
+            self.replayed += len(rows)
+            print(f"✅ Replayed {len(rows)} journaled registrations")
+        for path, handle in replayed_files:
+            os.remove(path)
+            handle.close()
+        return len(rows)
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        path = os.path.join(
+            self.journal_dir, f'registrations-{os.getpid()}-{self._segment_seq}.journal'
+        )
+        self._segment = _Segment(path)
+        if fcntl is not None:
+            fcntl.flock(self._segment.file, fcntl.LOCK_EX)
+
+    def _remove_segment(self, segment):
+        try:
+            os.remove(segment.file.name)
+        except OSError:
+            pass
+        segment.file.close()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'queue_depth': len(self._pending),
+                'acknowledged': self.acknowledged,
+                'duplicates': self.duplicates,
+                'flushed': self.flushed,
+                'skipped': self.skipped,
+                'flushes': self.flushes,
+                'fsyncs': self.fsyncs,
+                'flush_errors': self.flush_errors,
+                'replayed': self.replayed,
+                'last_flush_ms': round(self.last_flush_ms, 3),
+                'max_flush_ms': round(self.max_flush_ms, 3),
+                'avg_flush_ms': round(self._total_flush_ms / self.flushes, 3) if self.flushes else 0.0
+            }
@@ -0,0 +1,173 @@
+"""
+Bulk ingestion of event requests into the AI assistant
+Analyzes requests and stores them a batch at a time, yielding each result as
+soon as its batch is committed so callers can stream progress
+"""
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from backend.database import assign_request_clusters, get_db
+    from backend.ml_assistant import assistant
+except ImportError:  # Fallback for running from `backend/` directly
+    from database import assign_request_clusters, get_db
+    from ml_assistant import assistant
+
+# Requests stored per write transaction
+INGEST_BATCH_SIZE = 25
+
+
+def analyze_request(request_text):
+    """Assistant analysis of one request, or None if it is empty (picklable for process pools)"""
+    return assistant.process_request(request_text) if request_text else None
+
+
+class IngestPool:
+    """
+    Bounded process pool for bulk request analysis
+
+    The assistant is CPU-bound, so bulk imports analyze their requests on
+    max_workers processes instead of the request thread. At most max_imports
+    imports share the pool at once; acquire() returns False past that. With
+    max_workers=0 the analysis runs inline and only the import limit applies.
+    """
+
+    def __init__(self, max_workers=2, max_imports=2):
+        self.max_workers = max_workers
+        self.max_imports = max_imports
+        self._slots = threading.BoundedSemaphore(max_imports)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+        self._in_flight = 0
+        self.imports = 0
+        self.rejected = 0
+        self.errors = 0
+
+    def acquire(self):
+        """Claim an import slot; False if max_imports are already running"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self._in_flight += 1
+            self.imports += 1
+        return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def executor(self):
+        """The process pool to pass to ingest_event_requests, or None to run inline"""
+        if self.max_workers <= 0:
+            return None
+        # Created lazily (and again after a fork) so each gunicorn worker
+        # gets its own pool rather than one inherited from the master
+        with self._lock:
+            if self._executor is None or self._executor_pid != os.getpid():
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def reset(self, executor):
+        """Drop a broken pool so the next import starts a fresh one"""
+        with self._lock:
+            self.errors += 1
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'max_imports': self.max_imports,
+                'in_flight': self._in_flight,
+                'imports': self.imports,
+                'rejected': self.rejected,
+                'errors': self.errors
+            }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None and self._executor_pid == os.getpid():
+            executor.shutdown(wait=wait)
+
+
+def _store_batch(batch):
+    """Insert one batch of analyzed requests and return their results in order"""
+    valid = [item for item in batch if item[4] is not None]
+    ids = {}
+    clusters = {}
+    if valid:
+        conn = get_db()
+        try:
+            c = conn.cursor()
+            for index, request_text, user_id, user_email, analysis in valid:
+                c.execute(
+                    '''INSERT INTO event_requests
+                       (user_id, user_email, request_text, category_detected, sentiment, auto_response, status, society_name)
+                       VALUES (?, ?, ?, ?, ?, ?, 'pending', ?)
+                       RETURNING id''',
+                    (user_id, user_email, request_text, analysis['category'],
+                     analysis['sentiment'], analysis['auto_response'], analysis.get('society_name'))
+                )
+                ids[index] = c.fetchone()[0]
+            clusters = assign_request_clusters(
+                c, [(ids[item[0]], item[1]) for item in valid]
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    results = []
+    for index, request_text, _, _, analysis in batch:
+        if analysis is None:
+            results.append({'index': index, 'error': 'Request text is required'})
+            continue
+        results.append({
+            'index': index,
+            'id': ids[index],
+            'cluster_id': clusters[ids[index]],
+            'request': request_text,
+            'category': analysis['category'],
+            'sentiment': analysis['sentiment'],
+            'auto_response': analysis['auto_response'],
+            'society_name': analysis.get('society_name')
+        })
+    return results
+
+
+def ingest_event_requests(items, executor=None, batch_size=INGEST_BATCH_SIZE):
+    """
+    Analyze and store many assistant requests, yielding one result per item
+
+    items are (request_text, user_id, user_email) tuples. The assistant runs
+    on executor when given (a process pool: the analysis is CPU-bound) and
+    inline otherwise. Results come out in input order; each batch is its own
+    short transaction, so a failure leaves earlier batches stored.
+    """
+    texts = [(request_text or '').strip() for request_text, _, _ in items]
+    if executor is None:
+        analyses = map(analyze_request, texts)
+    else:
+        analyses = executor.map(analyze_request, texts, chunksize=8)
+
+    batch = []
+    for index, ((_, user_id, user_email), request_text, analysis) in enumerate(
+        zip(items, texts, analyses)
+    ):
+        batch.append((index, request_text, user_id, user_email, analysis))
+        if len(batch) >= batch_size:
+            yield from _store_batch(batch)
+            batch = []
+    if batch:
+        yield from _store_batch(batch)
@@ -0,0 +1,130 @@
+"""
+Concurrency stress test for event registration
+Signs up a batch of students, creates one event and has every student click
+"register" several times in parallel, then checks that each student got
+exactly one successful registration and that the event's count matches.
+With --capacity the event is capped and the check becomes: exactly
+`capacity` students registered, the rest waitlisted, never overbooked.
+
+Start the backend first (e.g. `python app.py` or gunicorn) with
+RATE_LIMIT_ENABLED=false, since every signup comes from the same address,
+then run from `backend/`:  python stress_registrations.py [--url http://localhost:5000]
+"""
+import argparse
+import json
+import sys
+import time
+import uuid
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+FACULTY_SECRET_KEY = 'faculty-secret-2024'
+
+
+def call(base_url, method, path, body=None, token=None):
+    """Send a JSON request; returns (status, parsed body)"""
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header('Content-Type', 'application/json')
+    if token:
+        req.add_header('Authorization', f'Bearer {token}')
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+
+def signup(base_url, email, role='student', secret_key=None):
+    body = {'email': email, 'password': 'stress-test', 'name': 'Stress Test', 'role': role}
+    if secret_key:
+        body['secret_key'] = secret_key
+    status, result = call(base_url, 'POST', '/api/auth/register', body)
+    if status != 201:
+        sys.exit(f'Signup failed for {email}: {status} {result}')
+    return result['token']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fire parallel registrations at one event')
+    parser.add_argument('--url', default='http://localhost:5000', help='backend base URL')
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--clicks', type=int, default=4, help='register attempts per student')
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--capacity', type=int, default=None, help='cap the event at this many seats')
+    parser.add_argument('--faculty-secret', default=FACULTY_SECRET_KEY)
+    args = parser.parse_args()
+    base_url = args.url.rstrip('/')
+
+    run_id = uuid.uuid4().hex[:8]
+    organizer = signup(base_url, f'stress-organizer-{run_id}@kiit.ac.in', 'faculty', args.faculty_secret)
+    status, event = call(base_url, 'POST', '/api/events', {
+        'title': f'Stress Test {run_id}',
+        'description': 'Registration stress test event',
+        'category': 'technical',
+        'date': '2099-01-01',
+        'time': '10:00',
+        'venue': 'Stress Test Hall',
+        'society': 'Stress Test',
+        'capacity': args.capacity
+    }, organizer)
+    if status != 201:
+        sys.exit(f'Event creation failed: {status} {event}')
+    event_id = event['id']
+
+    print(f'Signing up {args.students} students...')
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        tokens = list(pool.map(
+            lambda i: signup(base_url, f'stress-{run_id}-{i}@kiit.ac.in'),
+            range(args.students)
+        ))
+
+    attempts = [(i, token) for i, token in enumerate(tokens) for _ in range(args.clicks)]
+    print(f'Firing {len(attempts)} registrations at event {event_id} on {args.threads} threads...')
+
+    def register(attempt):
+        student, token = attempt
+        status, _ = call(base_url, 'POST', f'/api/events/{event_id}/register', {}, token)
+        return student, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(register, attempts))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for _, status in results)
+    successes = Counter(student for student, status in results if status == 201)
+    _, count = call(base_url, 'GET', f'/api/events/{event_id}/registrations')
+
+    print(f'Done in {elapsed:.2f}s ({len(results) / elapsed:.0f} requests/s)')
+    print(f'Status codes: {dict(statuses)}')
+    print(f'Registration count: {count["count"]}')
+
+    expected = args.students if args.capacity is None else min(args.students, args.capacity)
+    waitlisted = {student for student, status in results if status == 202}
+
+    failures = []
+    if count['count'] != expected:
+        failures.append(f'expected count {expected}, got {count["count"]}')
+    doubled = [student for student, n in successes.items() if n > 1]
+    if doubled:
+        failures.append(f'{len(doubled)} students registered more than once')
+    if len(successes) != expected:
+        failures.append(f'{len(successes)} students registered, expected {expected}')
+    missing = args.students - len(successes) - len(waitlisted - set(successes))
+    if missing:
+        failures.append(f'{missing} students neither registered nor waitlisted')
+    unexpected = set(statuses) - {201, 202, 400}
+    if unexpected:
+        failures.append(f'unexpected status codes: {sorted(unexpected)}')
+
+    if failures:
+        print('❌ ' + '; '.join(failures))
+        sys.exit(1)
+    print('✅ Exactly one registration per student')
+
+
+if __name__ == "__main__":
+    main()
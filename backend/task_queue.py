@@ -0,0 +1,66 @@
+"""
+Bounded background work queue
+Runs fire-and-forget jobs on a thread pool without letting the backlog grow
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BoundedExecutor:
+    """Thread pool that rejects new work once its backlog is full"""
+
+    def __init__(self, max_workers=2, max_backlog=100, name='worker'):
+        self.max_workers = max_workers
+        self.max_backlog = max_backlog
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        # One slot per running job plus one per queued job
+        self._slots = threading.BoundedSemaphore(max_workers + max_backlog)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, fn, *args, **kwargs):
+        """Schedule fn(*args, **kwargs); returns a Future, or None if full"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            return None
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._pending += 1
+            self.submitted += 1
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+            if future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+        self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': self._pending,
+                'max_workers': self.max_workers,
+                'max_backlog': self.max_backlog,
+                'submitted': self.submitted,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,64 @@
+"""
+Tests for the iCalendar feed builder
+Run with: python -m unittest test_ical_feed (from backend/)
+"""
+import unittest
+
+try:
+    from backend.ical_feed import ICalFeedBuilder
+except ImportError:  # Fallback for running from `backend/` directly
+    from ical_feed import ICalFeedBuilder
+
+
+def make_event(event_id, date, time='10:00'):
+    return {
+        'id': event_id,
+        'revision': 1,
+        'title': f'Event {event_id}',
+        'description': '',
+        'date': date,
+        'time': time,
+        'venue': 'Hall',
+        'location_address': None,
+        'category': 'technical',
+        'society': None,
+    }
+
+
+class MalformedDateTest(unittest.TestCase):
+    def setUp(self):
+        self.builder = ICalFeedBuilder('secret', 'example.com')
+
+    def build(self, events):
+        rows = {event['id']: event for event in events}
+        revisions = [(event['id'], event['revision']) for event in events]
+        return self.builder.build(
+            'Events', revisions, lambda ids: [rows[event_id] for event_id in ids]
+        )
+
+    def test_malformed_date_is_left_out_of_the_feed(self):
+        feed = self.build([
+            make_event(1, '2030-01-01'),
+            make_event(2, 'next friday', time=''),
+            make_event(3, 'next friday'),
+            make_event(4, None),
+        ])
+        self.assertEqual(feed.count('BEGIN:VEVENT'), 1)
+        self.assertIn('UID:event-1@example.com', feed)
+        self.assertIn('DTSTART:20300101T100000', feed)
+        self.assertTrue(feed.endswith('END:VCALENDAR\r\n'))
+
+    def test_malformed_date_fragment_is_cached(self):
+        event = make_event(5, '2030-13-45', time='')
+        self.assertEqual(self.builder.fragment(event), '')
+        self.build([event])
+        self.assertEqual(self.builder.cache.get((5, 1)), '')
+
+    def test_date_without_time_is_all_day(self):
+        fragment = self.builder.fragment(make_event(6, '2030-01-01', time='TBA'))
+        self.assertIn('DTSTART;VALUE=DATE:20300101', fragment)
+        self.assertIn('DTEND;VALUE=DATE:20300102', fragment)
+
+
+if __name__ == '__main__':
+    unittest.main()
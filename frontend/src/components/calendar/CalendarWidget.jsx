@@ -1,8 +1,9 @@
-import { useState } from 'react'
+import { useState, useEffect } from 'react'
 import { ChevronLeft, ChevronRight } from 'lucide-react'
-import { format, startOfMonth, endOfMonth, eachDayOfInterval, isSameMonth, isSameDay, getDay } from 'date-fns'
+import { format, startOfMonth, endOfMonth, addMonths, eachDayOfInterval, isSameMonth, isSameDay, getDay } from 'date-fns'
 import { motion } from 'framer-motion'
 import Card from '../ui/Card'
+import { getEventsInRange } from '../../services/api'
 
 const CalendarWidget = ({ events, onDateClick }) => {
   const [currentDate, setCurrentDate] = useState(new Date())
@@ -11,8 +12,22 @@ const CalendarWidget = ({ events, onDateClick }) => {
   const monthEnd = endOfMonth(currentDate)
   const daysInMonth = eachDayOfInterval({ start: monthStart, end: monthEnd })
 
-  // Get dates that have events
-  const eventDates = events.map(event => event.date)
+  // Events of the displayed month, fetched by date range; falls back to
+  // the events passed in if the range query fails
+  const [monthEvents, setMonthEvents] = useState(null)
+
+  useEffect(() => {
+    let cancelled = false
+    getEventsInRange(format(monthStart, 'yyyy-MM-dd'), format(addMonths(monthStart, 1), 'yyyy-MM-dd'))
+      .then(data => { if (!cancelled) setMonthEvents(data.events) })
+      .catch(() => { if (!cancelled) setMonthEvents(null) })
+    return () => { cancelled = true }
+  }, [monthStart.getTime()])
+
+  // Get dates that have events; the range query includes expired events,
+  // which the event lists do not show
+  const eventDates = (monthEvents ? monthEvents.filter(event => !event.is_expired) : events)
+    .map(event => event.date)
 
   // Get first day of month (0 = Sunday, 1 = Monday, etc.)
   const firstDayOfWeek = getDay(monthStart)
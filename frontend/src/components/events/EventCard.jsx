@@ -48,6 +48,10 @@ const EventCard = ({ event, index = 0, onRegister }) => {
     setRegistering(true)
     try {
       const response = await registerEvent(event.id)
+      if (response.waitlisted) {
+        alert(`${response.message} (position ${response.position})`)
+        return
+      }
       setIsRegistered(true)
       setShowCongrats(true)
       if (onRegister) {
@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { MessageSquare, CheckCircle, Clock, TrendingUp, Filter, Send, Loader2, Shield, AlertCircle, X, Plus, Ban } from 'lucide-react'
 import { useAuth } from '../context/AuthContext'
-import { getEventRequests, respondToRequest, getAssistantStats } from '../services/assistant'
+import { getEventRequests, getEventRequest, respondToRequest, getAssistantStats } from '../services/assistant'
 import { getBannedWords, addBannedWord, removeBannedWord } from '../services/api'
 import Card from '../components/ui/Card'
 import Button from '../components/ui/Button'
@@ -16,6 +16,8 @@ const AdminDashboard = () => {
   const { user, isAuthenticated } = useAuth()
   const allowedRoles = ['faculty', 'ksac_member', 'society_president', 'admin']
   const [requests, setRequests] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const [stats, setStats] = useState(null)
   const [loading, setLoading] = useState(true)
   const [filter, setFilter] = useState('all')
@@ -49,7 +51,8 @@ const AdminDashboard = () => {
         getAssistantStats(),
         getBannedWords().catch(() => []) // Don't fail if not admin
       ])
-      setRequests(requestsData)
+      setRequests(requestsData.requests)
+      setNextCursor(requestsData.next_cursor)
       setStats(statsData)
       setBannedWords(bannedWordsData)
     } catch (error) {
@@ -59,6 +62,31 @@ const AdminDashboard = () => {
     }
   }
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true)
+    try {
+      const requestsData = await getEventRequests(filter, nextCursor)
+      setRequests((current) => [...current, ...requestsData.requests])
+      setNextCursor(requestsData.next_cursor)
+    } catch (error) {
+      console.error('Error loading more requests:', error)
+    } finally {
+      setLoadingMore(false)
+    }
+  }
+
+  // The list leaves out the response texts; they are fetched for the
+  // request that is opened
+  const handleSelectRequest = async (req) => {
+    setSelectedRequest(req)
+    try {
+      const fullRequest = await getEventRequest(req.id)
+      setSelectedRequest((current) => (current?.id === req.id ? { ...req, ...fullRequest } : current))
+    } catch (error) {
+      console.error('Error fetching request:', error)
+    }
+  }
+
   const handleAddBannedWord = async () => {
     if (!newWord.trim()) {
       alert('Please enter a word to ban')
@@ -398,7 +426,7 @@ const AdminDashboard = () => {
                   className={`cursor-pointer transition-all ${
                     selectedRequest?.id === req.id ? 'ring-2 ring-purple-500' : ''
                   }`}
-                  onClick={() => setSelectedRequest(req)}
+                  onClick={() => handleSelectRequest(req)}
                 >
                   <div className="flex items-start justify-between mb-3">
                     <div className="flex-1">
@@ -421,17 +449,17 @@ const AdminDashboard = () => {
                     </span>
                   </div>
 
-                  {req.auto_response && (
+                  {selectedRequest?.id === req.id && selectedRequest.auto_response && (
                     <div className="p-3 bg-blue-50 rounded-lg mb-3">
                       <p className="text-xs font-semibold text-blue-700 mb-1">AI Response:</p>
-                      <p className="text-sm text-blue-900">{req.auto_response}</p>
+                      <p className="text-sm text-blue-900">{selectedRequest.auto_response}</p>
                     </div>
                   )}
 
-                  {req.admin_response && (
+                  {selectedRequest?.id === req.id && selectedRequest.admin_response && (
                     <div className="p-3 bg-green-50 rounded-lg">
                       <p className="text-xs font-semibold text-green-700 mb-1">Your Response:</p>
-                      <p className="text-sm text-green-900">{req.admin_response}</p>
+                      <p className="text-sm text-green-900">{selectedRequest.admin_response}</p>
                     </div>
                   )}
 
@@ -442,6 +470,14 @@ const AdminDashboard = () => {
               </motion.div>
             ))
           )}
+
+          {nextCursor && (
+            <div className="text-center">
+              <Button variant="outline" onClick={handleLoadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading...' : 'Load more requests'}
+              </Button>
+            </div>
+          )}
         </div>
 
         {/* Response Panel */}
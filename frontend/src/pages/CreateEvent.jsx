@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react'
 import { useNavigate } from 'react-router-dom'
 import { useEvents } from '../context/EventContext'
 import { useAuth } from '../context/AuthContext'
-import { Calendar, MapPin, FileText, Image as ImageIcon, Lock, TrendingUp, Sparkles } from 'lucide-react'
+import { Calendar, MapPin, FileText, Image as ImageIcon, Lock, TrendingUp, Sparkles, Users } from 'lucide-react'
 import Button from '../components/ui/Button'
 import Card from '../components/ui/Card'
 import Input from '../components/ui/Input'
@@ -28,6 +28,7 @@ const CreateEvent = () => {
     registration_url: '',
     society: '',
     event_password: '',
+    capacity: '',
   })
   const [selectedLocation, setSelectedLocation] = useState(null)
   const [lockEvent, setLockEvent] = useState(false)
@@ -119,6 +120,9 @@ const CreateEvent = () => {
       if (!lockEvent) {
         delete eventData.event_password
       }
+      if (!eventData.capacity) {
+        delete eventData.capacity
+      }
       
       // Add location data if privileged user selected a location
       if (isPrivileged && selectedLocation) {
@@ -271,6 +275,20 @@ const CreateEvent = () => {
             )}
 
             <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
+              <div>
+                <label className="flex items-center gap-2 text-sm font-medium text-gray-700 mb-2">
+                  <Users className="w-4 h-4" />
+                  Capacity (optional)
+                </label>
+                <Input
+                  type="number"
+                  min="1"
+                  name="capacity"
+                  value={formData.capacity}
+                  onChange={handleChange}
+                  placeholder="Leave empty for unlimited seats"
+                />
+              </div>
             </div>
 
             <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
@@ -58,7 +58,12 @@ const EventDetail = () => {
     setSubmitting(true)
 
     try {
-      await registerEvent(id, null, email)
+      const result = await registerEvent(id, null, email)
+      if (result.waitlisted) {
+        setShowEmailInput(false)
+        alert(`${result.message} (position ${result.position})`)
+        return
+      }
       setRegistered(true)
       setRegistrations(prev => prev + 1)
       setShowEmailInput(false)
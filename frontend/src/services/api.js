@@ -31,15 +31,35 @@ export const getEvents = async (filters = {}) => {
   return response.data
 }
 
+// Events starting in [from, to); from/to are ISO dates like '2025-03-01'
+export const getEventsInRange = async (from, to, params = {}) => {
+  const response = await api.get('/events/range', { params: { from, to, ...params } })
+  return response.data
+}
+
+// Events near a point, nearest first: params { lat, lng, radius } (metres)
+// or { bbox: 'min_lat,min_lng,max_lat,max_lng' }, plus optional category/limit
+export const getNearbyEvents = async (params) => {
+  const response = await api.get('/events/nearby', { params })
+  return response.data
+}
+
+// Subscription URLs (.ics) for calendar apps: { user_feed, events_feed }
+export const getCalendarFeeds = async () => {
+  const response = await api.get('/calendar/feeds')
+  return response.data
+}
+
 export const getEvent = async (id) => {
   const response = await api.get(`/events/${id}`)
   return response.data
 }
 
-export const registerForEvent = async (eventId, password = null) => {
+export const registerForEvent = async (eventId, password = null, accessToken = null) => {
   try {
     const response = await api.post(`/events/${eventId}/register`, {
-      event_password: password
+      event_password: password,
+      event_access_token: accessToken
     })
     return response.data
   } catch (error) {
@@ -95,6 +115,26 @@ export const registerEvent = async (eventId, eventPassword = null, email = null)
   }
 }
 
+// Register a list of emails at once (society presidents and admins)
+export const registerTeam = async (eventId, emails, eventPassword = null) => {
+  try {
+    const response = await api.post(`/events/${eventId}/register/bulk`, {
+      emails,
+      event_password: eventPassword
+    })
+    return response.data
+  } catch (error) {
+    console.error('Error registering team:', error)
+    if (error.response) {
+      if (error.response.data.requires_password) {
+        throw { requiresPassword: true, message: error.response.data.error }
+      }
+      throw new Error(error.response.data.error || 'Failed to register team')
+    }
+    throw new Error('Network error. Is the backend running?')
+  }
+}
+
 export const markAsRegistered = async (eventId) => {
   try {
     const response = await api.post(`/events/${eventId}/mark-registered`)
@@ -143,9 +183,10 @@ export const getUserProfile = async (userId) => {
   }
 }
 
-export const getUserEvents = async (userId) => {
+// params: { limit, upcoming_cursor, past_cursor } to page through either bucket
+export const getUserEvents = async (userId, params = {}) => {
   try {
-    const response = await api.get(`/users/${userId}/events`)
+    const response = await api.get(`/users/${userId}/events`, { params })
     return response.data
   } catch (error) {
     console.error('Error fetching user events:', error)
@@ -43,9 +43,18 @@ export const submitEventRequest = async (requestText) => {
   }
 }
 
-export const getEventRequests = async (status = 'all') => {
+// Returns one page: { requests, next_cursor }. Pass next_cursor back to get the next page.
+// include: optional comma-separated extras, e.g. 'responses' for the response texts.
+export const getEventRequests = async (status = 'all', cursor = null, include = null) => {
   try {
-    const response = await api.get(`/assistant/requests?status=${status}`)
+    const params = { status }
+    if (cursor) {
+      params.cursor = cursor
+    }
+    if (include) {
+      params.include = include
+    }
+    const response = await api.get('/assistant/requests', { params })
     return response.data
   } catch (error) {
     console.error('Error fetching requests:', error)
@@ -53,6 +62,17 @@ export const getEventRequests = async (status = 'all') => {
   }
 }
 
+// Full request, including the auto and admin response texts
+export const getEventRequest = async (requestId) => {
+  try {
+    const response = await api.get(`/assistant/requests/${requestId}`)
+    return response.data
+  } catch (error) {
+    console.error('Error fetching request:', error)
+    throw error
+  }
+}
+
 export const respondToRequest = async (requestId, response, status = 'responded') => {
   try {
     const result = await api.post(`/assistant/requests/${requestId}/respond`, {
@@ -95,3 +95,13 @@ export const predictEventSuccess = async (eventData) => {
     throw error
   }
 }
+
+export const predictEventsBatch = async (events) => {
+  try {
+    const response = await api.post('/ml/predict-batch', { events })
+    return response.data
+  } catch (error) {
+    console.error('Error predicting events batch:', error)
+    throw error
+  }
+}